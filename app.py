@@ -1,14 +1,32 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import replace
+from datetime import timedelta
 from hashlib import sha256
+import json
+import os
 from pathlib import Path
+from uuid import uuid4
 
 import pandas as pd
 import plotly.express as px
 import streamlit as st
 
 from oscar_noel_audit import AuditConfig, build_audit_artifacts, load_context_markdown, load_votes_csv
+from oscar_noel_audit.candidates import build_candidate_mapping, canonicalize_choices, censor_choices
+from oscar_noel_audit.charts import daily_volume, hour_day_matrix, vote_series
+from oscar_noel_audit.domains import domain_table
+from oscar_noel_audit.downsampling import downsample
+from oscar_noel_audit.io import file_fingerprint, load_choices_csv
+from oscar_noel_audit.origins import analyze_origins, find_origin_columns
+from oscar_noel_audit.preview import AuditPreview, BackgroundAudits, preview_audit, sample_votes_csv
+from oscar_noel_audit.profiling import StageProfiler, timings_frame
+from oscar_noel_audit.resampling import bootstrap_counts, ranking_counts
+from oscar_noel_audit.rules import RuleError, load_rules
+from oscar_noel_audit.scenarios import Scenario, get_scenario
+from oscar_noel_audit.store import ArtifactStore, StoredAudit
+from oscar_noel_audit.upload_cache import UploadCache
 
 
 def _default_paths() -> tuple[Path, Path]:
@@ -22,6 +40,19 @@ def _hash_email(email: str) -> str:
     return sha256(email.encode("utf-8")).hexdigest()[:12]
 
 
+# Maximum points per series sent to the browser; outliers are kept on top of it
+DISPLAY_POINTS = 2000
+
+# How long a rerun waits for the full audit before showing the sampled preview
+PREVIEW_WAIT_SECONDS = 1.5
+
+# Finished audits kept on disk (oldest leave first)
+STORED_AUDITS = 16
+
+# Store writer thread and the save of each input fingerprint
+StoreSaves = tuple[ThreadPoolExecutor, dict[str, Future]]
+
+
 def _find_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
     cols = {c.lower(): c for c in df.columns}
     for cand in candidates:
@@ -31,9 +62,99 @@ def _find_col(df: pd.DataFrame, candidates: list[str]) -> str | None:
     return None
 
 
-@st.cache_data(show_spinner=False)
-def _load_raw(csv_path: str) -> pd.DataFrame:
-    return load_votes_csv(csv_path)
+def _from_store(stored: StoredAudit):
+    artifacts = stored.artifacts
+    return artifacts.raw, stored.table("candidate_mapping"), artifacts, stored.manifest["input_fingerprint"]
+
+
+def _exact_audit(csv_path: str, cfg: AuditConfig, merge_spellings: bool, saves: StoreSaves):
+    """Full audit, run in a background worker (no Streamlit calls in here)."""
+    store = ArtifactStore(max_audits=STORED_AUDITS)
+    fingerprint = file_fingerprint(csv_path)
+    options = {"merge_spellings": merge_spellings}
+    stored = store.find(fingerprint, cfg, options)
+    if stored is not None:
+        return _from_store(stored)
+
+    # Memory tracking (tracemalloc) slows every stage down, so the dashboard only times them
+    profiler = StageProfiler(track_memory=False)
+    raw = load_votes_csv(csv_path, profiler=profiler)
+
+    # Canonicalize and censor over distinct candidates only; rows get categorical codes
+    candidate_mapping = build_candidate_mapping(raw["choice"])
+    if merge_spellings:
+        raw["choice"] = canonicalize_choices(raw["choice"], candidate_mapping)
+    raw["choice"] = censor_choices(raw["choice"])
+
+    artifacts = build_audit_artifacts(raw, cfg, profiler=profiler)
+    # Saved off the critical path; the next session with this file and these rules opens it from disk
+    writer, pending = saves
+    pending[fingerprint] = writer.submit(
+        store.save,
+        artifacts,
+        cfg,
+        input_fingerprint=fingerprint,
+        name=Path(csv_path).name,
+        options=options,
+        extra_tables={"candidate_mapping": candidate_mapping},
+    )
+    return raw, candidate_mapping, artifacts, fingerprint
+
+
+@st.cache_resource(show_spinner=False)
+def _store_saves() -> StoreSaves:
+    """One writer thread per server process and the saves by input fingerprint, so failures reach the page."""
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="store"), {}
+
+
+def _report_store_save(fingerprint: str) -> None:
+    save = _store_saves()[1].get(fingerprint)
+    if save is not None and save.done() and save.exception() is not None:
+        exc = save.exception()
+        st.sidebar.warning(f"A auditoria não foi salva no histórico: {type(exc).__name__}: {exc}")
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _open_stored(key: str):
+    return _from_store(ArtifactStore().open(key))
+
+
+# One pool per server process; finished audits are shared by every session
+@st.cache_resource(show_spinner=False)
+def _background_audits() -> BackgroundAudits:
+    return BackgroundAudits(max_workers=2, max_entries=4)
+
+
+# Shared read-only across sessions; a cache_data copy would re-pickle the sample on every rerun
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _preview(key: str, csv_path: str, _cfg: AuditConfig, merge_spellings: bool) -> AuditPreview:
+    sample = sample_votes_csv(csv_path)
+    votes = sample.votes
+    if merge_spellings:
+        # Mapping from the full column, as in the exact audit; the sample would pick other canonical names
+        votes["choice"] = canonicalize_choices(votes["choice"], build_candidate_mapping(load_choices_csv(csv_path)))
+    votes["choice"] = censor_choices(votes["choice"])
+    return preview_audit(sample, _cfg)
+
+
+@st.cache_resource(show_spinner=False)
+def _upload_cache() -> UploadCache:
+    cache = UploadCache()
+    cache.cleanup()
+    return cache
+
+
+def _uploaded_path(uploaded_file) -> str:
+    # Hash each upload once per session; the content-addressed path is what
+    # background audits are keyed on, so the same file is parsed once for every session
+    paths = st.session_state.setdefault("upload_paths", {})
+    key = getattr(uploaded_file, "file_id", None) or (uploaded_file.name, uploaded_file.size)
+    path = paths.get(key)
+    # Each reuse refreshes the entry's recency, so files in use are the last to be evicted
+    if path is None or not _upload_cache().touch(path):
+        path = str(_upload_cache().put(uploaded_file.getvalue()))
+        paths[key] = path
+    return path
 
 
 @st.cache_data(show_spinner=False)
@@ -41,39 +162,157 @@ def _load_context(path: str) -> str:
     return load_context_markdown(path)
 
 
-def _censor_name(name: str) -> str:
-    """
-    Censura nomes de candidatos para anonimização.
-    Mantém primeira letra de cada palavra e substitui demais por asteriscos.
-    """
-    import re
+# Figure builders are keyed by data fingerprint + config; the frames themselves
+# (underscore arguments) are not hashed by Streamlit on every rerun.
+@st.cache_data(show_spinner=False, max_entries=16)
+def _daily_figure(key: str, _flagged: pd.DataFrame, _email_codes=None):
+    fig = px.line(
+        daily_volume(_flagged, _email_codes),
+        x="date",
+        y=["submissions", "unique_emails", "duplicates"],
+        title="Volume diário (submissões, únicos e duplicatas)",
+    )
+    fig.update_layout(legend_title_text="", margin=dict(l=10, r=10, t=40, b=10))
+    return fig
 
-    # Split by common separators (space, dash)
-    parts = re.split(r'(\s*-\s*|\s+)', name)
-    censored_parts = []
 
-    for part in parts:
-        # Keep separators as-is
-        if re.match(r'^\s*-\s*$|^\s+$', part):
-            censored_parts.append(part)
-            continue
+@st.cache_data(show_spinner=False, max_entries=16)
+def _heatmap_figure(key: str, _flagged: pd.DataFrame):
+    fig = px.imshow(
+        hour_day_matrix(_flagged),
+        aspect="auto",
+        title="Mapa de calor (hora x dia)",
+        labels=dict(x="Dia", y="Hora", color="Votos"),
+    )
+    fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _hourly_figure(key: str, _outliers: pd.DataFrame):
+    shown = downsample(_outliers, "hour_bucket", "votes", max_points=DISPLAY_POINTS, keep="is_outlier")
+    fig = px.bar(
+        shown,
+        x="hour_bucket",
+        y="votes",
+        color="is_outlier",
+        title="Votos por hora (outliers por MAD-zscore)",
+    )
+    fig.update_layout(legend_title_text="", margin=dict(l=10, r=10, t=40, b=10))
+    return fig
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _minute_figure(key: str, _flagged: pd.DataFrame):
+    series = vote_series(_flagged, freq="min", max_points=DISPLAY_POINTS)
+    fig = px.line(
+        series,
+        x="bucket",
+        y="votes",
+        title=f"Votos por minuto (até {DISPLAY_POINTS} pontos, outliers preservados)",
+        render_mode="webgl",
+    )
+    spikes = series[series["is_outlier"]]
+    fig.add_scatter(x=spikes["bucket"], y=spikes["votes"], mode="markers", name="outlier", marker=dict(color="red"))
+    fig.update_layout(legend_title_text="", margin=dict(l=10, r=10, t=40, b=10))
+    return fig
 
-        # Split into words
-        words = part.split()
-        censored_words = []
 
-        for word in words:
-            if len(word) <= 2:
-                # Keep very short words
-                censored_words.append(word)
-            else:
-                # First letter + asterisks for rest
-                censored = word[0] + '*' * (len(word) - 1)
-                censored_words.append(censored)
+@st.cache_data(show_spinner=False, max_entries=16)
+def _domain_figure(key: str, _flagged: pd.DataFrame, _cfg: AuditConfig):
+    domains = domain_table(_flagged, _cfg).head(15)
+    domains["category"] = domains["category"].fillna("outro")
+    return px.bar(domains, x="domain", y="votes", color="category", title="Domínios de e-mail (top 15)")
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def _origin_clusters(key: str, _flagged: pd.DataFrame):
+    return analyze_origins(_flagged, top=50)
 
-        censored_parts.append(' '.join(censored_words))
 
-    return ''.join(censored_parts)
+def _estimate(value: float, se: float, z: float) -> str:
+    text = f"{value:,.0f}".replace(",", ".")
+    return text if se == 0 else f"{text} ± {z * se:,.0f}".replace(",", ".")
+
+
+def _render_preview(preview: AuditPreview, scenario: Scenario) -> None:
+    sample = preview.sample
+    st.info(
+        f"⏳ **Prévia aproximada** — amostra de {len(sample.votes):,} de ~{sample.estimated_rows:,} votos "
+        f"({sample.fraction:.1%}) em {sample.n_blocks:,} blocos espalhados pelo período. "
+        f"Barras de erro: IC {preview.ci:.0%}. A auditoria completa está rodando e substitui estes "
+        "números quando terminar.".replace(",", ".")
+    )
+    tabs = st.tabs(
+        ["Visão geral", "Insights Críticos", "Suspeitas", "Visualizações", "Qualidade", "Contexto"]
+    )
+
+    with tabs[0]:
+        st.subheader(f"Ranking estimado — {scenario.label}")
+        total, total_se = preview.total()
+        kept, kept_se = preview.total(scenario)
+        k1, k2 = st.columns(2)
+        k1.metric("Total bruto (estimado)", _estimate(total, total_se, preview.z))
+        k2.metric("Votos finais (estimado)", _estimate(kept, kept_se, preview.z))
+        st.caption(
+            "A deduplicação só enxerga repetições dentro da amostra: e-mails com poucas "
+            "repetições espalhadas no tempo podem ser contados mais de uma vez."
+        )
+
+        ranking = preview.ranking(scenario).head(12).iloc[::-1]
+        fig = px.bar(
+            ranking,
+            x="share",
+            y="choice",
+            orientation="h",
+            error_x=ranking["share_hi"] - ranking["share"],
+            error_x_minus=ranking["share"] - ranking["share_lo"],
+            title="Participação estimada (top 12)",
+        )
+        fig.update_layout(xaxis_tickformat=".0%", margin=dict(l=10, r=10, t=40, b=10))
+        st.plotly_chart(fig, width="stretch")
+
+    with tabs[2]:
+        st.subheader("Votos sinalizados (estimativa)")
+        rates = preview.flag_rates()
+        fig = px.bar(
+            rates,
+            x="flag",
+            y="rate",
+            color="lower_bound",
+            error_y=rates["rate_hi"] - rates["rate"],
+            error_y_minus=rates["rate"] - rates["rate_lo"],
+        )
+        fig.update_layout(
+            yaxis_tickformat=".1%", legend_title_text="limite inferior", margin=dict(l=10, r=10, t=10, b=10)
+        )
+        st.plotly_chart(fig, width="stretch")
+        st.caption("Limite inferior: o voto anterior do mesmo candidato ou e-mail pode ter ficado fora da amostra.")
+
+    with tabs[3]:
+        hourly = preview.hourly()
+        fig = px.scatter(
+            hourly,
+            x="hour_bucket",
+            y="votes",
+            error_y=hourly["votes_hi"] - hourly["votes"],
+            error_y_minus=hourly["votes"] - hourly["votes_lo"],
+            title="Votos por hora (estimados)",
+        )
+        fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
+        st.plotly_chart(fig, width="stretch")
+
+    for i in (1, 4, 5):
+        with tabs[i]:
+            st.info("Disponível quando a auditoria completa terminar.")
+
+
+@st.fragment(run_every=1.0)
+def _swap_when_done(future: Future) -> None:
+    # Polls without rerunning the page; the full rerun picks up the finished audit
+    if future.done():
+        st.rerun()
+    st.caption("Auditoria completa em andamento…")
 
 
 def main() -> None:
@@ -92,21 +331,24 @@ def main() -> None:
             help="Arquivo CSV com as colunas: timestamp, email, candidato"
         )
 
+        history = {audit.key: audit for audit in ArtifactStore(max_audits=STORED_AUDITS).audits()}
+        history_key = st.selectbox(
+            "Ou reabra uma auditoria salva",
+            [None, *history],
+            format_func=lambda k: "—" if k is None else f"{history[k].name} ({history[k].created_at})",
+            help="Auditorias concluídas ficam gravadas em disco e abrem sem o CSV e sem recalcular.",
+        )
+
         # Use uploaded file or default path
+        csv_path = None
         if uploaded_file is not None:
-            import tempfile
-            import os
-            # Save uploaded file to temp location
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                csv_path = tmp_file.name
-        else:
+            csv_path = _uploaded_path(uploaded_file)
+        elif default_csv.exists():
             # Try to use default path if it exists
-            if default_csv.exists():
-                csv_path = str(default_csv)
-            else:
-                st.warning("⚠️ Nenhum arquivo CSV foi carregado. Por favor, faça upload de um arquivo para continuar.")
-                st.stop()
+            csv_path = str(default_csv)
+        elif history_key is None:
+            st.warning("⚠️ Nenhum arquivo CSV foi carregado. Por favor, faça upload de um arquivo para continuar.")
+            st.stop()
 
         ctx_path = st.text_input("Contexto (Markdown)", value=str(default_ctx))
 
@@ -125,6 +367,16 @@ def main() -> None:
             0.0, 10.0, 2.0, 0.5,
             help="Tempo mínimo entre votos no mesmo candidato. Útil para detectar bots focados em um candidato específico."
         )
+        min_email_gap = st.slider(
+            "Intervalo mínimo entre votos do mesmo e-mail (segundos)",
+            0.0, 120.0, 10.0, 1.0,
+            help="Reenvios do mesmo e-mail mais rápidos que isso são marcados. Remetentes com intervalos quase constantes são marcados como cadência regular."
+        )
+        coburst_window = st.slider(
+            "Janela de lote simultâneo (segundos)",
+            1.0, 30.0, 3.0, 1.0,
+            help="Votos seguidos no mesmo candidato dentro desta janela formam um lote. Lotes que compartilham e-mails são agrupados no mesmo componente."
+        )
 
         st.markdown("**Detecção de Horários Incomuns**")
         night_start, night_end = st.slider(
@@ -133,6 +385,28 @@ def main() -> None:
             help="Votos neste horário são marcados como suspeitos por serem menos comuns."
         )
 
+        st.markdown("**Regras personalizadas**")
+        rules_file = st.file_uploader(
+            "Regras declaradas (TOML/JSON)",
+            type=["toml", "json"],
+            help="Cada regra vira uma coluna flag_rule_<nome> e pode remover votos dos cenários listados nela.",
+        )
+        rule_files: tuple[str, ...] = ()
+        if rules_file is not None:
+            rules_path = str(_upload_cache().put(rules_file.getvalue(), suffix=Path(rules_file.name).suffix.lower()))
+            try:
+                load_rules(rules_path)
+                rule_files = (rules_path,)
+            except RuleError as exc:
+                st.error(f"Regras ignoradas: {exc}")
+
+        st.markdown("**Candidatos**")
+        merge_spellings = st.checkbox(
+            "Unificar grafias do mesmo candidato",
+            value=False,
+            help="Agrupa variações de nome (ex.: com/sem sobrenome) antes da contagem. Revise o mapeamento na aba Qualidade."
+        )
+
         st.markdown("**Privacidade**")
         show_email_hashes = st.checkbox(
             "Mostrar hashes de e-mail (não reversível)",
@@ -148,7 +422,7 @@ def main() -> None:
             help="""
             • A: Remove apenas dias 20-22 e duplicatas
             • B: Remove também padrão nome.sobrenome### (Recomendado)
-            • C: Remove padrão + domínios typo + plus pattern
+            • C: Remove padrão + domínios typo/descartáveis + plus pattern
             """
         )
 
@@ -162,34 +436,60 @@ def main() -> None:
         excluded_days=excluded_days,
         min_global_delta_seconds=float(min_global),
         min_per_choice_delta_seconds=float(min_choice),
+        min_email_gap_seconds=float(min_email_gap),
+        coburst_window_seconds=float(coburst_window),
         night_hours=(int(night_start), int(night_end)),
+        rule_files=rule_files,
     )
 
-    raw = _load_raw(csv_path)
-
-    # Apply name censorship to the raw data
-    raw["choice"] = raw["choice"].apply(_censor_name)
-
-    artifacts = build_audit_artifacts(raw, cfg)
+    if history_key is not None:
+        # A saved audit keeps the rules it was run with
+        stored = history[history_key]
+        cfg = stored.config
+        merge_spellings = bool(stored.manifest["options"].get("merge_spellings", False))
+        st.sidebar.info(
+            f"Auditoria salva em {stored.created_at}: valem as regras gravadas com ela, não os controles acima."
+        )
+        raw, candidate_mapping, artifacts, fingerprint = _open_stored(history_key)
+    else:
+        # The exact audit runs in a worker; until it finishes, show the sampled preview
+        stat = os.stat(csv_path)
+        job_key = "|".join(
+            [csv_path, str(stat.st_size), str(stat.st_mtime_ns), str(merge_spellings), json.dumps(cfg.to_dict(), sort_keys=True)]
+        )
+        session = st.session_state.setdefault("audit_session", uuid4().hex)
+        future = _background_audits().submit(
+            job_key, _exact_audit, csv_path, cfg, merge_spellings, _store_saves(), session=session
+        )
+        wait([future], timeout=PREVIEW_WAIT_SECONDS)
+        if future.cancelled():
+            # Superseded by a newer request of this session before it started: ask again
+            future = _background_audits().submit(
+                job_key, _exact_audit, csv_path, cfg, merge_spellings, _store_saves(), session=session
+            )
+            wait([future], timeout=PREVIEW_WAIT_SECONDS)
+        if not future.done():
+            _render_preview(_preview(job_key, csv_path, cfg, merge_spellings), get_scenario(filtering_scenario))
+            _swap_when_done(future)
+            st.stop()
+        try:
+            raw, candidate_mapping, artifacts, fingerprint = future.result()
+        except Exception:
+            _background_audits().discard(job_key)
+            raise
+        _report_store_save(fingerprint)
+    email_index = artifacts.email_index
+    figure_key = "|".join(
+        [fingerprint, str(merge_spellings), json.dumps(cfg.to_dict(), sort_keys=True)]
+    )
 
     # Apply rules based on selected scenario
-    if filtering_scenario == "B - Rigoroso":
-        # Scenario B: Remove synthetic email pattern
-        cleaned = artifacts.flagged_raw[
-            (~artifacts.flagged_raw["exclude_day"]) &
-            (~artifacts.flagged_raw["flag_synthetic_email_suffix3"])
-        ].drop_duplicates("email")
-    elif filtering_scenario == "C - Conservador":
-        # Scenario C: Remove pattern + other minor suspicious signals
-        cleaned = artifacts.flagged_raw[
-            (~artifacts.flagged_raw["exclude_day"]) &
-            (~artifacts.flagged_raw["flag_synthetic_email_suffix3"]) &
-            (~artifacts.flagged_raw["flag_suspicious_domain_typo"]) &
-            (~artifacts.flagged_raw["suspicious_email_plus_3dig_gmail"])
-        ].drop_duplicates("email")
-    else:
-        # Scenario A: Basic rules (default)
+    scenario = get_scenario(filtering_scenario)
+    rule_filtered = artifacts.rules is not None and artifacts.rules.scenario(scenario) != scenario
+    if scenario.key == "A" and not rule_filtered:
         cleaned = artifacts.cleaned
+    else:
+        cleaned = artifacts.scenario_votes(scenario)
 
     tabs = st.tabs(
         ["Visão geral", "Insights Críticos", "Suspeitas", "Visualizações", "Qualidade", "Contexto"]
@@ -205,16 +505,17 @@ def main() -> None:
         elif filtering_scenario == "B - Rigoroso":
             st.info("📊 **Cenário B Ativo**: Regras rigorosas (remove padrão nome.sobrenome###) - **Recomendado**")
         else:
-            st.success("📊 **Cenário C Ativo**: Regras conservadoras (remove padrão + domínios typo + plus pattern)")
+            st.success("📊 **Cenário C Ativo**: Regras conservadoras (remove padrão + domínios typo/descartáveis + plus pattern)")
 
         k1, k2, k3, k4 = st.columns(4)
         k1.metric("Total bruto", f"{len(raw):,}".replace(",", "."))
         k2.metric("Após excluir dias", f"{len(flagged[~flagged['exclude_day']]):,}".replace(",", "."))
-        k3.metric("Após dedupe e-mail", f"{len(flagged[~flagged['exclude_day']].drop_duplicates('email')):,}".replace(",", "."))
+        k3.metric("Após dedupe e-mail", f"{email_index.unique_count(~flagged['exclude_day']):,}".replace(",", "."))
         k4.metric("Votos finais", f"{len(cleaned):,}".replace(",", "."))
 
         top = cleaned["choice"].value_counts().reset_index()
         top.columns = ["choice", "votes"]
+        top = top[top["votes"] > 0]
         top["share"] = top["votes"] / top["votes"].sum() if len(top) else 0.0
 
         # Format share as percentage
@@ -235,6 +536,33 @@ def main() -> None:
             fig.update_layout(margin=dict(l=10, r=10, t=40, b=10))
             st.plotly_chart(fig, width="stretch")
 
+        timeline = artifacts.timeline(scenario)
+        if timeline.total:
+            st.markdown("**Linha do tempo** — quem liderava em cada momento")
+            moment = st.slider(
+                "Ranking até",
+                min_value=timeline.start.floor("h").to_pydatetime(),
+                max_value=timeline.end.ceil("h").to_pydatetime(),
+                value=timeline.end.ceil("h").to_pydatetime(),
+                step=timedelta(hours=1),
+                format="DD/MM HH:mm",
+            )
+            at_moment = timeline.ranking(moment, top=12)
+            votes_so_far = int(timeline.counts(moment).sum())
+            st.caption(
+                f"{votes_so_far:,} votos do {scenario.label} até {moment:%d/%m %H:%M}".replace(",", ".")
+                + (f" — líder: **{at_moment['choice'].iloc[0]}**" if len(at_moment) else "")
+            )
+            window_rules = artifacts.rules.window_rules(scenario.key) if artifacts.rules is not None else []
+            if window_rules:
+                st.caption(
+                    f"As regras de janela {', '.join(window_rules)} usam a base inteira: votos de uma rajada "
+                    "completada depois deste instante já aparecem como removidos."
+                )
+            fig = px.bar(at_moment.iloc[::-1], x="share", y="choice", orientation="h", text="votes")
+            fig.update_layout(xaxis_tickformat=".0%", margin=dict(l=10, r=10, t=10, b=10))
+            st.plotly_chart(fig, width="stretch")
+
     with tabs[1]:
         st.subheader("Insights Críticos da Auditoria")
 
@@ -328,10 +656,7 @@ def main() -> None:
         })
 
         # Scenario B: Remove pattern (simulate)
-        cleaned_no_pattern = flagged[
-            (~flagged["exclude_day"]) &
-            (~flagged["flag_synthetic_email_suffix3"])
-        ].drop_duplicates("email")
+        cleaned_no_pattern = artifacts.scenario_votes("B")
 
         if len(cleaned_no_pattern) > 0:
             top_b = cleaned_no_pattern["choice"].value_counts().head(3)
@@ -352,6 +677,19 @@ def main() -> None:
         massivo do padrão suspeito no resultado da votação.
         """)
 
+        st.markdown("### Estabilidade do ranking (bootstrap)")
+        st.caption(
+            "Reamostragem multinomial das contagens do cenário ativo (2.000 réplicas). "
+            "Mostra o intervalo de 95% da participação e a probabilidade de cada candidato ficar em 1º."
+        )
+        stability = bootstrap_counts(ranking_counts(cleaned), n_replicates=2000, seed=0, scenario=scenario.key)
+        stab_display = stability.table.head(8).copy()
+        for col in ["share", "share_lo", "share_hi", "p_first", "p_top3"]:
+            stab_display[col] = stab_display[col].apply(lambda x: f"{x*100:.1f}%")
+        st.dataframe(stab_display, width="stretch", hide_index=True)
+        margin_lo, margin_hi = stability.winner_margin_ci
+        st.caption(f"Margem 1º–2º (IC 95%): {margin_lo*100:.1f} a {margin_hi*100:.1f} pontos percentuais.")
+
         st.markdown("---")
 
         st.markdown("""
@@ -389,131 +727,93 @@ def main() -> None:
         a4.metric("Domínio typo", str(s.suspicious_domains))
         a5.metric("Padrão nome.sobrenome###", str(s.synthetic_email_suffix3))
         a6.metric("Máx. votos no mesmo e-mail", str(s.max_votes_same_email))
-
-        ip_col = _find_col(flagged, ["ip", "ip_address", "endereco ip", "endereço ip"])
-        ua_col = _find_col(flagged, ["user_agent", "useragent", "navegador", "user agent"])
-        device_col = _find_col(flagged, ["device", "dispositivo", "device_id", "device id"])
-
-        if not any([ip_col, ua_col, device_col]):
+        b1, b2, b3, b4 = st.columns(4)
+        b1.metric("Reenvio rápido (mesmo e-mail)", str(s.email_short_gaps))
+        b2.metric("Votos com cadência regular", str(s.email_regular_cadence))
+        b3.metric("Remetentes com cadência regular", str(s.regular_cadence_senders))
+        b4.metric("Domínio descartável", str(s.disposable_domains))
+        if artifacts.rules is not None and artifacts.rules.rules:
+            st.markdown("**Regras personalizadas**")
+            for column, rule in zip(st.columns(len(artifacts.rules.rules)), artifacts.rules.rules):
+                column.metric(rule.name, str(int(flagged[rule.column].sum())), help=rule.description or None)
+
+        origin_columns = find_origin_columns(flagged)
+        if not origin_columns.available:
             st.markdown(
                 "Limitação: a base fornecida não contém IP, user-agent ou identificador de dispositivo; "
                 "qualquer análise desses itens só é possível se esses campos existirem no CSV."
             )
 
-        sub = flagged.copy()
+        flag_cols = [
+            "flag_global_short_delta",
+            "flag_choice_short_delta",
+            "flag_night_vote",
+            "flag_synthetic_email_suffix3",
+            "flag_suspicious_domain_typo",
+            "flag_disposable_domain",
+            "flag_email_short_gap",
+            "flag_email_regular_cadence",
+        ]
+        flag_cols += artifacts.rules.columns if artifacts.rules is not None else []
+        # Only the displayed columns of the flagged rows are copied, never the whole base
+        suspicious = flagged[flag_cols].any(axis=1)
+        suspicious_rows = (
+            flagged.loc[suspicious, ["timestamp", "email", "choice", *flag_cols]]
+            .sort_values("timestamp", ascending=False)
+            .head(500)
+        )
         if show_email_hashes:
-            sub["email_hash"] = sub["email"].map(_hash_email)
-            cols = [
-                "timestamp",
-                "email_hash",
-                "choice",
-                "flag_global_short_delta",
-                "flag_choice_short_delta",
-                "flag_night_vote",
-                "flag_synthetic_email_suffix3",
-                "flag_suspicious_domain_typo",
-            ]
-        else:
-            cols = [
-                "timestamp",
-                "choice",
-                "flag_global_short_delta",
-                "flag_choice_short_delta",
-                "flag_night_vote",
-                "flag_synthetic_email_suffix3",
-                "flag_suspicious_domain_typo",
-            ]
-
-        suspicious_rows = sub[
-            sub["flag_global_short_delta"]
-            | sub["flag_choice_short_delta"]
-            | sub["flag_night_vote"]
-            | sub["flag_synthetic_email_suffix3"]
-            | sub["flag_suspicious_domain_typo"]
-        ].copy()
-        suspicious_rows = suspicious_rows.sort_values("timestamp", ascending=False)
+            suspicious_rows.insert(1, "email_hash", suspicious_rows["email"].map(_hash_email))
+        suspicious_rows = suspicious_rows.drop(columns=["email"])
         st.markdown("**Exemplos de votos sinalizados (até 500)**")
-        st.dataframe(suspicious_rows[cols].head(500), width="stretch")
+        st.dataframe(suspicious_rows, width="stretch")
 
         st.markdown("**Repetição por e-mail (base bruta)**")
-        repeats = (
-            flagged["email"]
-            .value_counts()
-            .reset_index()
-        )
-        repeats.columns = ["email", "votes"]
-        repeats["votes"] = repeats["votes"].astype(int)
-        repeats = repeats[repeats["votes"] > 1].head(50)
+        repeats = email_index.repeat_senders(min_votes=2, top=50)[
+            ["email", "votes", "distinct_choices", "dominant_choice", "dominant_share", "min_gap_seconds"]
+        ]
         if show_email_hashes and not repeats.empty:
             repeats["email_hash"] = repeats["email"].map(_hash_email)
             repeats = repeats.drop(columns=["email"])
         st.dataframe(repeats, width="stretch")
 
-        cluster_cols = [c for c in [ip_col, ua_col, device_col] if c]
-        if cluster_cols:
-            st.markdown("**Clusters por origem (top 50)**")
-            clusters = (
-                flagged.groupby(cluster_cols)
-                .size()
-                .rename("votes")
-                .reset_index()
-                .sort_values("votes", ascending=False)
-                .head(50)
+        if artifacts.coburst is not None:
+            st.markdown(
+                f"**Lotes simultâneos (co-burst)** — {artifacts.coburst.n_components} componentes, "
+                f"{artifacts.coburst.votes} votos"
             )
-            st.dataframe(clusters, width="stretch")
-
-    with tabs[3]:
-        st.subheader("Visualizações interativas")
+            st.caption(
+                "Lotes com vários e-mails distintos votando no mesmo candidato em poucos segundos; "
+                "um componente junta lotes que compartilham e-mails."
+            )
+            st.dataframe(artifacts.coburst.components.head(50), width="stretch")
 
-        daily = (
-            flagged.assign(date=flagged["timestamp"].dt.date)
-            .groupby("date")
-            .agg(
-                submissions=("email", "size"),
-                unique_emails=("email", "nunique"),
-                duplicates=("email", lambda s: s.size - s.nunique()),
-                night_votes=("flag_night_vote", "sum"),
-                synthetic_suffix3=("flag_synthetic_email_suffix3", "sum"),
+        if artifacts.email_cohorts is not None and not artifacts.email_cohorts.empty:
+            cohorts = artifacts.email_cohorts
+            st.markdown(
+                f"**Sufixos numéricos por coorte** — {int(cohorts['uniform_like'].sum())} de {len(cohorts)} "
+                "coortes com perfil de sorteio"
             )
-            .reset_index()
-        )
+            st.caption(
+                "Coorte = radical do e-mail (ex.: nome.sobrenome), tamanho do sufixo, candidato e dia. "
+                "Primeiro/último dígito uniformes, fora de Benford e colisões na taxa de um sorteio "
+                "(collision_ratio ≈ 1) indicam gerador."
+            )
+            st.dataframe(cohorts.head(50), width="stretch")
 
-        fig_daily = px.line(
-            daily,
-            x="date",
-            y=["submissions", "unique_emails", "duplicates"],
-            title="Volume diário (submissões, únicos e duplicatas)",
-        )
-        fig_daily.update_layout(legend_title_text="", margin=dict(l=10, r=10, t=40, b=10))
-        st.plotly_chart(fig_daily, width="stretch")
-
-        heat = (
-            flagged.assign(date=flagged["timestamp"].dt.date, hour=flagged["timestamp"].dt.hour)
-            .groupby(["date", "hour"])
-            .size()
-            .rename("votes")
-            .reset_index()
-        )
-        heat_pivot = heat.pivot(index="hour", columns="date", values="votes").fillna(0)
-        fig_heat = px.imshow(
-            heat_pivot,
-            aspect="auto",
-            title="Mapa de calor (hora x dia)",
-            labels=dict(x="Dia", y="Hora", color="Votos"),
-        )
-        fig_heat.update_layout(margin=dict(l=10, r=10, t=40, b=10))
-        st.plotly_chart(fig_heat, width="stretch")
+        if origin_columns.available:
+            st.markdown("**Clusters por origem (top 50)**")
+            clusters = _origin_clusters(figure_key, flagged)
+            level = st.selectbox("Agrupar por", list(clusters), key="origin_level")
+            st.dataframe(clusters[level], width="stretch")
 
-        outliers = artifacts.hourly_outliers
-        fig_hour = px.bar(
-            outliers,
-            x="hour_bucket",
-            y="votes",
-            color="is_outlier",
-            title="Votos por hora (outliers por MAD-zscore)",
-        )
-        fig_hour.update_layout(legend_title_text="", margin=dict(l=10, r=10, t=40, b=10))
-        st.plotly_chart(fig_hour, width="stretch")
+    with tabs[3]:
+        st.subheader("Visualizações interativas")
+
+        st.plotly_chart(_daily_figure(figure_key, flagged, email_index.codes), width="stretch")
+        st.plotly_chart(_heatmap_figure(figure_key, flagged), width="stretch")
+        st.plotly_chart(_hourly_figure(figure_key, artifacts.hourly_outliers), width="stretch")
+        st.plotly_chart(_minute_figure(figure_key, flagged), width="stretch")
 
         st.markdown("**Mapa geográfico**")
         lat_col = _find_col(flagged, ["lat", "latitude"])
@@ -563,7 +863,7 @@ def main() -> None:
         st.subheader("Métricas de qualidade dos dados")
 
         excluded = int(flagged["exclude_day"].sum())
-        dup_total = int(flagged["email"].size - flagged["email"].nunique())
+        dup_total = email_index.duplicates
         plus_pattern = int(flagged["suspicious_email_plus_3dig_gmail"].sum())
         suffix3_pattern = int(flagged["flag_synthetic_email_suffix3"].sum())
 
@@ -574,12 +874,38 @@ def main() -> None:
         q4.metric("Padrão nome.sobrenome123", str(suffix3_pattern))
 
         st.markdown("**Distribuição por domínio (top 15)**")
-        dom = flagged["email_domain"].value_counts().head(15).reset_index()
-        dom.columns = ["domain", "votes"]
-        st.plotly_chart(
-            px.bar(dom, x="domain", y="votes", title="Domínios de e-mail (top 15)"),
-            width="stretch",
+        st.plotly_chart(_domain_figure(figure_key, flagged, cfg), width="stretch")
+
+        st.markdown("**Grafias de candidatos (mapeamento revisável)**")
+        # Compare the real spellings; censored names can collapse two of them into one
+        merged = candidate_mapping[
+            candidate_mapping["choice"].astype(str) != candidate_mapping["canonical"].astype(str)
+        ]
+        merged = merged.assign(
+            choice=censor_choices(merged["choice"]).astype(str),
+            canonical=censor_choices(merged["canonical"]).astype(str),
         )
+        if merged.empty:
+            st.caption("Nenhuma variação de grafia detectada.")
+        else:
+            status = "aplicado" if merge_spellings else "não aplicado (ative na barra lateral)"
+            st.caption(f"{len(merged)} variação(ões) detectada(s) — {status}.")
+            st.dataframe(merged.drop(columns=["suggestion"], errors="ignore"), width="stretch", hide_index=True)
+        if "suggestion" in candidate_mapping:
+            suggested = candidate_mapping[candidate_mapping["suggestion"].notna()]
+            if not suggested.empty:
+                st.caption(
+                    f"{len(suggested)} grafia(s) parecida(s) com outro candidato — só sugestões, nunca unificadas "
+                    "automaticamente (nomes parecidos podem ser pessoas diferentes)."
+                )
+                st.dataframe(
+                    suggested[["choice", "suggestion", "votes", "score"]].assign(
+                        choice=censor_choices(suggested["choice"]).astype(str),
+                        suggestion=censor_choices(suggested["suggestion"]).astype(str),
+                    ),
+                    width="stretch",
+                    hide_index=True,
+                )
 
         st.markdown("**Distribuição por candidato (dados limpos)**")
         st.plotly_chart(
@@ -587,6 +913,25 @@ def main() -> None:
             width="stretch",
         )
 
+        st.markdown("**Tempo por etapa (arquivo carregado)**")
+        timing = timings_frame(artifacts.profile)
+        if timing.empty:
+            st.caption("Sem medições nesta execução.")
+        else:
+            st.caption(
+                "Medido nesta execução; a leitura do CSV só aparece quando o arquivo não estava em cache."
+            )
+            timing["peak_mib"] = pd.to_numeric(timing["peak_bytes"]) / 2**20
+            st.dataframe(
+                timing.drop(columns=["peak_bytes"]).round({"seconds": 4, "peak_mib": 1}),
+                width="stretch",
+                hide_index=True,
+            )
+            st.plotly_chart(
+                px.bar(timing, x="seconds", y="stage", orientation="h", title="Tempo por etapa (s)"),
+                width="stretch",
+            )
+
         st.markdown("**Download**")
         anon = cleaned.copy()
         if "email" in anon.columns:
@@ -0,0 +1,136 @@
+"""Benchmark das etapas da auditoria sobre exportações sintéticas.
+
+Uso:
+  python benchmarks/bench_pipeline.py --sizes 1e4 1e5 1e6 --output bench_results.json
+
+Para cada tamanho, gera um CSV no formato do Google Forms (tráfego orgânico +
+campanhas de bot) e mede tempo, vazão (linhas/s) e pico de memória alocada
+(tracemalloc) em cada etapa. O resultado é gravado em JSON para comparar
+versões.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.cleaning import apply_user_rules
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.io import load_votes_csv
+from oscar_noel_audit.suspicion import detect_hourly_outliers, flag_suspicious_votes, hourly_counts
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def _measure(fn: Callable[[], Any], track_memory: bool) -> tuple[Any, float, int | None]:
+    if track_memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    try:
+        out = fn()
+        seconds = time.perf_counter() - t0
+        peak = tracemalloc.get_traced_memory()[1] if track_memory else None
+    finally:
+        if track_memory:
+            tracemalloc.stop()
+    return out, seconds, peak
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_size(rows: int, workdir: Path, repeat: int, track_memory: bool, seed: int) -> list[dict[str, Any]]:
+    cfg = AuditConfig.default()
+    csv_path = workdir / f"synthetic_{rows}.csv"
+    if not csv_path.exists():
+        write_forms_csv(ContestSpec.default(rows, seed=seed), csv_path)
+
+    state: dict[str, Any] = {}
+    stages: list[tuple[str, Callable[[], Any]]] = [
+        ("load_votes_csv", lambda: load_votes_csv(csv_path)),
+        ("apply_user_rules", lambda: apply_user_rules(state["load_votes_csv"], cfg)),
+        ("flag_suspicious_votes", lambda: flag_suspicious_votes(state["apply_user_rules"][1], cfg)),
+        ("hourly_counts", lambda: hourly_counts(state["apply_user_rules"][1])),
+        ("detect_hourly_outliers", lambda: detect_hourly_outliers(state["hourly_counts"])),
+    ]
+
+    results = []
+    for name, fn in stages:
+        timings = []
+        peaks = []
+        for _ in range(repeat):
+            out, seconds, peak = _measure(fn, track_memory)
+            timings.append(seconds)
+            peaks.append(peak)
+        state[name] = out
+        best = min(timings)
+        results.append(
+            {
+                "rows": rows,
+                "stage": name,
+                "repeat": repeat,
+                "seconds_best": best,
+                "seconds_median": float(np.median(timings)),
+                "rows_per_second": rows / best if best > 0 else None,
+                "peak_bytes": max(peaks) if track_memory else None,
+            }
+        )
+        print(f"{rows:>12,} {name:<24} {best:9.3f}s {rows / max(best, 1e-9):>14,.0f} linhas/s", flush=True)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", nargs="+", default=["1e4", "1e5", "1e6"], help="Número de linhas (ex.: 1e4 1e6 1e8)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--workdir", default=None, help="Diretório para reutilizar os CSVs gerados")
+    parser.add_argument("--no-memory", action="store_true", help="Não medir pico de memória (tracemalloc tem overhead)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    sizes = [int(float(s)) for s in args.sizes]
+    results: list[dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(args.workdir) if args.workdir else Path(tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        for rows in sizes:
+            results.extend(bench_size(rows, workdir, args.repeat, not args.no_memory, args.seed))
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "results": results,
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    print(f"OK: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
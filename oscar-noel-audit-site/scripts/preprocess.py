@@ -1,7 +1,10 @@
 """Preprocessador (privado) para gerar agregados públicos.
 
 Uso:
-  python scripts/preprocess.py data/private/respostas.csv
+  python scripts/preprocess.py data/private/respostas.csv [regras.toml]
+
+O arquivo de regras (opcional) segue ``oscar_noel_audit/rules.py``; as regras
+que listam o cenário ``C`` removem votos dele.
 
 Saída:
   data/analysis.json
@@ -9,13 +12,19 @@ Saída:
 Objetivo:
   - Carregar dados brutos (com emails)
   - Aplicar filtros (dias/duplicatas/padrões)
-  - Gerar agregados públicos (sem emails)
+  - Gerar agregados públicos (sem emails), inclusive a evolução hora a hora
 
 Obs.: mantenha o CSV original fora do GitHub (data/private/ no .gitignore).
 """
 import sys, re, json
 import pandas as pd
 from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from oscar_noel_audit.resampling import bootstrap_counts
+from oscar_noel_audit.rules import load_rules
+from oscar_noel_audit.timeline import Timeline
 
 EXCLUDED_DAYS = {20, 21, 22}
 
@@ -37,8 +46,20 @@ def dedupe_keep_first(df: pd.DataFrame) -> pd.DataFrame:
 def rank(df: pd.DataFrame, top_n: int = 12):
     vc = df["choice"].value_counts()
     total = int(vc.sum())
-    top = vc.head(top_n)
-    return {"total": total, "top": [{"name": k, "votes": int(v), "share": float(v/total)} for k, v in top.items()]}
+    stab = bootstrap_counts(vc, n_replicates=2000, seed=0).table.set_index("choice").head(top_n)
+    return {
+        "total": total,
+        "top": [
+            {
+                "name": k,
+                "votes": int(r["votes"]),
+                "share": float(r["share"]),
+                "share_ci95": [float(r["share_lo"]), float(r["share_hi"])],
+                "p_first": float(r["p_first"]),
+            }
+            for k, r in stab.iterrows()
+        ],
+    }
 
 def main():
     if len(sys.argv) < 2:
@@ -47,6 +68,11 @@ def main():
 
     raw_path = sys.argv[1]
     raw = load_csv(raw_path)
+    rules = load_rules(sys.argv[2]) if len(sys.argv) > 2 else None
+    rule_columns = []
+    if rules is not None:
+        rules.apply(raw)
+        rule_columns = [r.column for r in rules.rules if "C" in r.scenarios]
 
     # Cenário A: regras do organizador (exclui dias + dedupe email)
     A = dedupe_keep_first(raw[~raw["exclude_day"]].copy())
@@ -54,8 +80,8 @@ def main():
     # Cenário B: A + remove padrão suspeito
     B = A[~A["pattern_suspeito"]].copy()
 
-    # Cenário C: placeholder conservador (adicione regras extras se quiser)
-    C = B.copy()
+    # Cenário C: B + regras declaradas para C (sem arquivo de regras, igual a B)
+    C = B[~B[rule_columns].any(axis=1)].copy()
 
     daily = raw.assign(date=raw["timestamp"].dt.date).groupby("date").agg(
         submissions=("email", "size"),
@@ -73,14 +99,21 @@ def main():
         "rules": {
             "exclude_days": ["2025-12-20", "2025-12-21", "2025-12-22"],
             "dedupe_email_exact": True,
-            "bot_patterns": [{"id":"regex_nome_sobrenome_3dig_gmail", "pattern": PATTERN_NAME_DOT_NAME_3DIG_GMAIL.pattern}]
+            "bot_patterns": [{"id":"regex_nome_sobrenome_3dig_gmail", "pattern": PATTERN_NAME_DOT_NAME_3DIG_GMAIL.pattern}],
+            "declared": rules.to_dict()["rule"] if rules is not None else [],
         },
         "scenarios": {
             "A_regras_do_usuario": rank(A),
             "B_remove_padrao_nome_sobrenome_3dig_gmail": rank(B),
             "C_conservador": rank(C)
         },
-        "daily": daily.to_dict(orient="records")
+        "daily": daily.to_dict(orient="records"),
+        # Cumulative votes per candidate at the end of each hour, per scenario
+        "evolution": {
+            "A_regras_do_usuario": Timeline.from_votes(A).evolution_dict("1h"),
+            "B_remove_padrao_nome_sobrenome_3dig_gmail": Timeline.from_votes(B).evolution_dict("1h"),
+            "C_conservador": Timeline.from_votes(C).evolution_dict("1h"),
+        },
     }
 
     with open("data/analysis.json", "w", encoding="utf-8") as f:
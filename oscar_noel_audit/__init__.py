@@ -1,8 +1,17 @@
 """Ferramentas de auditoria para a votação do Oscar Noel RJ 2025."""
 
+from __future__ import annotations
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
 from .config import AuditConfig
-from .io import load_votes_csv, load_context_markdown
-from .pipeline import build_audit_artifacts
+
+__version__ = "0.1.0"
+
+if TYPE_CHECKING:
+    from .io import load_context_markdown, load_votes_csv
+    from .pipeline import build_audit_artifacts
 
 __all__ = [
     "AuditConfig",
@@ -11,3 +20,18 @@ __all__ = [
     "load_votes_csv",
 ]
 
+# pandas-backed names are imported on first access so the CLI starts fast
+_LAZY_ATTRS = {
+    "build_audit_artifacts": ".pipeline",
+    "load_context_markdown": ".io",
+    "load_votes_csv": ".io",
+}
+
+
+def __getattr__(name: str) -> Any:
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import asdict, dataclass, field
+import json
+from pathlib import Path
+import time
+import traceback
+from typing import Any, Iterable
+
+from .config import AuditConfig
+
+CONFIG_SUFFIX = ".config.json"
+
+
+@dataclass(frozen=True)
+class ContestJob:
+    name: str
+    csv_path: str
+    overrides: dict[str, Any] = field(default_factory=dict)
+    config_path: str | None = None  # <nome>.config.json, read when the contest runs
+
+    def load_overrides(self) -> dict[str, Any]:
+        """``overrides`` sobre o ``config_path``; um arquivo ilegível falha só este concurso."""
+        if self.config_path is None:
+            return dict(self.overrides)
+        try:
+            from_file = json.loads(Path(self.config_path).read_text(encoding="utf-8"))
+        except (OSError, ValueError) as exc:
+            raise ValueError(f"Configuração ilegível em {self.config_path}: {exc}") from exc
+        if not isinstance(from_file, dict):
+            raise ValueError(f"Configuração em {self.config_path} precisa ser um objeto JSON")
+        return {**from_file, **self.overrides}
+
+
+@dataclass(frozen=True)
+class ContestResult:
+    name: str
+    csv_path: str
+    status: str
+    seconds: float
+    output_dir: str | None = None
+    rows: int | None = None
+    cleaned: int | None = None
+    winner_b: str | None = None
+    winner_b_share: float | None = None
+    error_type: str | None = None
+    error: str | None = None
+
+
+def jobs_from_manifest(path: str | Path) -> list[ContestJob]:
+    """
+    Lê um manifesto JSON ou um diretório de CSVs.
+
+    Manifesto: ``{"defaults": {...}, "contests": [{"name", "csv", "config"}]}``;
+    caminhos relativos partem da pasta do manifesto e ``config`` sobrescreve
+    ``defaults`` (formato de ``AuditConfig.to_dict``). Num diretório, cada
+    ``*.csv`` vira um concurso e ``<nome>.config.json`` ao lado, se existir,
+    traz os parâmetros dele (lido na execução: um arquivo malformado vira
+    erro daquele concurso).
+    """
+    path = Path(path)
+    if path.is_dir():
+        jobs = []
+        for csv_path in sorted(path.glob("*.csv")):
+            cfg_path = csv_path.with_name(csv_path.stem + CONFIG_SUFFIX)
+            jobs.append(
+                ContestJob(
+                    name=csv_path.stem,
+                    csv_path=str(csv_path),
+                    config_path=str(cfg_path) if cfg_path.exists() else None,
+                )
+            )
+        return jobs
+
+    manifest = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(manifest, dict) or not isinstance(manifest.get("contests"), list):
+        raise ValueError(f"O manifesto {path} precisa de uma lista 'contests'")
+    defaults = manifest.get("defaults", {})
+    jobs = []
+    for entry in manifest["contests"]:
+        if not isinstance(entry, dict) or "csv" not in entry:
+            raise ValueError(f"Concurso sem 'csv' no manifesto {path}: {entry!r}")
+        csv_path = Path(entry["csv"])
+        if not csv_path.is_absolute():
+            csv_path = path.parent / csv_path
+        jobs.append(
+            ContestJob(
+                name=entry.get("name", csv_path.stem),
+                csv_path=str(csv_path),
+                overrides={**defaults, **entry.get("config", {})},
+            )
+        )
+    names = [j.name for j in jobs]
+    duplicated = sorted({n for n in names if names.count(n) > 1})
+    if duplicated:
+        raise ValueError(f"Nomes de concurso repetidos no manifesto: {duplicated}")
+    return jobs
+
+
+def _limit_worker_memory(memory_limit_mb: int | None) -> None:
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - not available on Windows
+        return
+    limit = int(memory_limit_mb) * 2**20
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def audit_contest(
+    job: ContestJob,
+    out_dir: str,
+    fmt: str = "json",
+    backend: str = "pandas",
+    include_emails: bool = False,
+) -> ContestResult:
+    from .pipeline import audit_file
+    from .report import write_audit_outputs
+
+    start = time.perf_counter()
+    contest_dir = Path(out_dir) / job.name
+    try:
+        cfg = AuditConfig.from_dict(job.load_overrides())
+        artifacts = audit_file(job.csv_path, cfg, backend=backend)
+        report, _ = write_audit_outputs(
+            artifacts,
+            cfg,
+            contest_dir,
+            fmt=fmt,
+            include_emails=include_emails,
+            extra={"contest": job.name, "input": job.csv_path},
+        )
+    except Exception as exc:  # isolate every failure to its own contest
+        return ContestResult(
+            name=job.name,
+            csv_path=job.csv_path,
+            status="erro",
+            seconds=time.perf_counter() - start,
+            error_type=type(exc).__name__,
+            error=str(exc) or traceback.format_exception_only(type(exc), exc)[-1].strip(),
+        )
+
+    top_b = report["rankings"]["B"]["top"][:1]
+    return ContestResult(
+        name=job.name,
+        csv_path=job.csv_path,
+        status="ok",
+        seconds=time.perf_counter() - start,
+        output_dir=str(contest_dir),
+        rows=report["counts"]["raw"],
+        cleaned=report["counts"]["cleaned"],
+        winner_b=top_b[0]["name"] if top_b else None,
+        winner_b_share=top_b[0]["share"] if top_b else None,
+    )
+
+
+def _crashed(job: ContestJob, exc: BaseException) -> ContestResult:
+    return ContestResult(
+        name=job.name,
+        csv_path=job.csv_path,
+        status="erro",
+        seconds=0.0,
+        error_type="WorkerCrashed",
+        error=f"O processo do concurso terminou de forma anormal (memória?): {exc}",
+    )
+
+
+def run_batch(
+    jobs: Iterable[ContestJob],
+    out_dir: str | Path,
+    workers: int = 2,
+    memory_limit_mb: int | None = None,
+    fmt: str = "json",
+    backend: str = "pandas",
+    include_emails: bool = False,
+) -> list[ContestResult]:
+    """
+    Audita vários concursos em paralelo e grava ``index.json``/``index.csv``.
+
+    Cada processo atende um único concurso (``max_tasks_per_child=1``), com
+    limite de memória opcional. Exceções ficam no resultado do concurso; se um
+    processo morrer, os concursos pendentes daquele pool são refeitos cada um
+    em seu próprio processo, para isolar quem causou a falha.
+    """
+    jobs = list(jobs)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    kwargs = dict(out_dir=str(out_dir), fmt=fmt, backend=backend, include_emails=include_emails)
+
+    results: dict[str, ContestResult] = {}
+    retry: list[ContestJob] = []
+    with ProcessPoolExecutor(
+        max_workers=max(1, workers),
+        max_tasks_per_child=1,
+        initializer=_limit_worker_memory,
+        initargs=(memory_limit_mb,),
+    ) as pool:
+        futures = {pool.submit(audit_contest, job, **kwargs): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                results[job.name] = future.result()
+            except BrokenProcessPool:
+                retry.append(job)
+
+    for job in retry:
+        with ProcessPoolExecutor(
+            max_workers=1, initializer=_limit_worker_memory, initargs=(memory_limit_mb,)
+        ) as pool:
+            try:
+                results[job.name] = pool.submit(audit_contest, job, **kwargs).result()
+            except BrokenProcessPool as exc:
+                results[job.name] = _crashed(job, exc)
+
+    ordered = [results[job.name] for job in jobs]
+    write_batch_index(ordered, out_dir)
+    return ordered
+
+
+def write_batch_index(results: list[ContestResult], out_dir: Path) -> None:
+    import pandas as pd
+
+    rows = [asdict(r) for r in results]
+    index = {
+        "contests": len(rows),
+        "ok": sum(r.status == "ok" for r in results),
+        "failed": sum(r.status != "ok" for r in results),
+        "results": rows,
+    }
+    (out_dir / "index.json").write_text(json.dumps(index, ensure_ascii=False, indent=2), encoding="utf-8")
+    pd.DataFrame(rows, columns=list(ContestResult.__dataclass_fields__)).to_csv(out_dir / "index.csv", index=False)
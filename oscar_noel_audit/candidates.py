@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+from difflib import SequenceMatcher
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Mapping
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+_SEPARATOR_RE = re.compile(r"(\s*-\s*|\s+)")
+_SEPARATOR_ONLY_RE = re.compile(r"^\s*-\s*$|^\s+$")
+
+MAPPING_COLUMNS = ["choice", "canonical", "votes", "score", "method", "suggestion"]
+
+
+@lru_cache(maxsize=4096)
+def censor_name(name: str) -> str:
+    """
+    Censura nomes de candidatos para anonimização.
+    Mantém primeira letra de cada palavra e substitui demais por asteriscos.
+    """
+    censored_parts = []
+    for part in _SEPARATOR_RE.split(name):
+        # Keep separators as-is
+        if _SEPARATOR_ONLY_RE.match(part):
+            censored_parts.append(part)
+            continue
+
+        censored_words = []
+        for word in part.split():
+            if len(word) <= 2:
+                censored_words.append(word)
+            else:
+                censored_words.append(word[0] + "*" * (len(word) - 1))
+        censored_parts.append(" ".join(censored_words))
+
+    return "".join(censored_parts)
+
+
+def normalize_candidate_name(name: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", name)
+    ascii_only = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    collapsed = " ".join(ascii_only.upper().split())
+    return re.sub(r"\s*-\s*", " - ", collapsed)
+
+
+def _split_person_venue(normalized: str) -> tuple[frozenset[str], str]:
+    person, _, venue = normalized.partition(" - ")
+    return frozenset(person.split()), venue
+
+
+def relabel_choices(
+    choices: pd.Series, mapping: Mapping[str, str] | Callable[[str], str]
+) -> pd.Series:
+    """Renomeia cada candidato distinto uma vez e propaga via códigos categóricos."""
+    if isinstance(choices.dtype, pd.CategoricalDtype):
+        codes = choices.cat.codes.to_numpy()
+        uniques = list(choices.cat.categories)
+    else:
+        codes, uniques_index = pd.factorize(choices, sort=False)
+        uniques = list(uniques_index)
+
+    lookup = mapping if callable(mapping) else (lambda u: mapping.get(u, u))
+    new_labels = [lookup(u) for u in uniques]
+    label_codes, categories = pd.factorize(pd.Index(new_labels, dtype=object), sort=False)
+
+    if len(label_codes):
+        new_codes = np.where(codes >= 0, label_codes[np.maximum(codes, 0)], -1)
+    else:
+        new_codes = np.full(len(codes), -1, dtype=np.int64)
+    return pd.Series(
+        pd.Categorical.from_codes(new_codes, categories=categories),
+        index=choices.index,
+        name=choices.name,
+    )
+
+
+def censor_choices(choices: pd.Series) -> pd.Series:
+    return relabel_choices(choices, censor_name)
+
+
+def build_candidate_mapping(choices: pd.Series, similarity: float = 0.9) -> pd.DataFrame:
+    """
+    Agrupa grafias diferentes do mesmo candidato, olhando só valores distintos.
+
+    Cada grafia é associada à variante mais votada do grupo quando o nome
+    normalizado (sem acento/caixa/espaços) é igual ou quando os nomes da pessoa
+    são subconjunto um do outro com o mesmo local ("SAYMON CLAUS - X" e
+    "SAYMON - X"). Similaridade textual acima de ``similarity`` só vira
+    sugestão (coluna ``suggestion``, método ``sugestao``): nomes parecidos podem
+    ser pessoas diferentes. O resultado é uma tabela revisável; para confirmar
+    uma sugestão, copie-a para ``canonical`` e carregue com ``load_candidate_mapping``.
+    """
+    votes = choices.value_counts(sort=True)
+    votes = votes[votes > 0]
+
+    canon_rows: list[tuple[str, str, frozenset[str], str]] = []
+    records = []
+    for choice, n in votes.items():
+        norm = normalize_candidate_name(str(choice))
+        tokens, venue = _split_person_venue(norm)
+
+        match: str | None = None
+        suggestion: str | None = None
+        score = 1.0
+        method = "canonico"
+        best_ratio = 0.0
+        for canonical, c_norm, c_tokens, c_venue in canon_rows:
+            if norm == c_norm:
+                match, method = canonical, "normalizado"
+                break
+            same_venue = bool(venue) and venue == c_venue
+            if same_venue and tokens and c_tokens and (tokens <= c_tokens or c_tokens <= tokens):
+                match, method = canonical, "subconjunto"
+                score = len(tokens & c_tokens) / len(tokens | c_tokens)
+                break
+            ratio = SequenceMatcher(None, norm, c_norm).ratio()
+            if ratio >= similarity and ratio > best_ratio:
+                suggestion, best_ratio = canonical, ratio
+
+        if match is None:
+            canon_rows.append((str(choice), norm, tokens, venue))
+            match = str(choice)
+            if suggestion is not None:
+                method, score = "sugestao", best_ratio
+        else:
+            suggestion = None
+        records.append((str(choice), match, int(n), float(score), method, suggestion))
+
+    return pd.DataFrame.from_records(records, columns=MAPPING_COLUMNS)
+
+
+def mapping_from_frame(mapping: pd.DataFrame) -> dict[str, str]:
+    return {
+        str(c): str(k)
+        for c, k in zip(mapping["choice"], mapping["canonical"])
+        if str(c) != str(k)
+    }
+
+
+def load_candidate_mapping(path: str | Path) -> dict[str, str]:
+    return mapping_from_frame(pd.read_csv(path, dtype=str))
+
+
+def canonicalize_choices(
+    choices: pd.Series, mapping: Mapping[str, str] | pd.DataFrame | None = None
+) -> pd.Series:
+    if mapping is None:
+        mapping = build_candidate_mapping(choices)
+    if isinstance(mapping, pd.DataFrame):
+        mapping = mapping_from_frame(mapping)
+    return relabel_choices(choices, mapping)
@@ -0,0 +1,78 @@
+"""Tabelas prontas para os gráficos do painel (o plotly fica no ``app.py``)."""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from .downsampling import downsample
+from .suspicion import detect_hourly_outliers
+
+
+def daily_volume(flagged: pd.DataFrame, email_codes: np.ndarray | None = None) -> pd.DataFrame:
+    # Group on datetime64 days and integer email codes; python date objects only at the end
+    day = flagged["timestamp"].dt.normalize()
+    if email_codes is None:
+        email_codes, _ = pd.factorize(flagged["email"])
+    email_codes = pd.Series(email_codes, index=flagged.index)
+    by_day = flagged.groupby(day)
+    daily = pd.DataFrame(
+        {
+            "submissions": by_day.size(),
+            "unique_emails": pd.DataFrame({"day": day, "email": email_codes})
+            .drop_duplicates()
+            .groupby("day")
+            .size(),
+            "night_votes": by_day["flag_night_vote"].sum(),
+            "synthetic_suffix3": by_day["flag_synthetic_email_suffix3"].sum(),
+        }
+    )
+    daily["duplicates"] = daily["submissions"] - daily["unique_emails"]
+    daily.index = daily.index.date
+    daily = daily.rename_axis("date").reset_index()
+    return daily[["date", "submissions", "unique_emails", "duplicates", "night_votes", "synthetic_suffix3"]]
+
+
+def hour_day_matrix(flagged: pd.DataFrame) -> pd.DataFrame:
+    ts = flagged["timestamp"]
+    counts = flagged.groupby([ts.dt.hour.rename("hour"), ts.dt.normalize().rename("date")]).size()
+    matrix = counts.unstack("date", fill_value=0)
+    matrix.columns = matrix.columns.date
+    return matrix.rename_axis(columns="date")
+
+
+def domain_counts(flagged: pd.DataFrame, top: int = 15) -> pd.DataFrame:
+    dom = flagged["email_domain"].value_counts().head(top).reset_index()
+    dom.columns = ["domain", "votes"]
+    return dom
+
+
+def vote_series(
+    flagged: pd.DataFrame,
+    freq: str = "min",
+    max_points: int | None = 2000,
+    z_thresh: float = 3.5,
+) -> pd.DataFrame:
+    """
+    Votos por intervalo ``freq`` (ex.: ``"min"``), com outliers por MAD-zscore.
+
+    Os intervalos sem voto entram com zero para o gráfico, mas não na
+    estatística. Com ``max_points``, a série é reduzida por LTTB e os outliers
+    continuam todos presentes.
+    """
+    counts = flagged["timestamp"].dt.floor(freq).value_counts().sort_index()
+    series = detect_hourly_outliers(counts.rename_axis("bucket").rename("votes").reset_index(), z_thresh=z_thresh)
+    if series.empty:
+        return series
+
+    full_range = pd.date_range(series["bucket"].iloc[0], series["bucket"].iloc[-1], freq=freq)
+    series = (
+        series.set_index("bucket")
+        .reindex(full_range)
+        .rename_axis("bucket")
+        .reset_index()
+        .fillna({"votes": 0, "z": 0.0, "is_outlier": False})
+        .astype({"votes": "int64", "is_outlier": bool})
+    )
+    if max_points is not None:
+        series = downsample(series, "bucket", "votes", max_points=max_points, keep="is_outlier")
+    return series.reset_index(drop=True)
@@ -1,32 +1,71 @@
 from __future__ import annotations
 
+import numpy as np
 import pandas as pd
 
 from .config import AuditConfig
+from .domains import email_domains
+from .profiling import StageProfiler, profile_stage
+from .scenarios import _first_per_code
+
+FEATURE_COLUMNS = ["date", "day", "hour", "email_domain"]
+RULE_COLUMNS = ["exclude_day", "suspicious_email_plus_3dig_gmail"]
 
 
 def add_basic_features(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
+    # Shallow copy: new columns land on ``out`` without touching the caller's data
+    out = df.copy(deep=False)
     out["date"] = out["timestamp"].dt.date
     out["day"] = out["timestamp"].dt.day
     out["hour"] = out["timestamp"].dt.hour
-    out["email_domain"] = out["email"].str.split("@").str[-1]
+    out["email_domain"] = email_domains(out["email"])
     return out
 
 
-def apply_user_rules(df: pd.DataFrame, cfg: AuditConfig) -> tuple[pd.DataFrame, pd.DataFrame]:
-    enriched = add_basic_features(df)
-
+def add_rule_flags(enriched: pd.DataFrame, cfg: AuditConfig) -> pd.DataFrame:
+    """Acrescenta ``RULE_COLUMNS`` em ``enriched`` (no lugar)."""
     enriched["exclude_day"] = enriched["day"].isin(cfg.excluded_days)
     enriched["suspicious_email_plus_3dig_gmail"] = enriched["email"].apply(
         lambda e: bool(cfg.suspicious_email_plus_regex.match(e))
     )
+    return enriched
 
-    pre_filtered = enriched[~enriched["exclude_day"]].copy()
-    pre_filtered = pre_filtered.sort_values("timestamp", kind="mergesort")
-    cleaned = pre_filtered.drop_duplicates(subset=["email"], keep="first").copy()
-    cleaned = cleaned[~cleaned["suspicious_email_plus_3dig_gmail"]].copy()
-    cleaned = cleaned.reset_index(drop=True)
 
-    return cleaned, enriched
+def cleaned_mask(enriched: pd.DataFrame, email_codes: np.ndarray | None = None) -> np.ndarray:
+    """
+    Máscara da base limpa: primeiro voto (no tempo) de cada e-mail fora dos
+    dias excluídos, sem o padrão ``+###``.
+    """
+    if email_codes is None:
+        email_codes, _ = pd.factorize(enriched["email"])
+    eligible = ~enriched["exclude_day"].to_numpy(dtype=bool)
+    plus = enriched["suspicious_email_plus_3dig_gmail"].to_numpy(dtype=bool)
+    if enriched["timestamp"].is_monotonic_increasing:
+        return _first_per_code(email_codes, eligible) & ~plus
+
+    order = np.argsort(enriched["timestamp"].to_numpy(), kind="stable")
+    mask = np.empty(len(order), dtype=bool)
+    mask[order] = _first_per_code(email_codes[order], eligible[order])
+    return mask & ~plus
+
 
+def apply_user_rules(
+    df: pd.DataFrame, cfg: AuditConfig, profiler: StageProfiler | None = None
+) -> tuple[pd.DataFrame, pd.DataFrame]:
+    with profile_stage(profiler, "rules.features", rows_in=len(df)) as stage:
+        enriched = add_basic_features(df)
+        stage.rows_out = len(enriched)
+
+    with profile_stage(profiler, "rules.patterns", rows_in=len(enriched)) as stage:
+        add_rule_flags(enriched, cfg)
+        stage.rows_out = len(enriched)
+
+    with profile_stage(profiler, "rules.dedupe", rows_in=len(enriched)) as stage:
+        # Only the kept rows are copied, in time order
+        positions = np.flatnonzero(cleaned_mask(enriched))
+        ts = enriched["timestamp"].to_numpy()[positions]
+        positions = positions[np.argsort(ts, kind="stable")]
+        cleaned = enriched.take(positions).reset_index(drop=True)
+        stage.rows_out = len(cleaned)
+
+    return cleaned, enriched
@@ -0,0 +1,359 @@
+"""Auditoria em lote, sem interface: ``python -m oscar_noel_audit``.
+
+Só ``argparse``/``json`` são importados na partida; pandas e o pipeline são
+carregados dentro de cada subcomando, para manter o cold start baixo em jobs
+agendados.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+import sys
+from typing import Any, Sequence
+
+from .config import AuditConfig, parse_days, parse_hours
+
+
+def config_from_args(args: argparse.Namespace) -> AuditConfig:
+    overrides: dict[str, Any] = {}
+    if args.config:
+        overrides.update(json.loads(Path(args.config).read_text(encoding="utf-8")))
+    if args.excluded_days is not None:
+        overrides["excluded_days"] = parse_days(args.excluded_days)
+    if args.min_global is not None:
+        overrides["min_global_delta_seconds"] = args.min_global
+    if args.min_choice is not None:
+        overrides["min_per_choice_delta_seconds"] = args.min_choice
+    if args.night is not None:
+        overrides["night_hours"] = parse_hours(args.night)
+    if args.typo_domains:
+        overrides["typo_domain_files"] = args.typo_domains
+    if args.disposable_domains:
+        overrides["disposable_domain_files"] = args.disposable_domains
+    if args.rules:
+        overrides["rule_files"] = args.rules
+    return AuditConfig.from_dict(overrides)
+
+
+def _add_config_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--config", help="JSON com parâmetros de AuditConfig (formato de to_dict)")
+    parser.add_argument("--excluded-days", help="Dias excluídos, ex.: 20,21,22")
+    parser.add_argument("--min-global", type=float, help="Delta mínimo global (s)")
+    parser.add_argument("--min-choice", type=float, help="Delta mínimo por candidato (s)")
+    parser.add_argument("--night", help="Faixa da madrugada, ex.: 0-5")
+    parser.add_argument(
+        "--typo-domains", action="append", help="Lista extra de domínios typo (um por linha; repetível)"
+    )
+    parser.add_argument(
+        "--disposable-domains", action="append", help="Lista extra de domínios descartáveis (um por linha; repetível)"
+    )
+    parser.add_argument("--rules", action="append", help="Regras declaradas em TOML/JSON (ver rules.py; repetível)")
+
+
+def cmd_audit(args: argparse.Namespace) -> int:
+    from .io import SchemaError
+    from .pipeline import audit_file
+    from .profiling import StageProfiler
+    from .report import write_audit_outputs, write_sql_audit_outputs
+
+    cfg = config_from_args(args)
+    out_dir = Path(args.out)
+    profiler = StageProfiler(track_memory=args.profile_memory)
+    sql_errors: tuple[type[Exception], ...] = ()
+    if args.backend == "duckdb":
+        try:
+            import duckdb
+
+            # Unreadable files, bad casts (IOException, ConversionException, ...)
+            sql_errors = (duckdb.Error,)
+        except ImportError:
+            pass
+
+    try:
+        store = stored = input_fingerprint = sql_audit = None
+        if args.store:
+            from .io import file_fingerprint
+            from .store import ArtifactStore
+
+            store = ArtifactStore(args.store)
+            input_fingerprint = file_fingerprint(args.csv)
+            stored = store.find(input_fingerprint, cfg)
+        if stored is not None:
+            artifacts = stored.artifacts
+        elif args.backend == "duckdb" and store is None:
+            # Rows stay on disk: the report comes from SQL aggregates and flags are written page by page
+            from .sql_backend import DuckDBBackend
+
+            sql = DuckDBBackend(temp_directory=args.temp_dir, memory_limit=args.memory_limit)
+            sql_audit = sql.audit(args.csv, cfg, profiler=profiler)
+        else:
+            artifacts = audit_file(
+                args.csv,
+                cfg,
+                backend=args.backend,
+                profiler=profiler,
+                temp_dir=args.temp_dir,
+                memory_limit=args.memory_limit,
+                workers=args.workers,
+            )
+            if store is not None:
+                stored = store.save(artifacts, cfg, input_fingerprint=input_fingerprint, name=Path(args.csv).name)
+    except (SchemaError, FileNotFoundError, *sql_errors) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 2
+
+    outputs = dict(
+        fmt=args.format,
+        include_emails=args.include_emails,
+        top_n=args.top,
+        extra={"input": str(args.csv)},
+        sketches=args.sketches,
+    )
+    if sql_audit is not None:
+        try:
+            report, flags_path = write_sql_audit_outputs(sql_audit, cfg, out_dir, **outputs)
+        finally:
+            sql_audit.remove()
+    else:
+        report, flags_path = write_audit_outputs(artifacts, cfg, out_dir, **outputs)
+
+    if not args.quiet:
+        winner = report["rankings"]["B"]["top"][:1]
+        print(f"OK: {out_dir / 'summary.json'}, {out_dir / 'rankings.json'}, {flags_path}")
+        if stored is not None:
+            print(f"Auditoria gravada: {stored.path} (criada em {stored.created_at})")
+        if winner:
+            print(f"Cenário B — 1º lugar: {winner[0]['name']} ({winner[0]['share']:.1%})")
+    return 0
+
+
+def cmd_history(args: argparse.Namespace) -> int:
+    from .store import ArtifactStore, StoreError
+
+    store = ArtifactStore(args.store)
+    if args.show:
+        try:
+            report = store.open(args.show).report
+        except StoreError as exc:
+            print(f"Erro: {exc}", file=sys.stderr)
+            return 2
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+        return 0
+
+    audits = store.audits()
+    if not audits:
+        print(f"Nenhuma auditoria gravada em {store.root}")
+    for audit in audits:
+        report = audit.report
+        winner = report["rankings"]["B"]["top"][:1]
+        leader = f"{winner[0]['name']} ({winner[0]['share']:.1%})" if winner else "-"
+        print(f"{audit.key}  {audit.created_at}  {audit.name}  {report['counts']['raw']:,} votos  B: {leader}")
+    return 0
+
+
+def cmd_batch(args: argparse.Namespace) -> int:
+    from .batch import jobs_from_manifest, run_batch
+
+    try:
+        jobs = jobs_from_manifest(args.manifest)
+    except (OSError, ValueError, KeyError) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 2
+    if not jobs:
+        print(f"Erro: nenhum concurso encontrado em {args.manifest}", file=sys.stderr)
+        return 2
+
+    results = run_batch(
+        jobs,
+        args.out,
+        workers=args.workers,
+        memory_limit_mb=args.memory_limit_mb,
+        fmt=args.format,
+        backend=args.backend,
+        include_emails=args.include_emails,
+    )
+    failed = [r for r in results if r.status != "ok"]
+    if not args.quiet:
+        for r in results:
+            detail = (r.winner_b or "") if r.status == "ok" else f"{r.error_type}: {r.error}"
+            print(f"[{r.status}] {r.name} ({r.seconds:.1f}s) {detail}")
+        print(f"OK: {Path(args.out) / 'index.json'} — {len(results) - len(failed)} ok, {len(failed)} com erro")
+    return 1 if failed else 0
+
+
+def cmd_sketch(args: argparse.Namespace) -> int:
+    from .io import SchemaError
+    from .sketches import sketch_csv
+
+    try:
+        sketches = sketch_csv(args.csv, chunksize=args.chunksize, p=args.precision, k=args.top_k)
+    except (SchemaError, FileNotFoundError) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 2
+
+    report = {"input": str(args.csv), **sketches.to_dict(top=args.top)}
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    if not args.quiet:
+        print(f"OK: {out} — ~{report['unique_emails']:,} e-mails distintos (±{report['relative_error']:.1%})")
+    return 0
+
+
+def cmd_diff(args: argparse.Namespace) -> int:
+    from .io import SchemaError, compare_snapshots, hash_emails
+    from .report import write_table
+
+    try:
+        diff = compare_snapshots(args.old, args.new, freq=args.freq, chunksize=args.chunksize)
+    except (SchemaError, FileNotFoundError, ValueError) as exc:
+        print(f"Erro: {exc}", file=sys.stderr)
+        return 2
+
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report = {
+        "old": str(args.old),
+        "new": str(args.new),
+        "freq": diff.freq,
+        "rows": {"old": diff.rows_old, "new": diff.rows_new},
+        "identical": diff.identical,
+        "changes": {"added": len(diff.added), "removed": len(diff.removed), "modified": len(diff.modified)},
+        "changed_ranges": [ts.isoformat() for ts in diff.ranges],
+    }
+    (out_dir / "diff.json").write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+    table = diff.table()
+    if not args.include_emails:
+        table.insert(2, "email_hash", hash_emails(table.pop("email")))
+    rows_path = write_table(table, out_dir / "changes", args.format)
+    if not args.quiet:
+        changes = report["changes"]
+        print(
+            f"OK: {out_dir / 'diff.json'}, {rows_path} — {changes['added']} adicionados, "
+            f"{changes['removed']} removidos, {changes['modified']} alterados "
+            f"em {len(diff.ranges)} faixas de {diff.freq}"
+        )
+    return 0
+
+
+def cmd_serve(args: argparse.Namespace) -> int:
+    from .server import ArtifactRegistry, datasets_from_paths, make_server
+
+    missing = [p for p in args.csv if not Path(p).is_file()]
+    if missing:
+        print(f"Erro: arquivo não encontrado: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    registry = ArtifactRegistry(
+        datasets_from_paths(args.csv),
+        backend=args.backend,
+        max_artifacts=args.max_artifacts,
+        max_results=args.max_results,
+    )
+    server = make_server(
+        registry, host=args.host, port=args.port, quiet=args.quiet, allow_origins=args.allow_origin or ()
+    )
+    host, port = server.server_address[:2]
+    print(f"Servindo {sorted(registry.datasets)} em http://{host}:{port}/ (Ctrl+C para parar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m oscar_noel_audit",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    audit = sub.add_parser("audit", help="Audita um CSV e grava resumo, rankings e sinalizações")
+    audit.add_argument("csv", help="CSV exportado do formulário")
+    audit.add_argument("--out", default="audit_output", help="Diretório de saída")
+    audit.add_argument("--format", choices=["json", "csv", "parquet"], default="json", help="Formato da tabela de flags")
+    audit.add_argument("--top", type=int, default=12, help="Tamanho do ranking por cenário")
+    audit.add_argument("--include-emails", action="store_true", help="Grava e-mails em claro (padrão: hash)")
+    audit.add_argument("--backend", choices=["pandas", "duckdb"], default="pandas")
+    audit.add_argument("--temp-dir", help="Diretório de spill do DuckDB")
+    audit.add_argument("--memory-limit", help="Limite de memória do DuckDB, ex.: 4GB")
+    audit.add_argument(
+        "--workers", type=int, default=1, help="Processos para a sinalização por fatias de tempo (backend pandas)"
+    )
+    audit.add_argument(
+        "--sketches", action="store_true", help="Acrescenta ao resumo as contagens aproximadas do comando sketch"
+    )
+    audit.add_argument("--profile-memory", action="store_true", help="Mede pico de memória por etapa (mais lento)")
+    audit.add_argument(
+        "--store", help="Diretório de auditorias gravadas: reabre a mesma entrada e configuração sem recalcular"
+    )
+    audit.add_argument("--quiet", action="store_true")
+    _add_config_arguments(audit)
+    audit.set_defaults(func=cmd_audit)
+
+    history = sub.add_parser("history", help="Lista (ou mostra, com --show) as auditorias gravadas com --store")
+    history.add_argument(
+        "store", nargs="?", help="Diretório de auditorias gravadas (padrão: $OSCAR_NOEL_AUDIT_STORE ou dados do usuário)"
+    )
+    history.add_argument("--show", metavar="CHAVE", help="Imprime o relatório gravado dessa auditoria")
+    history.set_defaults(func=cmd_history)
+
+    batch = sub.add_parser("batch", help="Audita vários concursos em paralelo (manifesto JSON ou diretório)")
+    batch.add_argument("manifest", help="Manifesto JSON ou diretório com CSVs (+ <nome>.config.json)")
+    batch.add_argument("--out", default="audit_batch", help="Diretório de saída (um subdiretório por concurso)")
+    batch.add_argument("--workers", type=int, default=2)
+    batch.add_argument("--memory-limit-mb", type=int, help="Limite de memória por processo (Unix)")
+    batch.add_argument("--format", choices=["json", "csv", "parquet"], default="json")
+    batch.add_argument("--backend", choices=["pandas", "duckdb"], default="pandas")
+    batch.add_argument("--include-emails", action="store_true")
+    batch.add_argument("--quiet", action="store_true")
+    batch.set_defaults(func=cmd_batch)
+
+    sketch = sub.add_parser("sketch", help="Contagens aproximadas em streaming (memória limitada)")
+    sketch.add_argument("csv", help="CSV exportado do formulário")
+    sketch.add_argument("--out", default="sketch.json", help="Arquivo JSON de saída")
+    sketch.add_argument("--chunksize", type=int, default=200_000, help="Linhas lidas por bloco")
+    sketch.add_argument("--precision", type=int, default=14, help="p do HyperLogLog (erro ~1.04/sqrt(2^p))")
+    sketch.add_argument("--top-k", type=int, default=100, help="Itens mantidos no Space-Saving")
+    sketch.add_argument("--top", type=int, default=20, help="Itens gravados no relatório")
+    sketch.add_argument("--quiet", action="store_true")
+    sketch.set_defaults(func=cmd_sketch)
+
+    diff = sub.add_parser("diff", help="Compara duas exportações e lista votos adicionados, removidos e alterados")
+    diff.add_argument("old", help="Exportação anterior (CSV)")
+    diff.add_argument("new", help="Exportação nova (CSV)")
+    diff.add_argument("--out", default="diff_output", help="Diretório de saída")
+    diff.add_argument("--freq", default="1h", help="Largura das faixas de tempo do digest, ex.: 1h, 15min")
+    diff.add_argument("--chunksize", type=int, default=200_000, help="Linhas lidas por bloco")
+    diff.add_argument("--format", choices=["json", "csv", "parquet"], default="json", help="Formato da tabela de mudanças")
+    diff.add_argument("--include-emails", action="store_true", help="Grava e-mails em claro (padrão: hash)")
+    diff.add_argument("--quiet", action="store_true")
+    diff.set_defaults(func=cmd_diff)
+
+    serve = sub.add_parser("serve", help="Servidor HTTP local de consultas (artefatos em cache)")
+    serve.add_argument("csv", nargs="+", help="CSVs servidos; o nome do conjunto é o nome do arquivo")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--backend", choices=["pandas", "duckdb"], default="pandas")
+    serve.add_argument("--max-artifacts", type=int, default=4, help="Auditorias mantidas em memória (LRU)")
+    serve.add_argument("--max-results", type=int, default=256, help="Respostas mantidas em cache (LRU)")
+    serve.add_argument(
+        "--allow-origin",
+        action="append",
+        metavar="ORIGEM",
+        help="Origem de navegador autorizada a ler as respostas, ex.: http://localhost:3000 (repetível)",
+    )
+    serve.add_argument("--quiet", action="store_true", help="Não registra cada requisição")
+    serve.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv: Sequence[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return int(args.func(args))
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .config import AuditConfig
+from .email_index import key_statistics
+
+COMPONENT_COLUMNS = [
+    "component",
+    "bursts",
+    "votes",
+    "emails",
+    "repeat_emails",
+    "distinct_choices",
+    "dominant_choice",
+    "dominant_share",
+    "first_seen",
+    "last_seen",
+    "span_seconds",
+    "max_burst_emails",
+    "suffix3_share",
+    "plus_share",
+    "typo_domain_share",
+    "top_domain",
+    "top_domain_share",
+]
+
+# Row flags summarised per component as the share of its votes
+_PATTERN_SHARES = {
+    "suffix3_share": "flag_synthetic_email_suffix3",
+    "plus_share": "suspicious_email_plus_3dig_gmail",
+    "typo_domain_share": "flag_suspicious_domain_typo",
+}
+
+
+@dataclass(frozen=True)
+class CoBurstGraph:
+    """
+    Lotes de votos simultâneos e os componentes que os ligam.
+
+    ``burst`` e ``component`` acompanham as linhas de ``flagged_raw`` (-1 fora
+    de um lote); ``components`` tem uma linha por componente.
+    """
+
+    burst: np.ndarray
+    component: np.ndarray
+    components: pd.DataFrame
+
+    @property
+    def n_components(self) -> int:
+        return len(self.components)
+
+    @property
+    def votes(self) -> int:
+        return int(np.count_nonzero(self.component >= 0))
+
+
+def connected_components(n_nodes: int, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+    """
+    Union-find vetorizado: rótulo (menor nó) do componente de cada nó.
+
+    A cada rodada cada aresta pendura a raiz maior na menor e os ponteiros são
+    comprimidos por saltos (``label[label]``); o número de rodadas cresce com
+    o log do diâmetro, não com o número de arestas.
+    """
+    labels = np.arange(n_nodes)
+    u = np.asarray(u, dtype=np.intp)
+    v = np.asarray(v, dtype=np.intp)
+    while True:
+        lu, lv = labels[u], labels[v]
+        pending = lu != lv
+        if not pending.any():
+            return labels
+        lu, lv = lu[pending], lv[pending]
+        low = np.minimum(lu, lv)
+        np.minimum.at(labels, np.maximum(lu, lv), low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+
+def burst_ids(flagged: pd.DataFrame, window_seconds: float) -> np.ndarray:
+    """
+    Lote de cada voto: votos seguidos no mesmo candidato a até ``window_seconds``.
+
+    Usa ``choice_delta_prev_seconds`` de ``flag_suspicious_votes``; uma
+    ordenação estável pelo candidato mantém a ordem cronológica de cada um.
+    """
+    codes, _ = pd.factorize(flagged["choice"])
+    gaps = flagged["choice_delta_prev_seconds"].to_numpy(dtype=float)
+    order = np.argsort(codes, kind="stable")
+    starts = ~(np.nan_to_num(gaps[order], nan=np.inf) <= window_seconds)
+    ids = np.empty(len(codes), dtype=np.int64)
+    ids[order] = np.cumsum(starts) - 1
+    return ids
+
+
+def _pair_counts(a: np.ndarray, b: np.ndarray, width: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pares (a, b) distintos e quantas vezes cada um aparece."""
+    pairs, counts = np.unique(a.astype(np.int64) * width + b, return_counts=True)
+    return pairs // width, pairs % width, counts
+
+
+def build_coburst_graph(flagged: pd.DataFrame, cfg: AuditConfig) -> CoBurstGraph:
+    """
+    Grafo de co-ocorrência: lotes com pelo menos ``coburst_min_emails``
+    e-mails distintos viram nós, ligados aos seus e-mails; lotes que
+    compartilham e-mails caem no mesmo componente.
+    """
+    n = len(flagged)
+    burst = burst_ids(flagged, cfg.coburst_window_seconds) if n else np.zeros(0, dtype=np.int64)
+    email_codes, emails = pd.factorize(flagged["email"])
+    n_bursts = int(burst.max()) + 1 if n else 0
+
+    # Distinct emails per burst
+    pair_burst, pair_email, _ = _pair_counts(burst, email_codes, max(len(emails), 1))
+    burst_emails = np.bincount(pair_burst, minlength=n_bursts)
+    kept = burst_emails >= cfg.coburst_min_emails
+    node = np.full(n_bursts, -1, dtype=np.int64)
+    node[kept] = np.arange(np.count_nonzero(kept))
+
+    edges = kept[pair_burst]
+    n_kept = int(np.count_nonzero(kept))
+    labels = connected_components(
+        n_kept + len(emails), node[pair_burst[edges]], n_kept + pair_email[edges]
+    )
+    component_of_node, _ = pd.factorize(labels[:n_kept])
+
+    row_node = node[burst] if n else np.zeros(0, dtype=np.int64)
+    in_burst = row_node >= 0
+    component = np.full(n, -1, dtype=np.int64)
+    component[in_burst] = component_of_node[row_node[in_burst]]
+    burst = np.where(in_burst, burst, -1)
+
+    n_components = int(component.max()) + 1 if in_burst.any() else 0
+    return CoBurstGraph(
+        burst=burst,
+        component=component,
+        components=_component_table(flagged, component, burst, email_codes, burst_emails, n_components),
+    )
+
+
+def _component_table(
+    flagged: pd.DataFrame,
+    component: np.ndarray,
+    burst: np.ndarray,
+    email_codes: np.ndarray,
+    burst_emails: np.ndarray,
+    n_components: int,
+) -> pd.DataFrame:
+    if n_components == 0:
+        return pd.DataFrame(columns=COMPONENT_COLUMNS)
+    rows = np.flatnonzero(component >= 0)
+    comp = component[rows]
+    ts = flagged["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")[rows]
+    table = key_statistics(comp, n_components, ts, flagged["choice"].iloc[rows])
+
+    comp_bursts, bursts, _ = _pair_counts(comp, burst[rows], int(burst.max()) + 1)
+    comp_emails, _, times_seen = _pair_counts(comp, email_codes[rows], int(email_codes.max()) + 1)
+    max_burst = np.zeros(n_components, dtype=np.int64)
+    np.maximum.at(max_burst, comp_bursts, burst_emails[bursts])
+
+    table.insert(0, "component", np.arange(n_components))
+    table["bursts"] = np.bincount(comp_bursts, minlength=n_components)
+    table["emails"] = np.bincount(comp_emails, minlength=n_components)
+    table["repeat_emails"] = np.bincount(comp_emails[times_seen > 1], minlength=n_components)
+    table["span_seconds"] = (table["last_seen"] - table["first_seen"]).dt.total_seconds()
+    table["max_burst_emails"] = max_burst
+
+    votes = table["votes"].to_numpy(dtype=float)
+    for column, flag in _PATTERN_SHARES.items():
+        if flag in flagged.columns:
+            hits = flagged[flag].to_numpy(dtype=bool)[rows]
+            table[column] = np.bincount(comp, weights=hits, minlength=n_components) / votes
+        else:
+            table[column] = np.nan
+
+    domain_codes, domains = pd.factorize(flagged["email"].iloc[rows].str.rsplit("@", n=1).str[-1])
+    comp_domain, domain, counts = _pair_counts(comp, domain_codes, max(len(domains), 1))
+    # Highest count per component: sort by (component, count) and take the last of each
+    order = np.lexsort((counts, comp_domain))
+    last = np.r_[comp_domain[order][1:] != comp_domain[order][:-1], True]
+    best = order[last]
+    table["top_domain"] = np.asarray(domains, dtype=object)[domain[best]]
+    table["top_domain_share"] = counts[best] / votes
+
+    table = table.sort_values(["bursts", "emails"], ascending=False, kind="mergesort")
+    return table[COMPONENT_COLUMNS].reset_index(drop=True)
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, fields
 import re
+from typing import Any, Mapping
 
 
 @dataclass(frozen=True)
@@ -13,6 +14,15 @@ class AuditConfig:
     night_hours: tuple[int, int]
     min_global_delta_seconds: float
     min_per_choice_delta_seconds: float
+    min_email_gap_seconds: float
+    cadence_min_votes: int
+    cadence_max_cv: float
+    coburst_window_seconds: float
+    coburst_min_emails: int
+    cohort_min_emails: int
+    typo_domain_files: tuple[str, ...]
+    disposable_domain_files: tuple[str, ...]
+    rule_files: tuple[str, ...] = ()
 
     @staticmethod
     def default() -> "AuditConfig":
@@ -30,5 +40,68 @@ class AuditConfig:
             night_hours=(0, 5),
             min_global_delta_seconds=2.0,
             min_per_choice_delta_seconds=2.0,
+            min_email_gap_seconds=10.0,
+            cadence_min_votes=5,
+            cadence_max_cv=0.1,
+            coburst_window_seconds=3.0,
+            coburst_min_emails=5,
+            cohort_min_emails=20,
+            typo_domain_files=(),
+            disposable_domain_files=(),
+            rule_files=(),
         )
 
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "excluded_days": sorted(self.excluded_days),
+            "suspicious_email_plus_regex": self.suspicious_email_plus_regex.pattern,
+            "suspicious_email_suffix3_regex": self.suspicious_email_suffix3_regex.pattern,
+            "suspicious_domains_regex": self.suspicious_domains_regex.pattern,
+            "night_hours": list(self.night_hours),
+            "min_global_delta_seconds": self.min_global_delta_seconds,
+            "min_per_choice_delta_seconds": self.min_per_choice_delta_seconds,
+            "min_email_gap_seconds": self.min_email_gap_seconds,
+            "cadence_min_votes": self.cadence_min_votes,
+            "cadence_max_cv": self.cadence_max_cv,
+            "coburst_window_seconds": self.coburst_window_seconds,
+            "coburst_min_emails": self.coburst_min_emails,
+            "cohort_min_emails": self.cohort_min_emails,
+            "typo_domain_files": list(self.typo_domain_files),
+            "disposable_domain_files": list(self.disposable_domain_files),
+            "rule_files": list(self.rule_files),
+        }
+
+    @staticmethod
+    def from_dict(overrides: Mapping[str, Any], base: "AuditConfig | None" = None) -> "AuditConfig":
+        """Aplica ``overrides`` (formato de ``to_dict``) sobre ``base`` ou o padrão."""
+        values = {f.name: getattr(base or AuditConfig.default(), f.name) for f in fields(AuditConfig)}
+        unknown = set(overrides) - set(values)
+        if unknown:
+            raise ValueError(f"Parâmetros de configuração desconhecidos: {sorted(unknown)}")
+
+        for key, value in overrides.items():
+            if key == "excluded_days":
+                value = {int(d) for d in value}
+            elif key.endswith("_regex"):
+                value = re.compile(value) if isinstance(value, str) else value
+            elif key == "night_hours":
+                value = (int(value[0]), int(value[1]))
+            elif key.endswith("_files"):
+                value = tuple(str(p) for p in ([value] if isinstance(value, str) else value))
+            elif key in ("cadence_min_votes", "coburst_min_emails", "cohort_min_emails"):
+                value = int(value)
+            else:
+                value = float(value)
+            values[key] = value
+        return AuditConfig(**values)
+
+
+def parse_days(text: str) -> list[int]:
+    """Dias escritos como ``"20,21,22"`` (CLI e query do servidor)."""
+    return [int(x.strip()) for x in text.split(",") if x.strip().isdigit()]
+
+
+def parse_hours(text: str) -> tuple[int, int]:
+    """Faixa de horas escrita como ``"0-5"`` (ou uma hora só, ``"3"``)."""
+    start, _, end = text.partition("-")
+    return int(start), int(end or start)
@@ -0,0 +1,262 @@
+"""Classificação dos domínios de e-mail por listas: typo, descartável ou provedor.
+
+As regras ficam numa trie de rótulos invertidos (``com`` → ``gmail``), então
+uma regra para ``mailinator.com`` também vale para ``x.mailinator.com`` e o
+custo de cada consulta depende só do número de rótulos do domínio, não do
+tamanho das listas. Só os domínios distintos são classificados; o resultado
+volta para as linhas pelo código categórico de ``email_domain``.
+
+Além das listas, os vizinhos a uma edição (inserção, remoção, troca ou
+transposição de um caractere) dos provedores populares entram como typo,
+exceto quando o vizinho é ele mesmo um provedor conhecido ou só troca o
+código de país (``hotmail.com.br`` → ``hotmail.com.ar`` é outro provedor real).
+"""
+from __future__ import annotations
+
+from functools import lru_cache
+import os
+from pathlib import Path
+import re
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .config import AuditConfig
+
+DOMAIN_CATEGORIES = ("provider", "typo", "disposable")
+
+# Legitimate providers; a rule for one of these always wins
+POPULAR_PROVIDERS = (
+    "gmail.com",
+    "googlemail.com",
+    "hotmail.com",
+    "hotmail.com.br",
+    "outlook.com",
+    "outlook.com.br",
+    "live.com",
+    "msn.com",
+    "yahoo.com",
+    "yahoo.com.br",
+    "ymail.com",
+    "rocketmail.com",
+    "icloud.com",
+    "me.com",
+    "mac.com",
+    "uol.com.br",
+    "bol.com.br",
+    "terra.com.br",
+    "ig.com.br",
+    "globo.com",
+    "globomail.com",
+    "aol.com",
+    "mail.com",
+    "email.com",
+    "gmx.com",
+    "zoho.com",
+    "protonmail.com",
+    "proton.me",
+)
+# Long enough that their one-edit neighbours are almost never real domains
+NEIGHBOUR_PROVIDERS = (
+    "gmail.com",
+    "hotmail.com",
+    "hotmail.com.br",
+    "outlook.com",
+    "outlook.com.br",
+    "yahoo.com",
+    "yahoo.com.br",
+    "icloud.com",
+)
+DEFAULT_TYPO_DOMAINS = ("gmail.cm", "gmail.con", "gmail.comj", "gmal.com", "gmial.com", "hotmal.com", "hotmial.com")
+DEFAULT_DISPOSABLE_DOMAINS = (
+    "10minutemail.com",
+    "dispostable.com",
+    "getnada.com",
+    "guerrillamail.com",
+    "guerrillamail.net",
+    "mailinator.com",
+    "maildrop.cc",
+    "sharklasers.com",
+    "temp-mail.org",
+    "tempmail.com",
+    "throwawaymail.com",
+    "trashmail.com",
+    "yopmail.com",
+)
+
+DOMAIN_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789-."
+
+# Rule priorities: providers > explicit lists > generated neighbours
+_PRIORITY = {"neighbour": 0, "typo": 1, "disposable": 1, "provider": 2}
+
+
+def load_domain_list(path: str | Path) -> list[str]:
+    """Um domínio por linha; linhas vazias e comentários (``#``) são ignorados."""
+    domains = []
+    for line in Path(path).read_text(encoding="utf-8").splitlines():
+        domain = line.split("#", 1)[0].strip().lower().lstrip("@")
+        if domain:
+            domains.append(domain)
+    return domains
+
+
+def edit_neighbours(word: str, alphabet: str = DOMAIN_ALPHABET) -> set[str]:
+    """Todas as cadeias a uma edição de ``word`` (sem ``word``)."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    out = {a + b[1:] for a, b in splits if b}
+    out |= {a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1}
+    out |= {a + c + b[1:] for a, b in splits if b for c in alphabet}
+    out |= {a + c + b for a, b in splits for c in alphabet}
+    out.discard(word)
+    return {w for w in out if w and not w.startswith(".") and not w.endswith(".") and ".." not in w}
+
+
+def provider_neighbours(provider: str) -> set[str]:
+    """``edit_neighbours`` de um provedor, sem os que só trocam o código de país (``.br`` → ``.ar``)."""
+    head, _, country = provider.rpartition(".")
+    neighbours = edit_neighbours(provider)
+    if len(country) != 2 or not country.isalpha():
+        return neighbours
+    kept = set()
+    for neighbour in neighbours:
+        other_head, _, other_country = neighbour.rpartition(".")
+        if other_head == head and len(other_country) == 2 and other_country.isalpha():
+            continue  # the same provider in another country
+        kept.add(neighbour)
+    return kept
+
+
+class DomainTrie:
+    """Trie de rótulos invertidos; ``match`` devolve a regra mais específica."""
+
+    def __init__(self) -> None:
+        self._root: dict = {}
+        self._size = 0
+
+    def add(self, domain: str, category: str, priority: int = 1) -> None:
+        node = self._root
+        for label in reversed(domain.split(".")):
+            node = node.setdefault(label, {})
+        current = node.get(None)
+        if current is None:
+            self._size += 1
+        if current is None or priority >= current[0]:
+            node[None] = (priority, category)
+
+    def match(self, domain: str) -> str | None:
+        node, found = self._root, None
+        for label in reversed(domain.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            if None in node:
+                found = node[None][1]
+        return found
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class DomainRegistry:
+    def __init__(
+        self,
+        typo: Iterable[str] = DEFAULT_TYPO_DOMAINS,
+        disposable: Iterable[str] = DEFAULT_DISPOSABLE_DOMAINS,
+        providers: Iterable[str] = POPULAR_PROVIDERS,
+        neighbour_providers: Iterable[str] = NEIGHBOUR_PROVIDERS,
+    ) -> None:
+        self.trie = DomainTrie()
+        for provider in neighbour_providers:
+            for neighbour in provider_neighbours(provider):
+                self.trie.add(neighbour, "typo", _PRIORITY["neighbour"])
+        for domain in typo:
+            self.trie.add(domain, "typo", _PRIORITY["typo"])
+        for domain in disposable:
+            self.trie.add(domain, "disposable", _PRIORITY["disposable"])
+        for domain in providers:
+            self.trie.add(domain, "provider", _PRIORITY["provider"])
+
+    def classify(self, domains: Iterable[str]) -> np.ndarray:
+        """Categoria de cada domínio (``None`` quando nenhuma regra casa)."""
+        return np.array([self.match(d) for d in domains], dtype=object)
+
+    def match(self, domain: str) -> str | None:
+        return self.trie.match(domain) if isinstance(domain, str) else None
+
+
+@lru_cache(maxsize=8)
+def _cached_registry(typo_files: tuple, disposable_files: tuple) -> DomainRegistry:
+    typo = list(DEFAULT_TYPO_DOMAINS)
+    for path, _ in typo_files:
+        typo += load_domain_list(path)
+    disposable = list(DEFAULT_DISPOSABLE_DOMAINS)
+    for path, _ in disposable_files:
+        disposable += load_domain_list(path)
+    return DomainRegistry(typo=typo, disposable=disposable)
+
+
+def registry_for(cfg: AuditConfig) -> DomainRegistry:
+    """Registro padrão mais as listas de ``cfg`` (recarregadas quando o arquivo muda)."""
+
+    def stamps(paths: tuple[str, ...]) -> tuple:
+        return tuple((str(p), os.stat(p).st_mtime_ns) for p in paths)
+
+    return _cached_registry(stamps(cfg.typo_domain_files), stamps(cfg.disposable_domain_files))
+
+
+def email_domains(emails: pd.Series) -> pd.Series:
+    """``email_domain`` categórico (categorias ordenadas), partindo só os e-mails distintos."""
+    codes, uniques = pd.factorize(emails)
+    domains = pd.Series(uniques, dtype="string").str.replace(r"^.*@", "", regex=True)
+    domain_codes, categories = pd.factorize(domains, sort=True)
+    row_codes = np.append(domain_codes, -1)[codes]
+    return pd.Series(
+        pd.Categorical.from_codes(row_codes, categories=pd.Index(categories, dtype=object)),
+        index=emails.index,
+        name="email_domain",
+    )
+
+
+def classify_domains(email_domain: pd.Series, cfg: AuditConfig) -> pd.DataFrame:
+    """
+    Uma linha por domínio distinto: ``domain``, ``category`` e ``typo``/``disposable``.
+    ``suspicious_domains_regex`` continua valendo, aplicado a ``"@" + domínio``.
+    """
+    domains = pd.Series(email_domain.cat.categories, dtype=object)
+    category = registry_for(cfg).classify(domains)
+    regex: re.Pattern[str] = cfg.suspicious_domains_regex
+    extra = np.array([regex.search("@" + d) is not None for d in domains], dtype=bool)
+    return pd.DataFrame(
+        {
+            "domain": domains,
+            "category": category,
+            "typo": (category == "typo") | extra,
+            "disposable": category == "disposable",
+        }
+    )
+
+
+def domain_flags(email_domain: pd.Series, cfg: AuditConfig) -> tuple[np.ndarray, np.ndarray]:
+    """Flags (typo, descartável) por linha, via o código categórico do domínio."""
+    table = classify_domains(email_domain, cfg)
+    codes = email_domain.cat.codes.to_numpy()
+    typo = np.append(table["typo"].to_numpy(dtype=bool), False)[codes]
+    disposable = np.append(table["disposable"].to_numpy(dtype=bool), False)[codes]
+    return typo, disposable
+
+
+def domain_table(flagged: pd.DataFrame, cfg: AuditConfig) -> pd.DataFrame:
+    """Domínios com votos, categoria e e-mails distintos, do mais votado ao menos."""
+    table = classify_domains(flagged["email_domain"], cfg)
+    codes = flagged["email_domain"].cat.codes.to_numpy()
+    keep = codes >= 0
+    n = len(table)
+    table["votes"] = np.bincount(codes[keep], minlength=n)
+    # Distinct (domain, email) pairs give the number of addresses per domain
+    email_codes, emails = pd.factorize(flagged["email"])
+    width = max(len(emails), 1)
+    pairs = np.unique(codes[keep].astype(np.int64) * width + email_codes[keep])
+    table["emails"] = np.bincount(pairs // width, minlength=n)
+    table = table[table["votes"] > 0]
+    return table.sort_values("votes", ascending=False, kind="mergesort").reset_index(drop=True)
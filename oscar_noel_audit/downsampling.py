@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+
+def _as_float(values: pd.Series | np.ndarray) -> np.ndarray:
+    arr = np.asarray(values)
+    if np.issubdtype(arr.dtype, np.datetime64):
+        arr = arr.astype("datetime64[ns]").view("int64")
+    return np.nan_to_num(arr.astype(float, copy=False))
+
+
+def lttb_indices(x: pd.Series | np.ndarray, y: pd.Series | np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Índices escolhidos pelo Largest-Triangle-Three-Buckets.
+
+    Mantém o primeiro e o último ponto e, em cada um dos ``threshold - 2``
+    baldes intermediários, o ponto que forma o maior triângulo com o ponto
+    já escolhido e a média do balde seguinte — preserva picos e vales.
+    ``x`` precisa estar ordenado.
+    """
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    xs = _as_float(x)
+    ys = _as_float(y)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(np.intp)
+    out = np.empty(threshold, dtype=np.intp)
+    out[0], out[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo = hi
+        next_hi = edges[i + 2] if i + 2 < len(edges) else n
+        cx = xs[next_lo:next_hi].mean()
+        cy = ys[next_lo:next_hi].mean()
+        area = np.abs((xs[a] - cx) * (ys[lo:hi] - ys[a]) - (xs[a] - xs[lo:hi]) * (cy - ys[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return out
+
+
+def downsample(
+    df: pd.DataFrame,
+    x: str,
+    y: str | Sequence[str],
+    max_points: int = 2000,
+    keep: str | np.ndarray | pd.Series | None = None,
+) -> pd.DataFrame:
+    """
+    Reduz ``df`` (ordenado por ``x``) a cerca de ``max_points`` linhas para exibição.
+
+    Com várias colunas em ``y``, une os pontos escolhidos para cada uma. As
+    linhas marcadas em ``keep`` (nome de coluna booleana ou máscara), como
+    outliers, são sempre mantidas e podem passar do orçamento.
+    """
+    if len(df) <= max_points:
+        return df
+
+    columns = [y] if isinstance(y, str) else list(y)
+    picked = [lttb_indices(df[x], df[col], max(3, max_points // len(columns))) for col in columns]
+    if keep is not None:
+        mask = df[keep] if isinstance(keep, str) else keep
+        picked.append(np.flatnonzero(np.asarray(mask, dtype=bool)))
+    return df.iloc[np.unique(np.concatenate(picked))]
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+INDEX_COLUMNS = [
+    "votes",
+    "first_seen",
+    "last_seen",
+    "distinct_choices",
+    "dominant_choice",
+    "dominant_share",
+    "mean_gap_seconds",
+    "min_gap_seconds",
+]
+
+
+@dataclass(frozen=True)
+class EmailIndex:
+    """
+    Estatísticas por e-mail, calculadas uma vez a partir dos códigos fatorados.
+
+    ``codes`` acompanha as linhas de ``flagged_raw`` (mesma ordem) e indexa
+    ``table``, que tem uma linha por e-mail distinto.
+    """
+
+    codes: np.ndarray
+    table: pd.DataFrame
+
+    @property
+    def n_emails(self) -> int:
+        return len(self.table)
+
+    @property
+    def max_votes(self) -> int:
+        return int(self.table["votes"].max()) if len(self.table) else 0
+
+    @property
+    def duplicates(self) -> int:
+        return int(len(self.codes) - len(self.table))
+
+    def unique_count(self, mask: np.ndarray | pd.Series) -> int:
+        """Número de e-mails distintos entre as linhas selecionadas por ``mask``."""
+        present = np.zeros(len(self.table), dtype=bool)
+        present[self.codes[np.asarray(mask, dtype=bool)]] = True
+        return int(present.sum())
+
+    def repeat_senders(self, min_votes: int = 2, top: int | None = None) -> pd.DataFrame:
+        repeats = self.table[self.table["votes"] >= min_votes]
+        repeats = repeats.sort_values("votes", ascending=False, kind="mergesort")
+        if top is not None:
+            repeats = repeats.head(top)
+        return repeats.reset_index()
+
+
+def build_email_index(flagged: pd.DataFrame) -> EmailIndex:
+    codes, emails = pd.factorize(flagged["email"])
+    ts = flagged["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+    table = key_statistics(codes, len(emails), ts, flagged["choice"])
+    table.index = pd.Index(emails, name="email")
+    return EmailIndex(codes=codes, table=table)
+
+
+def key_statistics(codes: np.ndarray, n_keys: int, ts: np.ndarray, choice: pd.Series) -> pd.DataFrame:
+    """
+    Colunas de ``INDEX_COLUMNS`` para cada chave fatorada (``codes`` em 0..n_keys-1).
+
+    ``ts`` são timestamps em ns (int64) alinhados a ``codes``.
+    """
+    # Group rows by key, keeping time order inside each group (stable sort
+    # when the rows are already chronological, as flagged_raw is)
+    if len(ts) < 2 or np.all(ts[1:] >= ts[:-1]):
+        order = np.argsort(codes, kind="stable")
+    else:
+        order = np.lexsort((ts, codes))
+    votes = np.bincount(codes, minlength=n_keys)
+    starts = np.cumsum(votes) - votes
+    ends = starts + votes - 1
+    ts_sorted = ts[order]
+
+    first = ts_sorted[starts]
+    last = ts_sorted[ends]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean_gap = np.where(votes > 1, (last - first) / 1e9 / (votes - 1), np.nan)
+
+    gaps = np.diff(ts_sorted) / 1e9
+    # Gaps that cross from one key to the next are not inter-vote gaps
+    gaps[ends[:-1]] = np.inf
+    min_gap = np.full(n_keys, np.nan)
+    multi = votes > 1
+    if multi.any():
+        min_gap[multi] = np.minimum.reduceat(np.append(gaps, np.inf), starts)[multi]
+
+    choice_codes, choices = pd.factorize(choice)
+    pair = codes.astype(np.int64) * max(len(choices), 1) + choice_codes
+    pairs, pair_votes = np.unique(pair, return_counts=True)
+    pair_key = pairs // max(len(choices), 1)
+    pair_choice = pairs % max(len(choices), 1)
+    distinct = np.bincount(pair_key, minlength=n_keys)
+    # Pairs are grouped by key; within each, put the most voted choice first
+    best = np.lexsort((-pair_votes, pair_key))
+    dominant = best[np.cumsum(distinct) - distinct]
+
+    return pd.DataFrame(
+        {
+            "votes": votes,
+            "first_seen": pd.to_datetime(first, unit="ns"),
+            "last_seen": pd.to_datetime(last, unit="ns"),
+            "distinct_choices": distinct,
+            "dominant_choice": np.asarray(choices, dtype=object)[pair_choice[dominant]],
+            "dominant_share": pair_votes[dominant] / np.maximum(votes, 1),
+            "mean_gap_seconds": mean_gap,
+            "min_gap_seconds": min_gap,
+        },
+        columns=INDEX_COLUMNS,
+    )
@@ -1,10 +1,30 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+from hashlib import sha256
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator, Sequence
 
+import numpy as np
 import pandas as pd
 
+from .profiling import StageProfiler, profile_stage
+
+
+TIMESTAMP_COLUMNS = [
+    "timestamp",
+    "Carimbo de data/hora",
+    "Carimbo de data/hora ",
+    "Timestamp",
+]
+EMAIL_COLUMNS = ["email", "Endereço de e-mail", "Endereço de e-mail ", "E-mail", "Email"]
+CHOICE_COLUMNS = [
+    "Noel escolhido",
+    "Qual o seu Noel favorito?",
+    "Qual o seu Noel favorito? ",
+    "choice",
+]
+
 
 class SchemaError(ValueError):
     pass
@@ -22,49 +42,330 @@ def _pick_first_existing(columns: Iterable[str], candidates: Iterable[str]) -> s
     )
 
 
-def load_votes_csv(csv_path: str | Path) -> pd.DataFrame:
+def load_votes_csv(csv_path: str | Path, profiler: StageProfiler | None = None) -> pd.DataFrame:
     csv_path = Path(csv_path)
-    df = pd.read_csv(csv_path)
-
-    ts_col = _pick_first_existing(
-        df.columns,
-        [
-            "timestamp",
-            "Carimbo de data/hora",
-            "Carimbo de data/hora ",
-            "Timestamp",
-        ],
-    )
-    email_col = _pick_first_existing(
-        df.columns,
-        ["email", "Endereço de e-mail", "Endereço de e-mail ", "E-mail", "Email"],
-    )
-    choice_col = _pick_first_existing(
-        df.columns,
-        [
-            "Noel escolhido",
-            "Qual o seu Noel favorito?",
-            "Qual o seu Noel favorito? ",
-            "choice",
-        ],
-    )
+    with profile_stage(profiler, "load_csv") as stage:
+        df = pd.read_csv(csv_path)
+        stage.rows_out = len(df)
+
+    with profile_stage(profiler, "normalize", rows_in=len(df)) as stage:
+        out = _normalize_votes(df)
+        stage.rows_out = len(out)
+    return out
 
-    out = df.copy()
-    out["timestamp"] = pd.to_datetime(out[ts_col], dayfirst=True, errors="coerce")
-    out["email"] = out[email_col].astype(str).str.strip().str.lower()
-    out["choice"] = out[choice_col].astype(str).str.strip()
 
-    keep_cols: list[str] = ["timestamp", "email", "choice"]
+def load_choices_csv(csv_path: str | Path) -> pd.Series:
+    """Só a coluna ``choice`` de ``load_votes_csv`` (mesmas linhas), sem ler e-mails e demais colunas."""
+    columns = pd.read_csv(csv_path, nrows=0).columns
+    ts_col = _pick_first_existing(columns, TIMESTAMP_COLUMNS)
+    choice_col = _pick_first_existing(columns, CHOICE_COLUMNS)
+    df = pd.read_csv(csv_path, usecols=[ts_col, choice_col])
+    valid = pd.to_datetime(df[ts_col], dayfirst=True, errors="coerce").notna().to_numpy()
+    choices = df[choice_col][valid].astype(str).str.strip()
+    return choices.reset_index(drop=True).rename("choice")
+
+
+def iter_votes_csv(csv_path: str | Path, chunksize: int = 200_000) -> Iterator[pd.DataFrame]:
+    """Lê o CSV em blocos já normalizados (memória limitada ao bloco)."""
+    with pd.read_csv(Path(csv_path), chunksize=chunksize) as reader:
+        for chunk in reader:
+            yield _normalize_votes(chunk)
+
+
+def _normalize_votes(df: pd.DataFrame) -> pd.DataFrame:
+    ts_col = _pick_first_existing(df.columns, TIMESTAMP_COLUMNS)
+    email_col = _pick_first_existing(df.columns, EMAIL_COLUMNS)
+    choice_col = _pick_first_existing(df.columns, CHOICE_COLUMNS)
+
+    timestamp = pd.to_datetime(df[ts_col], dayfirst=True, errors="coerce")
+    columns = {
+        "timestamp": timestamp,
+        "email": df[email_col].astype(str).str.strip().str.lower(),
+        "choice": df[choice_col].astype(str).str.strip(),
+    }
     for c in df.columns:
-        if c in {ts_col, email_col, choice_col}:
-            continue
-        if c in keep_cols:
-            continue
-        keep_cols.append(c)
-    out = out[keep_cols]
-    out = out.dropna(subset=["timestamp"]).reset_index(drop=True)
+        if c not in {ts_col, email_col, choice_col} and c not in columns:
+            columns[c] = df[c]
+    # Built column by column (no full-frame copy); rows are only copied when some timestamps are invalid
+    out = pd.DataFrame(columns, copy=False)
+    valid = timestamp.notna().to_numpy()
+    if not valid.all():
+        out = out[valid]
+    out.index = pd.RangeIndex(len(out))
     return out
 
 
+def hash_emails(emails: pd.Series, length: int = 12) -> pd.Series:
+    codes, uniques = pd.factorize(emails)
+    hashed = np.array(
+        [sha256(str(e).encode("utf-8")).hexdigest()[:length] for e in uniques] + [None],
+        dtype=object,
+    )
+    return pd.Series(hashed[codes], index=emails.index, name="email_hash")
+
+
+def file_fingerprint(path: str | Path, chunk_bytes: int = 1 << 20) -> str:
+    digest = sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_bytes), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def frame_fingerprint(df: pd.DataFrame, columns: Iterable[str] | None = None) -> str:
+    """Hash estável do conteúdo (colunas + valores), para chaves de cache."""
+    cols = list(df.columns if columns is None else columns)
+    digest = sha256("\x1f".join(map(str, cols)).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df[cols], index=False).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+# Snapshot integrity: a vote is identified by (timestamp, email); its content adds the choice
+FINGERPRINT_COLUMNS = ("timestamp", "email", "choice")
+KEY_COLUMNS = ("timestamp", "email")
+# Two independent 64-bit keyed hashes per row, so range digests carry 128 bits
+_ROW_HASH_KEYS = ("noel-snapshot-a1", "noel-snapshot-b2")
+_KEY_HASH_KEY = "noel-snapshot-k0"
+_DIGEST_COLUMNS = ["rows", "sum_a", "sum_b"]
+
+
+def row_fingerprints(votes: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """Dois hashes de 64 bits por linha normalizada (timestamp, e-mail, candidato)."""
+    cols = votes[list(FINGERPRINT_COLUMNS)]
+    a, b = (pd.util.hash_pandas_object(cols, index=False, hash_key=k).to_numpy() for k in _ROW_HASH_KEYS)
+    return a, b
+
+
+def _range_starts(timestamp: pd.Series, width: int) -> np.ndarray:
+    ns = timestamp.to_numpy(dtype="datetime64[ns]").view("int64")
+    return ns - ns % width
+
+
+def _sum_by_key(keys: np.ndarray, values: list[np.ndarray]) -> tuple[np.ndarray, list[np.ndarray]]:
+    # uint64 addition wraps, which keeps the sums exact modulo 2**64
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    sums = []
+    for v in values:
+        out = np.zeros(len(uniques), dtype=v.dtype)
+        np.add.at(out, inverse, v)
+        sums.append(out)
+    return uniques, sums
+
+
+@dataclass(frozen=True)
+class SnapshotDigest:
+    """
+    Digest de uma exportação por faixa de tempo (``freq``): número de linhas e
+    duas somas módulo 2**64 dos fingerprints. A soma não depende da ordem das
+    linhas e a faixa mãe é a soma das filhas, então ``rollup`` sobe a árvore
+    sem reler o arquivo.
+    """
+
+    freq: str
+    table: pd.DataFrame  # index: range start; columns: rows, sum_a, sum_b
+
+    @property
+    def width(self) -> int:
+        return pd.Timedelta(self.freq).value
+
+    @property
+    def rows(self) -> int:
+        return int(self.table["rows"].sum())
+
+    @property
+    def root(self) -> tuple[int, ...]:
+        return tuple(int(column.sum()) for column in self._columns())
+
+    def _columns(self) -> list[np.ndarray]:
+        return [self.table[c].to_numpy() for c in _DIGEST_COLUMNS]
+
+    def rollup(self, freq: str) -> SnapshotDigest:
+        """Digest em faixas maiores (``freq`` múltiplo da faixa atual)."""
+        width = pd.Timedelta(freq).value
+        if width % self.width:
+            raise ValueError(f"{freq} não é múltiplo de {self.freq}")
+        starts = self.table.index.to_numpy(dtype="datetime64[ns]").view("int64")
+        return _digest_table(freq, *_sum_by_key(starts - starts % width, self._columns()))
+
+
+def _freq_width(freq: str) -> int:
+    """Largura de ``freq`` em ns; texto inválido ou faixa não positiva vira ``ValueError``."""
+    try:
+        width = pd.Timedelta(freq).value
+    except ValueError as exc:
+        raise ValueError(f"Faixa de tempo inválida: {freq!r} (use, por exemplo, 1h ou 15min)") from exc
+    if width <= 0:
+        raise ValueError(f"Faixa de tempo precisa ser positiva: {freq!r}")
+    return width
+
+
+def _digest_table(freq: str, starts: np.ndarray, sums: list[np.ndarray]) -> SnapshotDigest:
+    index = pd.DatetimeIndex(starts.view("datetime64[ns]"), name="start")
+    return SnapshotDigest(freq=freq, table=pd.DataFrame(dict(zip(_DIGEST_COLUMNS, sums)), index=index))
+
+
+def _iter_snapshot(source: pd.DataFrame | str | Path, chunksize: int) -> Iterator[pd.DataFrame]:
+    if isinstance(source, pd.DataFrame):
+        yield source
+    else:
+        yield from iter_votes_csv(source, chunksize=chunksize)
+
+
+def snapshot_digest(
+    source: pd.DataFrame | str | Path, freq: str = "1h", chunksize: int = 200_000
+) -> SnapshotDigest:
+    """Digest por faixa de ``freq``, lendo o CSV em blocos (memória ~ número de faixas)."""
+    width = _freq_width(freq)
+    keys, parts = [], []
+    for chunk in _iter_snapshot(source, chunksize):
+        a, b = row_fingerprints(chunk)
+        starts, sums = _sum_by_key(
+            _range_starts(chunk["timestamp"], width), [np.ones(len(chunk), dtype=np.int64), a, b]
+        )
+        keys.append(starts)
+        parts.append(sums)
+    if not keys:
+        empty = [np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=np.uint64)]
+        return _digest_table(freq, empty[0], empty)
+    merged = [np.concatenate([sums[i] for sums in parts]) for i in range(len(_DIGEST_COLUMNS))]
+    return _digest_table(freq, *_sum_by_key(np.concatenate(keys), merged))
+
+
+def _differing_starts(
+    old: SnapshotDigest, new: SnapshotDigest, within: np.ndarray | None, parent: int
+) -> np.ndarray:
+    # A range missing on one side is an empty range; filling with 0 keeps the sums uint64
+    union = old.table.index.union(new.table.index)
+    starts = union.to_numpy(dtype="datetime64[ns]").view("int64")
+    keep = np.ones(len(union), dtype=bool) if within is None else np.isin(starts - starts % parent, within)
+    a = old.table.reindex(union[keep], fill_value=0)
+    b = new.table.reindex(union[keep], fill_value=0)
+    differs = (a[_DIGEST_COLUMNS].to_numpy() != b[_DIGEST_COLUMNS].to_numpy()).any(axis=1)
+    return starts[keep][differs]
+
+
+def changed_ranges(old: SnapshotDigest, new: SnapshotDigest, levels: Sequence[str] = ("7D", "1D")) -> pd.DatetimeIndex:
+    """
+    Faixas de ``old.freq`` cujo digest mudou, descendo a árvore: só as filhas
+    de faixas maiores que diferem são comparadas.
+    """
+    if old.freq != new.freq:
+        raise ValueError(f"Digests com faixas diferentes: {old.freq} e {new.freq}")
+    within = np.zeros(0, dtype=np.int64)
+    if old.root != new.root:
+        coarse = [f for f in levels if pd.Timedelta(f).value % old.width == 0]
+        within, parent = None, 1
+        for freq in coarse + [old.freq]:
+            within = _differing_starts(old.rollup(freq), new.rollup(freq), within, parent)
+            parent = pd.Timedelta(freq).value
+    return pd.DatetimeIndex(np.sort(within).view("datetime64[ns]"), name="start")
+
+
+@dataclass(frozen=True)
+class SnapshotDiff:
+    """
+    Votos que mudaram entre duas exportações. ``modified`` tem o mesmo
+    (timestamp, e-mail) com outro candidato; um timestamp editado aparece
+    como um voto removido mais um adicionado.
+    """
+
+    added: pd.DataFrame
+    removed: pd.DataFrame
+    modified: pd.DataFrame  # timestamp, email, choice_old, choice_new
+    ranges: pd.DatetimeIndex
+    freq: str
+    rows_old: int
+    rows_new: int
+
+    @property
+    def identical(self) -> bool:
+        return len(self.ranges) == 0
+
+    def table(self) -> pd.DataFrame:
+        """Uma linha por mudança (``change``: added/removed/modified), em ordem de tempo."""
+        parts = [
+            self.added.rename(columns={"choice": "choice_new"}).assign(change="added"),
+            self.removed.rename(columns={"choice": "choice_old"}).assign(change="removed"),
+            self.modified.assign(change="modified"),
+        ]
+        out = pd.concat(parts, ignore_index=True)
+        out = out.reindex(columns=["change", "timestamp", "email", "choice_old", "choice_new"])
+        return out.sort_values(["timestamp", "email"], kind="mergesort").reset_index(drop=True)
+
+
+def _rows_in_ranges(
+    source: pd.DataFrame | str | Path, starts: np.ndarray, width: int, chunksize: int
+) -> pd.DataFrame:
+    cols = list(FINGERPRINT_COLUMNS)
+    parts = [pd.DataFrame({"timestamp": pd.Series(dtype="datetime64[ns]"), "email": [], "choice": []})]
+    if len(starts):
+        for chunk in _iter_snapshot(source, chunksize):
+            keep = np.isin(_range_starts(chunk["timestamp"], width), starts)
+            parts.append(chunk.loc[keep, cols])
+    rows = pd.concat(parts, ignore_index=True)
+    rows["row"] = row_fingerprints(rows)[0]
+    rows["key"] = pd.util.hash_pandas_object(rows[list(KEY_COLUMNS)], index=False, hash_key=_KEY_HASH_KEY).to_numpy()
+    return rows
+
+
+def _match(old: pd.DataFrame, new: pd.DataFrame, on: str) -> pd.DataFrame:
+    # The n-th copy of a value on one side pairs with the n-th copy on the other
+    old = old.assign(nth=old.groupby(on).cumcount())
+    new = new.assign(nth=new.groupby(on).cumcount())
+    return old.merge(new, on=[on, "nth"], how="outer", suffixes=("_old", "_new"), indicator=True)
+
+
+def compare_snapshots(
+    old: pd.DataFrame | str | Path,
+    new: pd.DataFrame | str | Path,
+    freq: str = "1h",
+    chunksize: int = 200_000,
+) -> SnapshotDiff:
+    """
+    Compara duas exportações pelos digests por faixa e só relê as linhas das
+    faixas que mudaram; arquivos iguais não passam da comparação da raiz.
+    """
+    old_digest = snapshot_digest(old, freq, chunksize)
+    new_digest = snapshot_digest(new, freq, chunksize)
+    ranges = changed_ranges(old_digest, new_digest)
+    width = old_digest.width
+    starts = ranges.to_numpy(dtype="datetime64[ns]").view("int64")
+    old_rows = _rows_in_ranges(old, starts, width, chunksize)
+    new_rows = _rows_in_ranges(new, starts, width, chunksize)
+
+    # Identical rows cancel out first; what is left pairs up by (timestamp, email)
+    same = _match(old_rows, new_rows, on="row")
+    gone = same[same["_merge"] == "left_only"]
+    came = same[same["_merge"] == "right_only"]
+    cols = list(FINGERPRINT_COLUMNS)
+    gone = gone.set_axis([c.removesuffix("_old") for c in gone.columns], axis=1)[cols + ["key"]]
+    came = came.set_axis([c.removesuffix("_new") for c in came.columns], axis=1)[cols + ["key"]]
+    paired = _match(gone, came, on="key")
+
+    def side(merge: str, suffix: str) -> pd.DataFrame:
+        picked = paired[paired["_merge"] == merge]
+        out = picked[[c + suffix for c in cols]].set_axis(cols, axis=1)
+        return out.sort_values(["timestamp", "email"], kind="mergesort").reset_index(drop=True)
+
+    changed = paired[paired["_merge"] == "both"]
+    modified = pd.DataFrame(
+        {
+            "timestamp": changed["timestamp_old"],
+            "email": changed["email_old"],
+            "choice_old": changed["choice_old"],
+            "choice_new": changed["choice_new"],
+        }
+    ).sort_values(["timestamp", "email"], kind="mergesort").reset_index(drop=True)
+    return SnapshotDiff(
+        added=side("right_only", "_new"),
+        removed=side("left_only", "_old"),
+        modified=modified,
+        ranges=ranges,
+        freq=freq,
+        rows_old=old_digest.rows,
+        rows_new=new_digest.rows,
+    )
+
+
 def load_context_markdown(path: str | Path) -> str:
     return Path(path).read_text(encoding="utf-8")
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import ipaddress
+
+import numpy as np
+import pandas as pd
+
+from .email_index import key_statistics
+
+IP_COLUMNS = ["ip", "ip_address", "endereco ip", "endereço ip"]
+USER_AGENT_COLUMNS = ["user_agent", "useragent", "navegador", "user agent"]
+DEVICE_COLUMNS = ["device", "dispositivo", "device_id", "device id"]
+
+# IPv4 prefix length -> IPv6 prefix length used for the same aggregation level
+_IPV6_PREFIX = {32: 128, 24: 64, 16: 48}
+
+CLUSTER_COLUMNS = [
+    "level",
+    "origin",
+    "votes",
+    "emails",
+    "distinct_choices",
+    "dominant_choice",
+    "dominant_share",
+    "max_window_votes",
+    "first_seen",
+    "last_seen",
+]
+
+
+@dataclass(frozen=True)
+class OriginColumns:
+    ip: str | None
+    user_agent: str | None
+    device: str | None
+
+    @property
+    def available(self) -> list[str]:
+        return [c for c in (self.ip, self.user_agent, self.device) if c]
+
+
+def find_column(df: pd.DataFrame, candidates: list[str]) -> str | None:
+    cols = {c.lower(): c for c in df.columns}
+    for cand in candidates:
+        if cand.lower() in cols:
+            return cols[cand.lower()]
+    return None
+
+
+def find_origin_columns(df: pd.DataFrame) -> OriginColumns:
+    return OriginColumns(
+        ip=find_column(df, IP_COLUMNS),
+        user_agent=find_column(df, USER_AGENT_COLUMNS),
+        device=find_column(df, DEVICE_COLUMNS),
+    )
+
+
+def _factorize_stripped(values: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Códigos (-1 = ausente) e rótulos, aparando espaços só nos valores distintos."""
+    codes, uniques = pd.factorize(values)
+    stripped = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.strip()
+    merged, labels = pd.factorize(stripped)
+    codes = np.where(codes >= 0, merged[np.maximum(codes, 0)], -1)
+    return codes, np.asarray(labels, dtype=object)
+
+
+def _ipv4_values(labels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Máscara de IPv4 válidos e o valor de 32 bits, sem laço por linha."""
+    n = len(labels)
+    # Dotted quads have at most 15 characters; a 16th one means "not IPv4".
+    # Transposed so each character position is a contiguous column.
+    chars = np.ascontiguousarray(np.array(labels, dtype="U16").view(np.uint32).reshape(n, 16).T).astype(np.int32)
+    octets = [np.zeros(n, dtype=np.int32) for _ in range(4)]
+    digits = [np.zeros(n, dtype=np.int32) for _ in range(4)]
+    field = np.zeros(n, dtype=np.int32)
+    valid = chars[15] == 0
+    ended = np.zeros(n, dtype=bool)
+    for c in chars[:15]:
+        is_digit = (c >= 48) & (c <= 57)
+        is_end = c == 0
+        valid &= (is_digit | (c == 46) | is_end) & ~(ended & ~is_end)
+        ended |= is_end
+        for f in range(4):
+            hit = is_digit & (field == f)
+            octets[f] += hit * (octets[f] * 9 + c - 48)  # octet * 10 + digit where hit
+            digits[f] += hit
+        field += c == 46
+    valid &= field == 3
+    for f in range(4):
+        valid &= (digits[f] >= 1) & (digits[f] <= 3) & (octets[f] <= 255)
+
+    value = np.zeros(n, dtype=np.int64)
+    for f in range(4):
+        value = (value << 8) | octets[f]
+    return valid, np.where(valid, value, 0)
+
+
+def _prefix_labels(labels: np.ndarray, is_v4: np.ndarray, value: np.ndarray, bits: int) -> np.ndarray:
+    out = labels.copy()
+    if is_v4.any():
+        prefix = value[is_v4] & ~((1 << (32 - bits)) - 1)
+        # Format each distinct prefix once
+        distinct, inverse = np.unique(prefix, return_inverse=True)
+        text = np.array(
+            [f"{p >> 24 & 255}.{p >> 16 & 255}.{p >> 8 & 255}.{p & 255}/{bits}" for p in distinct.tolist()],
+            dtype=object,
+        )
+        out[is_v4] = text[inverse]
+
+    v6_bits = _IPV6_PREFIX.get(bits, 64)
+    for i in np.flatnonzero(~is_v4):
+        try:
+            addr = ipaddress.ip_address(labels[i])
+        except ValueError:
+            continue
+        if addr.version == 6:
+            out[i] = str(ipaddress.ip_network(f"{addr}/{v6_bits}", strict=False))
+    return out
+
+
+def _prefix_levels(
+    codes: np.ndarray, labels: np.ndarray, bits: tuple[int, ...]
+) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    is_v4, value = _ipv4_values(labels)
+    levels = {}
+    for b in bits:
+        prefix_codes, prefix_labels = pd.factorize(_prefix_labels(labels, is_v4, value, b))
+        levels[b] = (np.where(codes >= 0, prefix_codes[np.maximum(codes, 0)], -1), np.asarray(prefix_labels, dtype=object))
+    return levels
+
+
+def ip_prefixes(ips: pd.Series, bits: int = 24) -> pd.Series:
+    """
+    Agrupa IPs pelo prefixo (``a.b.c.0/24``, ``a.b.0.0/16``).
+
+    Trabalha sobre os valores distintos: IPv4 com parsing vetorizado em numpy, IPv6 via
+    ``ipaddress`` (/64 no nível /24, /48 no /16). Valores que não são IP
+    ficam como estão.
+    """
+    codes, labels = _prefix_levels(*_factorize_stripped(ips), (bits,))[bits]
+    return pd.Series(np.append(labels, None)[codes], index=ips.index, name=ips.name)
+
+
+def window_counts(codes: np.ndarray, ts: np.ndarray, window_seconds: float) -> np.ndarray:
+    """
+    Para cada linha, quantos votos da mesma origem caem em ``[t, t + janela]``.
+
+    Ordena uma vez por (origem, tempo) e resolve a janela com ``searchsorted``
+    sobre uma chave composta (origem, posto do tempo), sem comparar pares.
+    """
+    n = len(codes)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    order = np.lexsort((ts, codes))
+    c = codes[order].astype(np.int64)
+    t = ts[order]
+
+    all_ts = np.sort(ts)
+    distinct_ts = all_ts[np.concatenate(([True], all_ts[1:] != all_ts[:-1]))]
+    rank = np.searchsorted(distinct_ts, t)
+    rank_end = np.searchsorted(distinct_ts, t + int(window_seconds * 1e9), side="right") - 1
+    width = len(distinct_ts) + 1
+    composite = c * width + rank
+    starts = np.searchsorted(composite, composite)  # first of any tied timestamps
+    ends = np.searchsorted(composite, c * width + rank_end, side="right")
+
+    counts = np.empty(n, dtype=np.int64)
+    counts[order] = ends - starts
+    return counts
+
+
+def origin_clusters(
+    df: pd.DataFrame,
+    codes: np.ndarray,
+    labels: np.ndarray,
+    level: str,
+    window_seconds: float = 60.0,
+    min_votes: int = 2,
+) -> pd.DataFrame:
+    """Uma linha por origem: volume, e-mails, concentração no candidato e pico na janela."""
+    present = codes >= 0
+    if not present.any():
+        return pd.DataFrame(columns=CLUSTER_COLUMNS)
+    codes = codes[present]
+    ts = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")[present]
+
+    table = key_statistics(codes, len(labels), ts, df["choice"][present])
+    email_codes, email_uniques = pd.factorize(df["email"][present])
+    width = max(len(email_uniques), 1)
+    pairs = pd.unique(codes.astype(np.int64) * width + email_codes)
+    emails = np.bincount(pairs // width, minlength=len(labels))
+
+    peak = np.zeros(len(labels), dtype=np.int64)
+    np.maximum.at(peak, codes, window_counts(codes, ts, window_seconds))
+
+    table.insert(0, "origin", labels)
+    table.insert(0, "level", level)
+    table["emails"] = emails
+    table["max_window_votes"] = peak
+    table = table[table["votes"] >= min_votes]
+    return table.sort_values(["votes", "max_window_votes"], ascending=False, kind="mergesort")[
+        CLUSTER_COLUMNS
+    ].reset_index(drop=True)
+
+
+def origin_levels(
+    df: pd.DataFrame, columns: OriginColumns | None = None
+) -> dict[str, tuple[np.ndarray, np.ndarray]]:
+    """
+    Chaves de agrupamento disponíveis, como (códigos, rótulos): IP, /24, /16,
+    user-agent, dispositivo e a combinação das colunas presentes.
+    """
+    columns = columns or find_origin_columns(df)
+    levels: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+    base: dict[str, tuple[np.ndarray, np.ndarray]] = {}
+    if columns.ip:
+        base[columns.ip] = levels["ip"] = _factorize_stripped(df[columns.ip])
+        prefixes = _prefix_levels(*levels["ip"], (24, 16))
+        levels["ip/24"] = prefixes[24]
+        levels["ip/16"] = prefixes[16]
+    if columns.user_agent:
+        base[columns.user_agent] = levels["user_agent"] = _factorize_stripped(df[columns.user_agent])
+    if columns.device:
+        base[columns.device] = levels["device"] = _factorize_stripped(df[columns.device])
+
+    if len(base) > 1:
+        # Combine integer codes, then build text labels for the distinct combinations only
+        combo = np.zeros(len(df), dtype=np.int64)
+        missing = np.zeros(len(df), dtype=bool)
+        for codes, labels in base.values():
+            combo = combo * (len(labels) + 1) + codes
+            missing |= codes < 0
+        # Rows missing any part stay out (-1); every label keeps at least one vote
+        combo_codes = np.full(len(df), -1, dtype=np.int64)
+        combo_codes[~missing], combos = pd.factorize(combo[~missing])
+        parts = []
+        remainder = np.asarray(combos, dtype=np.int64)
+        for codes, labels in reversed(list(base.values())):
+            parts.append(labels[np.clip(remainder % (len(labels) + 1), 0, len(labels) - 1)])
+            remainder //= len(labels) + 1
+        text = parts[-1].astype(object)
+        for part in reversed(parts[:-1]):
+            text = text + " | " + part
+        levels["+".join(base)] = (combo_codes, text)
+    return levels
+
+
+def analyze_origins(
+    df: pd.DataFrame,
+    columns: OriginColumns | None = None,
+    window_seconds: float = 60.0,
+    min_votes: int = 2,
+    top: int | None = 50,
+) -> dict[str, pd.DataFrame]:
+    """Clusters por nível de origem; vazio quando o CSV não traz IP/user-agent/dispositivo."""
+    out = {}
+    for level, (codes, labels) in origin_levels(df, columns).items():
+        clusters = origin_clusters(df, codes, labels, level, window_seconds=window_seconds, min_votes=min_votes)
+        out[level] = clusters.head(top) if top is not None else clusters
+    return out
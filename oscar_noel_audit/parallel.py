@@ -0,0 +1,206 @@
+"""Sinalização em paralelo por fatias de tempo (shards), com resultado idêntico ao sequencial.
+
+Os votos ordenados por tempo são cortados em fatias contíguas e cada fatia
+roda num processo. O que uma fatia precisa saber das anteriores cabe num
+estado de fronteira calculado no processo principal, em uma passada:
+
+- o último timestamp antes da fatia (intervalo global);
+- o último timestamp de cada candidato (intervalo por candidato);
+- o último timestamp de cada e-mail e se ele já teve um voto elegível
+  (intervalo do mesmo e-mail e deduplicação da base limpa).
+
+A cadência regular depende de todos os intervalos de cada remetente e é
+reduzida no processo principal, com a mesma soma do caminho sequencial.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .config import AuditConfig
+from .domains import domain_flags
+from .profiling import StageProfiler, profile_stage
+from .suspicion import _regular_senders
+
+MISSING = np.iinfo(np.int64).min
+
+
+@dataclass(frozen=True)
+class ShardInput:
+    ts: np.ndarray  # int64 ns, non-decreasing
+    choice_codes: np.ndarray
+    email_codes: np.ndarray
+    emails: np.ndarray
+    hour: np.ndarray
+    eligible: np.ndarray  # outside the excluded days
+    # Boundary state left by the rows before the shard
+    prev_ts: int
+    choice_prev: np.ndarray  # per row: last ts of the same choice before the shard
+    email_prev: np.ndarray  # per row: last ts of the same email before the shard
+    email_seen: np.ndarray  # per row: the email already had an eligible vote
+
+
+def _gaps_with_carry(keys: np.ndarray, ts: np.ndarray, carry: np.ndarray) -> np.ndarray:
+    """Segundos até o voto anterior da mesma chave; ``carry`` cobre o primeiro de cada chave."""
+    n = len(keys)
+    order = np.argsort(keys, kind="stable")
+    sorted_keys = keys[order]
+    sorted_ts = ts[order]
+    prev = np.empty(n, dtype=np.int64)
+    first = np.ones(n, dtype=bool)
+    if n:
+        prev[1:] = sorted_ts[:-1]
+        first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        prev[first] = carry[order][first]
+    valid = (prev != MISSING) & (sorted_keys >= 0)
+    gaps_sorted = np.full(n, np.nan)
+    gaps_sorted[valid] = (sorted_ts[valid] - prev[valid]) / 1e9
+    gaps = np.empty(n)
+    gaps[order] = gaps_sorted
+    return gaps
+
+
+def flag_shard(shard: ShardInput, cfg: AuditConfig) -> dict[str, np.ndarray]:
+    """Colunas de ``flag_suspicious_votes`` (menos domínio e cadência) para uma fatia."""
+    n = len(shard.ts)
+    prev = np.empty(n, dtype=np.int64)
+    if n:
+        prev[0] = shard.prev_ts
+        prev[1:] = shard.ts[:-1]
+    delta = np.full(n, np.nan)
+    has_prev = prev != MISSING
+    delta[has_prev] = (shard.ts[has_prev] - prev[has_prev]) / 1e9
+
+    choice_delta = _gaps_with_carry(shard.choice_codes, shard.ts, shard.choice_prev)
+    email_gap = _gaps_with_carry(shard.email_codes, shard.ts, shard.email_prev)
+
+    start_h, end_h = cfg.night_hours
+    suffix3: re.Pattern[str] = cfg.suspicious_email_suffix3_regex
+
+    # First eligible vote of each email inside the shard, unless one came before it
+    positions = np.flatnonzero(shard.eligible)
+    _, first = np.unique(shard.email_codes[positions], return_index=True)
+    kept = np.zeros(n, dtype=bool)
+    kept[positions[first]] = True
+    kept &= ~shard.email_seen
+
+    return {
+        "delta_prev_seconds": delta,
+        "flag_global_short_delta": np.nan_to_num(delta, nan=np.inf) <= cfg.min_global_delta_seconds,
+        "choice_delta_prev_seconds": choice_delta,
+        "flag_choice_short_delta": np.nan_to_num(choice_delta, nan=np.inf) <= cfg.min_per_choice_delta_seconds,
+        "email_delta_prev_seconds": email_gap,
+        "flag_email_short_gap": np.nan_to_num(email_gap, nan=np.inf) <= cfg.min_email_gap_seconds,
+        "flag_night_vote": (shard.hour >= start_h) & (shard.hour <= end_h),
+        "flag_synthetic_email_suffix3": np.array([bool(suffix3.match(e)) for e in shard.emails], dtype=bool),
+        "first_eligible": kept,
+    }
+
+
+def shard_bounds(n: int, shards: int) -> list[tuple[int, int]]:
+    """Fatias contíguas de tamanho quase igual (sempre ao menos uma, mesmo vazia)."""
+    edges = np.linspace(0, n, max(1, min(shards, n or 1)) + 1).round().astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def _shard_inputs(
+    df: pd.DataFrame, email_codes: np.ndarray, n_emails: int, shards: int
+) -> list[ShardInput]:
+    ts = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+    choice_codes, choices = pd.factorize(df["choice"])
+    emails = df["email"].to_numpy(dtype=object)
+    hour = df["hour"].to_numpy()
+    eligible = ~df["exclude_day"].to_numpy(dtype=bool)
+
+    choice_last = np.full(len(choices) + 1, MISSING, dtype=np.int64)  # last slot: missing choice
+    email_last = np.full(n_emails, MISSING, dtype=np.int64)
+    seen = np.zeros(n_emails, dtype=bool)
+
+    inputs = []
+    for start, stop in shard_bounds(len(df), shards):
+        rows = slice(start, stop)
+        shard_choices, shard_emails = choice_codes[rows], email_codes[rows]
+        inputs.append(
+            ShardInput(
+                ts=ts[rows],
+                choice_codes=shard_choices,
+                email_codes=shard_emails,
+                emails=emails[rows],
+                hour=hour[rows],
+                eligible=eligible[rows],
+                prev_ts=int(ts[start - 1]) if start > 0 else MISSING,
+                choice_prev=choice_last[shard_choices],
+                email_prev=email_last[shard_emails],
+                email_seen=seen[shard_emails],
+            )
+        )
+        # Timestamps are sorted, so the running maximum is the last vote so far
+        np.maximum.at(choice_last, shard_choices, ts[rows])
+        np.maximum.at(email_last, shard_emails, ts[rows])
+        seen[shard_emails[eligible[rows]]] = True
+    return inputs
+
+
+def flag_suspicious_votes_parallel(
+    raw_enriched: pd.DataFrame,
+    cfg: AuditConfig,
+    workers: int | None = None,
+    shards: int | None = None,
+    profiler: StageProfiler | None = None,
+) -> tuple[pd.DataFrame, np.ndarray]:
+    """
+    Mesmo resultado de ``flag_suspicious_votes`` e ``cleaned_mask``, com as
+    fatias de tempo processadas em ``workers`` processos (padrão: núcleos).
+    Devolve a base sinalizada e a máscara da base limpa.
+    """
+    workers = workers or os.cpu_count() or 1
+    shards = shards or workers
+    n = len(raw_enriched)
+    with profile_stage(profiler, "flags.sort", rows_in=n) as stage:
+        if raw_enriched["timestamp"].is_monotonic_increasing:
+            df = raw_enriched.copy(deep=False)
+        else:
+            df = raw_enriched.sort_values("timestamp", kind="mergesort")
+        stage.rows_out = len(df)
+
+    with profile_stage(profiler, "flags.shards", rows_in=n) as stage:
+        email_codes, uniques = pd.factorize(df["email"])
+        inputs = _shard_inputs(df, email_codes, len(uniques), shards)
+        stage.rows_out = len(inputs)
+
+    with profile_stage(profiler, "flags.parallel", rows_in=n) as stage:
+        if workers > 1 and len(inputs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(inputs))) as pool:
+                parts = list(pool.map(flag_shard, inputs, [cfg] * len(inputs)))
+        else:
+            parts = [flag_shard(shard, cfg) for shard in inputs]
+        columns = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+        stage.rows_out = n
+
+    with profile_stage(profiler, "flags.reduce", rows_in=n) as stage:
+        regular = _regular_senders(email_codes, columns["email_delta_prev_seconds"], len(uniques), cfg)
+        typo, disposable = domain_flags(df["email_domain"], cfg)
+        for name in (
+            "delta_prev_seconds",
+            "flag_global_short_delta",
+            "choice_delta_prev_seconds",
+            "flag_choice_short_delta",
+            "email_delta_prev_seconds",
+            "flag_email_short_gap",
+        ):
+            df[name] = columns[name]
+        df["flag_email_regular_cadence"] = regular
+        df["flag_night_vote"] = columns["flag_night_vote"]
+        df["flag_suspicious_domain_typo"] = typo
+        df["flag_disposable_domain"] = disposable
+        df["flag_synthetic_email_suffix3"] = columns["flag_synthetic_email_suffix3"]
+
+        plus = df["suspicious_email_plus_3dig_gmail"].to_numpy(dtype=bool)
+        mask = columns["first_eligible"].astype(bool) & ~plus
+        stage.rows_out = n
+    return df, mask
@@ -1,11 +1,22 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Protocol
 
+import numpy as np
 import pandas as pd
 
-from .cleaning import apply_user_rules
+from .cleaning import FEATURE_COLUMNS, RULE_COLUMNS, add_basic_features, add_rule_flags, cleaned_mask
+from .coburst import CoBurstGraph, build_coburst_graph
 from .config import AuditConfig
+from .email_cohorts import cohort_statistics
+from .email_index import EmailIndex, build_email_index
+from .parallel import flag_suspicious_votes_parallel
+from .profiling import StageProfiler, StageTiming, profile_stage
+from .rules import RuleSet, ruleset_for
+from .scenarios import Scenario, get_scenario, scenario_mask
 from .suspicion import (
     SuspicionSummary,
     detect_hourly_outliers,
@@ -13,33 +24,178 @@ from .suspicion import (
     hourly_counts,
     summarize_suspicion,
 )
+from .timeline import Timeline
 
 
 @dataclass(frozen=True)
 class AuditArtifacts:
-    raw: pd.DataFrame
-    cleaned: pd.DataFrame
-    flagged_raw: pd.DataFrame
+    """
+    Resultado da auditoria sobre uma única tabela ordenada por timestamp.
+
+    ``base`` tem as colunas de entrada, as derivadas e todas as sinalizações;
+    a base limpa e os cenários são máscaras sobre ela e só viram DataFrame
+    quando pedidos (``cleaned``, ``scenario_votes``).
+    """
+
+    base: pd.DataFrame
+    cleaned_mask: np.ndarray
     hourly: pd.DataFrame
     hourly_outliers: pd.DataFrame
     suspicion_summary: SuspicionSummary
+    profile: tuple[StageTiming, ...] = field(default=())
+    email_index: EmailIndex | None = None
+    coburst: CoBurstGraph | None = None
+    email_cohorts: pd.DataFrame | None = None
+    source: pd.DataFrame | None = None
+    raw_columns: tuple[str, ...] = ("timestamp", "email", "choice")
+    rules: RuleSet | None = None
+    _scenario_masks: dict[str, np.ndarray] = field(default_factory=dict, init=False, repr=False, compare=False)
+    _timelines: dict[str, Timeline] = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def flagged_raw(self) -> pd.DataFrame:
+        return self.base
+
+    @cached_property
+    def raw(self) -> pd.DataFrame:
+        """Entrada na ordem original (o próprio DataFrame recebido, quando houver)."""
+        if self.source is not None:
+            return self.source
+        return self.base[list(self.raw_columns)].sort_index()
+
+    @cached_property
+    def cleaned(self) -> pd.DataFrame:
+        columns = [*self.raw_columns, *FEATURE_COLUMNS, *RULE_COLUMNS]
+        return self.base.loc[self.cleaned_mask, columns].reset_index(drop=True)
+
+    @property
+    def n_cleaned(self) -> int:
+        return int(np.count_nonzero(self.cleaned_mask))
+
+    def scenario_mask(self, scenario: Scenario | str) -> np.ndarray:
+        if isinstance(scenario, str):
+            scenario = get_scenario(scenario)
+        if scenario.key not in self._scenario_masks:
+            if self.rules is not None:
+                scenario = self.rules.scenario(scenario)
+            codes = self.email_index.codes if self.email_index is not None else None
+            self._scenario_masks[scenario.key] = scenario_mask(self.base, scenario, codes)
+        return self._scenario_masks[scenario.key]
+
+    def scenario_votes(self, scenario: Scenario | str) -> pd.DataFrame:
+        return self.base[self.scenario_mask(scenario)]
+
+    def timeline(self, scenario: Scenario | str) -> Timeline:
+        """Índice de ranking no tempo do cenário, montado na primeira consulta."""
+        if isinstance(scenario, str):
+            scenario = get_scenario(scenario)
+        if scenario.key not in self._timelines:
+            self._timelines[scenario.key] = Timeline.from_votes(self.scenario_votes(scenario))
+        return self._timelines[scenario.key]
 
 
-def build_audit_artifacts(raw_votes: pd.DataFrame, cfg: AuditConfig) -> AuditArtifacts:
-    cleaned, raw_enriched = apply_user_rules(raw_votes, cfg)
+class AuditBackend(Protocol):
+    name: str
 
-    flagged_raw = flag_suspicious_votes(raw_enriched, cfg)
-    suspicion_summary = summarize_suspicion(flagged_raw)
+    def run(
+        self,
+        source: pd.DataFrame | str | Path,
+        cfg: AuditConfig,
+        profiler: StageProfiler | None = None,
+    ) -> AuditArtifacts: ...
 
-    hourly = hourly_counts(raw_enriched)
-    hourly_outliers = detect_hourly_outliers(hourly)
+
+def build_audit_artifacts(
+    raw_votes: pd.DataFrame | str | Path,
+    cfg: AuditConfig,
+    profiler: StageProfiler | None = None,
+    backend: AuditBackend | None = None,
+    workers: int = 1,
+) -> AuditArtifacts:
+    """
+    Com ``workers > 1`` a sinalização e a deduplicação rodam em fatias de
+    tempo paralelas (``parallel.py``), com o mesmo resultado.
+    """
+    if backend is not None:
+        return backend.run(raw_votes, cfg, profiler=profiler)
+    if not isinstance(raw_votes, pd.DataFrame):
+        raise TypeError("Sem backend, build_audit_artifacts recebe o DataFrame de load_votes_csv.")
+
+    with profile_stage(profiler, "rules.features", rows_in=len(raw_votes)) as stage:
+        enriched = add_basic_features(raw_votes)
+        stage.rows_out = len(enriched)
+    with profile_stage(profiler, "rules.patterns", rows_in=len(enriched)) as stage:
+        add_rule_flags(enriched, cfg)
+        stage.rows_out = len(enriched)
+
+    # The only full copy: the time-sorted base every later stage adds columns to
+    if workers > 1:
+        base, mask = flag_suspicious_votes_parallel(enriched, cfg, workers=workers, profiler=profiler)
+    else:
+        base, mask = flag_suspicious_votes(enriched, cfg, profiler=profiler), None
+    del enriched
+    rules = ruleset_for(cfg)
+    if rules is not None:
+        with profile_stage(profiler, "rules.custom", rows_in=len(base)) as stage:
+            rules.apply(base)
+            stage.rows_out = len(base)
+    with profile_stage(profiler, "email_index", rows_in=len(base)) as stage:
+        email_index = build_email_index(base)
+        stage.rows_out = email_index.n_emails
+    if mask is None:
+        with profile_stage(profiler, "rules.dedupe", rows_in=len(base)) as stage:
+            mask = cleaned_mask(base, email_index.codes)
+            stage.rows_out = int(mask.sum())
+    with profile_stage(profiler, "coburst", rows_in=len(base)) as stage:
+        coburst = build_coburst_graph(base, cfg)
+        stage.rows_out = coburst.n_components
+    with profile_stage(profiler, "email_cohorts", rows_in=len(base)) as stage:
+        email_cohorts = cohort_statistics(base, min_emails=cfg.cohort_min_emails)
+        stage.rows_out = len(email_cohorts)
+    with profile_stage(profiler, "summary", rows_in=len(base)) as stage:
+        suspicion_summary = summarize_suspicion(base, email_index)
+        stage.rows_out = 1
+
+    with profile_stage(profiler, "hourly", rows_in=len(base)) as stage:
+        hourly = hourly_counts(base)
+        stage.rows_out = len(hourly)
+    with profile_stage(profiler, "hourly_outliers", rows_in=len(hourly)) as stage:
+        hourly_outliers = detect_hourly_outliers(hourly)
+        stage.rows_out = len(hourly_outliers)
 
     return AuditArtifacts(
-        raw=raw_votes,
-        cleaned=cleaned,
-        flagged_raw=flagged_raw,
+        base=base,
+        cleaned_mask=mask,
         hourly=hourly,
         hourly_outliers=hourly_outliers,
         suspicion_summary=suspicion_summary,
+        profile=tuple(profiler.timings) if profiler is not None else (),
+        email_index=email_index,
+        coburst=coburst,
+        email_cohorts=email_cohorts,
+        source=raw_votes,
+        raw_columns=tuple(raw_votes.columns),
+        rules=rules,
     )
 
+
+def audit_file(
+    csv_path: str | Path,
+    cfg: AuditConfig,
+    backend: str = "pandas",
+    profiler: StageProfiler | None = None,
+    temp_dir: str | None = None,
+    memory_limit: str | None = None,
+    workers: int = 1,
+) -> AuditArtifacts:
+    """Auditoria de um CSV exportado, com o backend ``"pandas"`` ou ``"duckdb"``."""
+    from .io import load_votes_csv
+
+    if backend == "duckdb":
+        from .sql_backend import DuckDBBackend
+
+        sql = DuckDBBackend(temp_directory=temp_dir, memory_limit=memory_limit)
+        return build_audit_artifacts(csv_path, cfg, profiler=profiler, backend=sql)
+    return build_audit_artifacts(
+        load_votes_csv(csv_path, profiler=profiler), cfg, profiler=profiler, workers=workers
+    )
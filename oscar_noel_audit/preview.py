@@ -0,0 +1,320 @@
+"""Prévia aproximada da auditoria enquanto o pipeline exato roda em segundo plano.
+
+A amostra são blocos de linhas contíguas lidos em posições igualmente
+espaçadas do arquivo. Exportações do Google Forms saem em ordem de envio,
+então os blocos cobrem o período de votação de ponta a ponta (amostra
+estratificada no tempo) e, dentro de cada bloco, os intervalos entre votos
+vizinhos continuam reais. Os totais são expandidos pela fração amostrada e
+os intervalos de confiança usam a variância entre blocos (amostragem por
+conglomerados), que já absorve a correlação entre votos do mesmo bloco.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from io import BytesIO
+import os
+from pathlib import Path
+from statistics import NormalDist
+import threading
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from .config import AuditConfig
+from .io import _normalize_votes
+from .pipeline import AuditArtifacts, build_audit_artifacts
+from .profiling import StageProfiler, profile_stage
+from .scenarios import Scenario
+
+BLOCK_COLUMN = "sample_block"
+
+# Gap to the previous row: exact inside a block once its first row is left out
+WITHIN_BLOCK_FLAGS = frozenset({"flag_global_short_delta"})
+# Gap to the previous vote of the same choice/email, which may fall between blocks
+LOWER_BOUND_FLAGS = frozenset(
+    {"flag_choice_short_delta", "flag_email_short_gap", "flag_email_regular_cadence"}
+)
+
+
+@dataclass(frozen=True)
+class VoteSample:
+    votes: pd.DataFrame  # normalized rows plus ``sample_block``
+    n_blocks: int
+    estimated_rows: int
+
+    @property
+    def fraction(self) -> float:
+        return min(len(self.votes) / self.estimated_rows, 1.0) if self.estimated_rows else 1.0
+
+    @property
+    def exact(self) -> bool:
+        return self.fraction >= 1.0
+
+
+def _read_blocks(fh: Any, size: int, start: int, n_blocks: int, rows_per_block: int) -> list[bytes]:
+    offsets = [start + (size - start) * k // n_blocks for k in range(n_blocks)] + [size]
+    blocks = []
+    for k in range(n_blocks):
+        fh.seek(offsets[k])
+        if offsets[k] > start:
+            fh.readline()  # skip the partial line the offset landed in
+        lines = []
+        # Stop at the next block's offset so blocks never overlap
+        while len(lines) < rows_per_block and fh.tell() < offsets[k + 1]:
+            line = fh.readline()
+            if not line:
+                break
+            if line.strip():
+                lines.append(line)
+        blocks.append(b"".join(lines))
+    return blocks
+
+
+def sample_votes_csv(
+    csv_path: str | Path,
+    n_blocks: int = 1000,
+    rows_per_block: int = 50,
+    profiler: StageProfiler | None = None,
+) -> VoteSample:
+    """
+    Lê ``n_blocks`` blocos de até ``rows_per_block`` linhas, espalhados pelo
+    arquivo. Arquivos pequenos (cabem na amostra) são lidos inteiros.
+    """
+    csv_path = Path(csv_path)
+    size = os.path.getsize(csv_path)
+    with profile_stage(profiler, "preview.sample") as stage:
+        with open(csv_path, "rb") as fh:
+            header = fh.readline()
+            start = fh.tell()
+            if size - start <= 0:
+                blocks: list[bytes] = []
+            else:
+                blocks = _read_blocks(fh, size, start, n_blocks, rows_per_block)
+
+        sizes = [b.count(b"\n") + (1 if b and not b.endswith(b"\n") else 0) for b in blocks]
+        sampled_bytes = sum(map(len, blocks))
+        # Rows in the file, from the average line length of the sample
+        estimated = round((size - start) * sum(sizes) / sampled_bytes) if sampled_bytes else 0
+        df = None
+        if estimated > n_blocks * rows_per_block:
+            df = pd.read_csv(BytesIO(header + b"".join(b if b.endswith(b"\n") else b + b"\n" for b in blocks)))
+        # Small files, or quoted newlines inside a field: read the whole file
+        if df is None or len(df) != sum(sizes):
+            df = pd.read_csv(csv_path)
+            sizes = [len(df)]
+            estimated = len(df)
+        df[BLOCK_COLUMN] = np.repeat(np.arange(len(sizes)), sizes)
+        votes = _normalize_votes(df)
+        stage.rows_out = len(votes)
+
+    return VoteSample(votes=votes, n_blocks=len(sizes), estimated_rows=max(estimated, len(votes)))
+
+
+def _block_totals(
+    blocks: np.ndarray, codes: np.ndarray, n_blocks: int, n_codes: int, weights: np.ndarray | None = None
+) -> np.ndarray:
+    """Contagens (blocos x categorias); códigos negativos são ignorados."""
+    keep = codes >= 0
+    flat = np.bincount(
+        blocks[keep] * n_codes + codes[keep],
+        weights=None if weights is None else weights[keep],
+        minlength=n_blocks * n_codes,
+    )
+    return flat.reshape(n_blocks, n_codes).astype(float)
+
+
+def estimate_totals(y: np.ndarray, fraction: float) -> tuple[np.ndarray, np.ndarray]:
+    """Total expandido e erro-padrão de cada coluna de ``y`` (blocos x categorias)."""
+    n_blocks = y.shape[0]
+    total = y.sum(axis=0) / fraction
+    if n_blocks < 2 or fraction >= 1.0:
+        return total, np.zeros_like(total)
+    var = (1.0 - fraction) * n_blocks * y.var(axis=0, ddof=1) / fraction**2
+    return total, np.sqrt(var)
+
+
+def estimate_ratios(y: np.ndarray, x: np.ndarray, fraction: float) -> tuple[np.ndarray, np.ndarray]:
+    """Razão ``sum(y) / sum(x)`` por coluna e erro-padrão por linearização."""
+    n_blocks = y.shape[0]
+    denom = float(x.sum())
+    if denom == 0:
+        return np.zeros(y.shape[1]), np.zeros(y.shape[1])
+    ratio = y.sum(axis=0) / denom
+    if n_blocks < 2 or fraction >= 1.0:
+        return ratio, np.zeros_like(ratio)
+    resid = y - ratio[None, :] * x[:, None]
+    var = (1.0 - fraction) * n_blocks / (n_blocks - 1) * (resid**2).sum(axis=0) / denom**2
+    return ratio, np.sqrt(var)
+
+
+@dataclass(frozen=True)
+class AuditPreview:
+    """Auditoria da amostra; os métodos devolvem estimativas para o arquivo inteiro."""
+
+    sample: VoteSample
+    artifacts: AuditArtifacts
+    ci: float = 0.95
+
+    @property
+    def z(self) -> float:
+        return NormalDist().inv_cdf(0.5 + self.ci / 2.0)
+
+    def _blocks(self) -> np.ndarray:
+        return self.artifacts.base[BLOCK_COLUMN].to_numpy(dtype=np.int64)
+
+    def _scenario_weights(self, scenario: Scenario | str) -> np.ndarray:
+        """
+        Peso de cada voto mantido pelo cenário. A deduplicação da amostra só vê
+        repetições dentro dela; um e-mail presente em dois ou mais blocos
+        certamente se repete no arquivo todo e entra uma vez só, sem expansão.
+        """
+        blocks = self._blocks()
+        codes = self.artifacts.email_index.codes
+        n_emails = int(codes.max()) + 1 if len(codes) else 0
+        pairs = np.unique(codes.astype(np.int64) * self.sample.n_blocks + blocks)
+        spread = np.bincount(pairs // self.sample.n_blocks, minlength=n_emails) >= 2
+        weights = np.where(spread[codes], self.sample.fraction, 1.0)
+        return np.where(self.artifacts.scenario_mask(scenario), weights, 0.0)
+
+    def total(self, scenario: Scenario | str | None = None) -> tuple[float, float]:
+        """Votos estimados (e erro-padrão) no arquivo ou mantidos por ``scenario``."""
+        blocks = self._blocks()
+        weights = None if scenario is None else self._scenario_weights(scenario)
+        y = _block_totals(blocks, np.zeros(len(blocks), dtype=np.int64), self.sample.n_blocks, 1, weights)
+        total, se = estimate_totals(y, self.sample.fraction)
+        return float(total[0]), float(se[0])
+
+    def ranking(self, scenario: Scenario | str = "A") -> pd.DataFrame:
+        """``choice``, ``votes`` estimados e participação com intervalo de confiança."""
+        codes, choices = pd.factorize(self.artifacts.base["choice"].to_numpy())
+        weights = self._scenario_weights(scenario)
+        y = _block_totals(self._blocks(), codes, self.sample.n_blocks, len(choices), weights)
+        x = y.sum(axis=1)
+        share, se = estimate_ratios(y, x, self.sample.fraction)
+        votes, _ = estimate_totals(y, self.sample.fraction)
+        table = pd.DataFrame(
+            {
+                "choice": np.asarray(choices, dtype=object),
+                "votes": np.rint(votes).astype(np.int64),
+                "share": share,
+                "share_lo": np.clip(share - self.z * se, 0.0, 1.0),
+                "share_hi": np.clip(share + self.z * se, 0.0, 1.0),
+            }
+        )
+        table = table[table["votes"] > 0]
+        return table.sort_values("share", ascending=False, kind="mergesort").reset_index(drop=True)
+
+    def flag_rates(self) -> pd.DataFrame:
+        """
+        Proporção de votos com cada flag, com intervalo de confiança.
+        ``lower_bound`` marca flags cujo voto anterior (do mesmo candidato ou
+        e-mail) pode estar fora da amostra, logo subestimadas na prévia.
+        """
+        base = self.artifacts.base
+        blocks = self._blocks()
+        n_blocks = self.sample.n_blocks
+        # The first row of each block has its true predecessor outside the sample
+        has_prev = np.ones(len(blocks), dtype=bool)
+        has_prev[0:1] = False
+        has_prev[1:] = blocks[1:] == blocks[:-1]
+
+        rows = []
+        for flag in (c for c in base.columns if c.startswith("flag_")):
+            keep = has_prev if flag in WITHIN_BLOCK_FLAGS else np.ones(len(blocks), dtype=bool)
+            y = np.bincount(blocks[keep], weights=base[flag].to_numpy(dtype=float)[keep], minlength=n_blocks)
+            x = np.bincount(blocks[keep], minlength=n_blocks).astype(float)
+            rate, se = estimate_ratios(y[:, None], x, self.sample.fraction)
+            rows.append((flag, float(rate[0]), float(se[0])))
+
+        table = pd.DataFrame(rows, columns=["flag", "rate", "se"])
+        total, _ = self.total()
+        table.insert(1, "votes", np.rint(table["rate"] * total).astype(np.int64))
+        table["rate_lo"] = np.clip(table["rate"] - self.z * table["se"], 0.0, 1.0)
+        table["rate_hi"] = np.clip(table["rate"] + self.z * table["se"], 0.0, 1.0)
+        table["lower_bound"] = table["flag"].isin(LOWER_BOUND_FLAGS)
+        return table.drop(columns="se")
+
+    def hourly(self) -> pd.DataFrame:
+        """
+        Votos estimados por hora. Horas sem nenhum bloco amostrado ficam de
+        fora: tiveram menos votos que o espaçamento entre blocos.
+        """
+        buckets = self.artifacts.base["timestamp"].dt.floor("h")
+        codes, hours = pd.factorize(buckets, sort=True)
+        y = _block_totals(self._blocks(), codes, self.sample.n_blocks, len(hours))
+        votes, se = estimate_totals(y, self.sample.fraction)
+        return pd.DataFrame(
+            {
+                "hour_bucket": hours,
+                "votes": votes,
+                "votes_lo": np.maximum(votes - self.z * se, 0.0),
+                "votes_hi": votes + self.z * se,
+            }
+        )
+
+
+def preview_audit(
+    sample: VoteSample, cfg: AuditConfig, ci: float = 0.95, profiler: StageProfiler | None = None
+) -> AuditPreview:
+    """
+    Roda o pipeline sobre a amostra. Intervalos e flags dentro de cada bloco
+    são exatos; a deduplicação só enxerga e-mails repetidos dentro da amostra.
+    """
+    with profile_stage(profiler, "preview.audit", rows_in=len(sample.votes)) as stage:
+        artifacts = build_audit_artifacts(sample.votes, cfg)
+        stage.rows_out = len(artifacts.base)
+    return AuditPreview(sample=sample, artifacts=artifacts, ci=ci)
+
+
+class BackgroundAudits:
+    """
+    Execuções em segundo plano por chave (ex.: arquivo + configuração).
+
+    Quando uma sessão (ex.: aba do painel) pede uma chave nova, os pedidos
+    dela que ainda estavam na fila são cancelados; os que outra sessão também
+    pediu continuam. As que já começaram terminam e ficam guardadas (LRU de
+    ``max_entries``). Falhas não ficam guardadas, para que a próxima chamada
+    tente de novo.
+    """
+
+    def __init__(self, max_workers: int = 2, max_entries: int = 4) -> None:
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="audit")
+        self._futures: OrderedDict[str, Future] = OrderedDict()
+        self._sessions: dict[str, set[str | None]] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key: str, fn: Callable[..., Any], *args: Any, session: str | None = None) -> Future:
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not future.cancelled() and (
+                not future.done() or future.exception() is None
+            ):
+                self._futures.move_to_end(key)
+                self._sessions[key].add(session)
+                return future
+            for other, waiting in self._sessions.items():
+                if waiting == {session}:
+                    self._futures[other].cancel()  # only affects jobs that have not started
+            for cancelled in [k for k, f in self._futures.items() if f.cancelled()]:
+                self._forget(cancelled)
+            future = self._executor.submit(fn, *args)
+            self._futures[key] = future
+            self._sessions[key] = {session}
+            while len(self._futures) > self.max_entries:
+                self._forget(next(iter(self._futures)))
+            return future
+
+    def _forget(self, key: str) -> None:
+        self._futures.pop(key, None)
+        self._sessions.pop(key, None)
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self._forget(key)
+
+    def __len__(self) -> int:
+        return len(self._futures)
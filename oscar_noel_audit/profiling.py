@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+import logging
+import time
+import tracemalloc
+from typing import Callable, Iterator
+
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class StageTiming:
+    stage: str
+    seconds: float
+    rows_in: int | None
+    rows_out: int | None
+    peak_bytes: int | None
+
+
+@dataclass
+class StageRecord:
+    stage: str
+    rows_in: int | None = None
+    rows_out: int | None = None
+
+
+StageHook = Callable[[StageTiming], None]
+
+
+@dataclass
+class _OpenStage:
+    record: StageRecord
+    start: float
+    start_bytes: int
+    peak_seen: int
+
+
+class StageProfiler:
+    """
+    Registra tempo, linhas de entrada/saída e pico de memória por etapa.
+
+    O pico usa ``tracemalloc`` (só com ``track_memory=True``, pois tem custo) e
+    é relativo à memória alocada no início da etapa. Cada etapa concluída é
+    repassada a ``hook`` (ex.: ``logging_hook()`` ou um callback de métricas).
+    """
+
+    def __init__(self, track_memory: bool = False, hook: StageHook | None = None) -> None:
+        self.track_memory = track_memory
+        self.hook = hook
+        self.timings: list[StageTiming] = []
+        self._open: list[_OpenStage] = []
+        self._owns_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None) -> Iterator[StageRecord]:
+        record = StageRecord(stage=name, rows_in=rows_in)
+        current = 0
+        if self.track_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracing = True
+            current, peak = tracemalloc.get_traced_memory()
+            # Keep the enclosing stages' peaks before resetting for this one
+            for parent in self._open:
+                parent.peak_seen = max(parent.peak_seen, peak)
+            tracemalloc.reset_peak()
+
+        opened = _OpenStage(record=record, start=time.perf_counter(), start_bytes=current, peak_seen=current)
+        self._open.append(opened)
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - opened.start
+            self._open.pop()
+            peak_bytes = None
+            if self.track_memory:
+                opened.peak_seen = max(opened.peak_seen, tracemalloc.get_traced_memory()[1])
+                peak_bytes = max(opened.peak_seen - opened.start_bytes, 0)
+                if self._open:
+                    self._open[-1].peak_seen = max(self._open[-1].peak_seen, opened.peak_seen)
+                elif self._owns_tracing:
+                    tracemalloc.stop()
+                    self._owns_tracing = False
+
+            timing = StageTiming(
+                stage=name,
+                seconds=seconds,
+                rows_in=record.rows_in,
+                rows_out=record.rows_out,
+                peak_bytes=peak_bytes,
+            )
+            self.timings.append(timing)
+            if self.hook is not None:
+                self.hook(timing)
+
+    def to_frame(self) -> pd.DataFrame:
+        return timings_frame(self.timings)
+
+
+def timings_frame(timings: tuple[StageTiming, ...] | list[StageTiming]) -> pd.DataFrame:
+    columns = ["stage", "seconds", "rows_in", "rows_out", "peak_bytes"]
+    return pd.DataFrame([asdict(t) for t in timings], columns=columns)
+
+
+@contextmanager
+def profile_stage(
+    profiler: StageProfiler | None, name: str, rows_in: int | None = None
+) -> Iterator[StageRecord]:
+    if profiler is None:
+        yield StageRecord(stage=name, rows_in=rows_in)
+        return
+    with profiler.stage(name, rows_in=rows_in) as record:
+        yield record
+
+
+def logging_hook(logger: logging.Logger | None = None, level: int = logging.INFO) -> StageHook:
+    log = logger or logging.getLogger("oscar_noel_audit.profiling")
+
+    def _hook(timing: StageTiming) -> None:
+        peak = f"{timing.peak_bytes / 2**20:.1f} MiB" if timing.peak_bytes is not None else "-"
+        log.log(
+            level,
+            "etapa=%s tempo=%.4fs linhas_in=%s linhas_out=%s pico=%s",
+            timing.stage,
+            timing.seconds,
+            timing.rows_in,
+            timing.rows_out,
+            peak,
+        )
+
+    return _hook
@@ -0,0 +1,246 @@
+"""Relatório da auditoria (``summary.json``/``rankings.json``) e tabelas de saída.
+
+Usado pela CLI, pelo lote, pelo servidor de consultas e pelo armazenamento de
+auditorias; pandas só é importado dentro das funções.
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Any
+
+from .config import AuditConfig
+
+
+def write_table(df: Any, path: Path, fmt: str) -> Path:
+    if fmt == "parquet":
+        out = path.with_suffix(".parquet")
+        try:
+            df.to_parquet(out, index=False)
+        except ImportError as exc:
+            raise SystemExit(f"Parquet precisa de 'pyarrow' instalado: {exc}") from exc
+    elif fmt == "csv":
+        out = path.with_suffix(".csv")
+        df.to_csv(out, index=False)
+    else:
+        out = path.with_suffix(".json")
+        df.to_json(out, orient="records", date_format="iso", force_ascii=False, indent=2)
+    return out
+
+
+def _rankings_report(counts_by_scenario: dict[str, Any], top_n: int) -> dict[str, Any]:
+    from .scenarios import SCENARIOS
+
+    rankings = {}
+    for key, scenario in SCENARIOS.items():
+        counts = counts_by_scenario[key]
+        total = int(counts.sum())
+        rankings[key] = {
+            "label": scenario.label,
+            "description": scenario.description,
+            "total": total,
+            "top": [
+                {"name": str(name), "votes": int(v), "share": float(v / total) if total else 0.0}
+                for name, v in counts.head(top_n).items()
+            ],
+        }
+    return rankings
+
+
+def _rules_report(rules: Any, votes: dict[str, int]) -> dict[str, Any] | None:
+    if rules is None:
+        return None
+    return {
+        rule.name: {"description": rule.description, "scenarios": list(rule.scenarios), "votes": votes[rule.column]}
+        for rule in rules.rules
+    }
+
+
+def audit_report(artifacts: Any, cfg: AuditConfig, top_n: int = 12) -> dict[str, Any]:
+    from dataclasses import asdict
+
+    from .resampling import ranking_counts
+    from .scenarios import SCENARIOS
+
+    rankings = _rankings_report(
+        {key: ranking_counts(artifacts.scenario_votes(scenario)) for key, scenario in SCENARIOS.items()}, top_n
+    )
+    flagged = artifacts.flagged_raw
+    coburst = None
+    if artifacts.coburst is not None:
+        coburst = {
+            "components": artifacts.coburst.n_components,
+            "votes": artifacts.coburst.votes,
+            "top": json.loads(artifacts.coburst.components.head(top_n).to_json(orient="records", date_format="iso")),
+        }
+    rule_votes = {c: int(flagged[c].sum()) for c in artifacts.rules.columns} if artifacts.rules else {}
+    cohorts = None
+    if artifacts.email_cohorts is not None:
+        uniform = artifacts.email_cohorts[artifacts.email_cohorts["uniform_like"]]
+        cohorts = {
+            "cohorts": int(len(artifacts.email_cohorts)),
+            "uniform_like": int(len(uniform)),
+            "uniform_like_votes": int(uniform["votes"].sum()),
+            "top": json.loads(artifacts.email_cohorts.head(top_n).to_json(orient="records", date_format="iso")),
+        }
+    return {
+        "config": cfg.to_dict(),
+        "counts": {
+            "raw": int(len(artifacts.raw)),
+            "after_excluded_days": int((~flagged["exclude_day"]).sum()),
+            "cleaned": artifacts.n_cleaned,
+        },
+        "suspicion_summary": asdict(artifacts.suspicion_summary),
+        "hourly_outliers": int(artifacts.hourly_outliers["is_outlier"].sum()),
+        "coburst": coburst,
+        "email_cohorts": cohorts,
+        "rules": _rules_report(artifacts.rules, rule_votes),
+        "rankings": rankings,
+        "profile": [asdict(t) for t in artifacts.profile],
+    }
+
+
+def sql_audit_report(audit: Any, cfg: AuditConfig, top_n: int = 12) -> dict[str, Any]:
+    """O relatório de ``audit_report`` a partir de um ``SQLAudit`` (sem lotes e coortes, que leem todas as linhas)."""
+    from dataclasses import asdict
+
+    return {
+        "config": cfg.to_dict(),
+        "counts": {
+            "raw": audit.n_rows,
+            "after_excluded_days": audit.n_after_excluded_days,
+            "cleaned": audit.n_cleaned,
+        },
+        "suspicion_summary": asdict(audit.suspicion_summary),
+        "hourly_outliers": int(audit.hourly_outliers["is_outlier"].sum()),
+        "coburst": None,
+        "email_cohorts": None,
+        "rules": _rules_report(audit.rules, audit.rule_votes),
+        "rankings": _rankings_report(audit.scenario_counts, top_n),
+        "profile": [asdict(t) for t in audit.profile],
+    }
+
+
+def _sketches_report(sketches: Any, include_emails: bool, top_n: int) -> dict[str, Any]:
+    """``VoteSketches.to_dict``, com os e-mails mais repetidos em hash, a menos que ``include_emails``."""
+    import pandas as pd
+
+    from .io import hash_emails
+
+    report = sketches.to_dict(top=top_n)
+    if not include_emails:
+        hashed = hash_emails(pd.Series([row["item"] for row in report["top_emails"]], dtype=object))
+        for row, email_hash in zip(report["top_emails"], hashed):
+            row["item"] = email_hash
+    return report
+
+
+def _flags_table(flagged: Any, include_emails: bool) -> Any:
+    from .io import hash_emails
+
+    cols = ["timestamp", "email", "choice", "exclude_day", "suspicious_email_plus_3dig_gmail"]
+    cols += [c for c in flagged.columns if c.startswith("flag_") or c.endswith("delta_prev_seconds")]
+    table = flagged[cols].reset_index(drop=True)
+    table["choice"] = table["choice"].astype(str)
+    if not include_emails:
+        table.insert(1, "email_hash", hash_emails(table.pop("email")))
+    return table
+
+
+def write_audit_outputs(
+    artifacts: Any,
+    cfg: AuditConfig,
+    out_dir: Path,
+    fmt: str = "json",
+    include_emails: bool = False,
+    top_n: int = 12,
+    extra: dict[str, Any] | None = None,
+    sketches: bool = False,
+) -> tuple[dict[str, Any], Path]:
+    """Grava ``summary.json``, ``rankings.json`` e a tabela de flags (``sketches``: resumos da base bruta)."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report = audit_report(artifacts, cfg, top_n=top_n)
+    if sketches:
+        from .sketches import VoteSketches
+
+        report["sketches"] = _sketches_report(VoteSketches().update(artifacts.raw), include_emails, top_n)
+    report.update(extra or {})
+    _write_report(report, out_dir)
+    flags_path = write_table(_flags_table(artifacts.flagged_raw, include_emails), out_dir / "flags", fmt)
+    return report, flags_path
+
+
+def _write_report(report: dict[str, Any], out_dir: Path) -> None:
+    (out_dir / "summary.json").write_text(
+        json.dumps({k: v for k, v in report.items() if k != "rankings"}, ensure_ascii=False, indent=2),
+        encoding="utf-8",
+    )
+    (out_dir / "rankings.json").write_text(
+        json.dumps(report["rankings"], ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+
+# Rows per page when the flags table is streamed from the SQL backend
+FLAG_PAGE_ROWS = 50_000
+
+
+def _write_table_pages(pages: Any, path: Path, fmt: str) -> Path:
+    """``write_table`` página a página: só uma página fica em memória."""
+    out = path.with_suffix("." + fmt)
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise SystemExit(f"Parquet precisa de 'pyarrow' instalado: {exc}") from exc
+        writer = None
+        try:
+            for page in pages:
+                table = pa.Table.from_pandas(page, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(out, table.schema)
+                writer.write_table(table.cast(writer.schema))
+        finally:
+            if writer is not None:
+                writer.close()
+        return out
+    with out.open("w", encoding="utf-8", newline="") as f:
+        first = True
+        if fmt == "json":
+            f.write("[")
+        for page in pages:
+            if fmt == "csv":
+                page.to_csv(f, index=False, header=first)
+            elif len(page):
+                records = page.to_json(orient="records", date_format="iso", force_ascii=False, lines=True)
+                f.write(("" if first else ",\n") + records.rstrip("\n").replace("\n", ",\n"))
+            first = False
+        if fmt == "json":
+            f.write("]")
+    return out
+
+
+def write_sql_audit_outputs(
+    audit: Any,
+    cfg: AuditConfig,
+    out_dir: Path,
+    fmt: str = "json",
+    include_emails: bool = False,
+    top_n: int = 12,
+    extra: dict[str, Any] | None = None,
+    sketches: bool = False,
+) -> tuple[dict[str, Any], Path]:
+    """Como ``write_audit_outputs``, com a tabela de flags (e os resumos) lida e gravada por páginas."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    report = sql_audit_report(audit, cfg, top_n=top_n)
+    if sketches:
+        from .sketches import VoteSketches
+
+        summary = VoteSketches()
+        for page in audit.pages(columns=["timestamp", "email", "choice"], page_rows=FLAG_PAGE_ROWS):
+            summary.update(page)
+        report["sketches"] = _sketches_report(summary, include_emails, top_n)
+    report.update(extra or {})
+    _write_report(report, out_dir)
+    pages = (_flags_table(page, include_emails) for page in audit.pages(page_rows=FLAG_PAGE_ROWS))
+    return report, _write_table_pages(pages, out_dir / "flags", fmt)
@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from .scenarios import SCENARIOS, Scenario
+
+
+@dataclass(frozen=True)
+class RankingStability:
+    scenario: str
+    method: str
+    n_replicates: int
+    ci: float
+    table: pd.DataFrame
+    winner_margin_ci: tuple[float, float]
+
+
+def ranking_counts(votes: pd.DataFrame) -> pd.Series:
+    counts = votes["choice"].value_counts()
+    counts = counts[counts > 0]
+    # Ties ranked by name, as the SQL backend does, instead of by category order
+    return counts.iloc[np.lexsort((counts.index.astype(str), -counts.to_numpy()))]
+
+
+def _summarize_replicates(
+    samples: np.ndarray,
+    point_counts: np.ndarray,
+    labels: Iterable[str],
+    ci: float,
+    top_k: int,
+) -> tuple[pd.DataFrame, tuple[float, float]]:
+    n_reps, n_choices = samples.shape
+    totals = samples.sum(axis=1, keepdims=True).astype(float)
+    totals[totals == 0] = 1.0
+    shares = samples / totals
+
+    # Ties keep the point-estimate order (columns are sorted by observed votes)
+    order = np.argsort(-samples, axis=1, kind="stable")
+    ranks = np.empty_like(order)
+    np.put_along_axis(ranks, order, np.arange(n_choices)[None, :], axis=1)
+
+    alpha = (1.0 - ci) / 2.0
+    lo, hi = np.quantile(shares, [alpha, 1.0 - alpha], axis=0)
+    point_total = max(int(point_counts.sum()), 1)
+
+    table = pd.DataFrame(
+        {
+            "choice": list(labels),
+            "votes": point_counts.astype(int),
+            "share": point_counts / point_total,
+            "share_lo": lo,
+            "share_hi": hi,
+            "p_first": (ranks == 0).mean(axis=0),
+            f"p_top{top_k}": (ranks < top_k).mean(axis=0),
+            "mean_rank": ranks.mean(axis=0) + 1.0,
+        }
+    )
+
+    if n_choices >= 2:
+        top2 = -np.sort(-shares, axis=1)[:, :2]
+        margins = top2[:, 0] - top2[:, 1]
+        margin_ci = tuple(float(x) for x in np.quantile(margins, [alpha, 1.0 - alpha]))
+    else:
+        margin_ci = (1.0, 1.0)
+    return table, margin_ci
+
+
+def bootstrap_counts(
+    counts: pd.Series,
+    n_replicates: int = 2000,
+    ci: float = 0.95,
+    seed: int | None = None,
+    top_k: int = 3,
+    scenario: str = "",
+) -> RankingStability:
+    """Bootstrap paramétrico: reamostra a contagem por candidato com uma multinomial."""
+    counts = counts.sort_values(ascending=False, kind="mergesort")
+    point = counts.to_numpy(dtype=np.int64)
+    total = int(point.sum())
+    rng = np.random.default_rng(seed)
+
+    if total == 0:
+        samples = np.zeros((n_replicates, len(point)), dtype=np.int64)
+    else:
+        samples = rng.multinomial(total, point / total, size=n_replicates)
+
+    table, margin_ci = _summarize_replicates(samples, point, counts.index.astype(str), ci, top_k)
+    return RankingStability(
+        scenario=scenario,
+        method="multinomial",
+        n_replicates=n_replicates,
+        ci=ci,
+        table=table,
+        winner_margin_ci=margin_ci,
+    )
+
+
+def _dedupe_counts(
+    positions: np.ndarray,
+    email_codes: np.ndarray,
+    choice_codes: np.ndarray,
+    dropped: np.ndarray,
+    dedupe_before_filter: bool,
+    n_emails: int,
+    n_choices: int,
+    weights: np.ndarray | None = None,
+) -> np.ndarray:
+    # Keep-first dedupe: rows are in time order, so the smallest position wins
+    n = len(email_codes)
+    first = np.full(n_emails, n, dtype=np.int64)
+    np.minimum.at(first, email_codes[positions], positions)
+    first = first[first < n]
+    if dedupe_before_filter:
+        first = first[~dropped[first]]
+    if weights is None:
+        return np.bincount(choice_codes[first], minlength=n_choices)
+    return np.bincount(choice_codes[first], weights=weights[first], minlength=n_choices).astype(np.int64)
+
+
+def _replicate_scenario_counts(
+    email_codes: np.ndarray,
+    choice_codes: np.ndarray,
+    eligible: np.ndarray,
+    dropped: np.ndarray,
+    dedupe_before_filter: bool,
+    n_emails: int,
+    n_choices: int,
+    n_replicates: int,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    n = len(email_codes)
+    out = np.zeros((n_replicates, n_choices), dtype=np.int64)
+    for r in range(n_replicates):
+        # Draws with replacement: a vote drawn k times counts k times once it survives the rules
+        draws = np.bincount(rng.integers(0, n, size=n), minlength=n)
+        positions = np.flatnonzero((draws > 0) & eligible)
+        out[r] = _dedupe_counts(
+            positions, email_codes, choice_codes, dropped, dedupe_before_filter, n_emails, n_choices, draws
+        )
+    return out
+
+
+def bootstrap_scenarios(
+    flagged: pd.DataFrame,
+    scenarios: Iterable[Scenario] | None = None,
+    n_replicates: int = 1000,
+    ci: float = 0.95,
+    seed: int | None = None,
+    top_k: int = 3,
+    workers: int = 1,
+) -> dict[str, RankingStability]:
+    """
+    Bootstrap não paramétrico por voto: reamostra as linhas da base bruta
+    sinalizada (ordenada por timestamp) e reaplica as regras de cada cenário
+    (exclusão de dias, dedupe keep-first e filtros) em cada réplica.
+    Com ``workers > 1`` as réplicas são divididas entre processos.
+    """
+    scenarios = list(SCENARIOS.values()) if scenarios is None else list(scenarios)
+    email_codes, email_uniques = pd.factorize(flagged["email"])
+    choice_codes, choice_uniques = pd.factorize(flagged["choice"])
+    labels = np.asarray(choice_uniques).astype(str)
+    excluded = flagged["exclude_day"].to_numpy(dtype=bool)
+
+    root = np.random.SeedSequence(seed)
+    n_chunks = max(1, workers)
+    chunk_sizes = [len(c) for c in np.array_split(np.arange(n_replicates), n_chunks) if len(c)]
+
+    results: dict[str, RankingStability] = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        for scenario in scenarios:
+            dropped = np.zeros(len(flagged), dtype=bool)
+            for col in scenario.exclude_flags:
+                dropped |= flagged[col].to_numpy(dtype=bool)
+
+            eligible = ~excluded if scenario.dedupe_before_filter else ~excluded & ~dropped
+            args = (
+                email_codes,
+                choice_codes,
+                eligible,
+                dropped,
+                scenario.dedupe_before_filter,
+                len(email_uniques),
+                len(choice_uniques),
+            )
+            seeds = root.spawn(len(chunk_sizes))
+            if executor is None:
+                parts = [_replicate_scenario_counts(*args, size, s) for size, s in zip(chunk_sizes, seeds)]
+            else:
+                futures = [
+                    executor.submit(_replicate_scenario_counts, *args, size, s)
+                    for size, s in zip(chunk_sizes, seeds)
+                ]
+                parts = [f.result() for f in futures]
+            samples = np.vstack(parts)
+
+            point = _dedupe_counts(
+                np.flatnonzero(eligible),
+                email_codes,
+                choice_codes,
+                dropped,
+                scenario.dedupe_before_filter,
+                len(email_uniques),
+                len(choice_uniques),
+            )
+            order = np.argsort(-point, kind="stable")
+            table, margin_ci = _summarize_replicates(
+                samples[:, order], point[order], labels[order], ci, top_k
+            )
+            table = table[table["votes"] > 0].reset_index(drop=True)
+            results[scenario.key] = RankingStability(
+                scenario=scenario.key,
+                method="bootstrap_votos",
+                n_replicates=int(samples.shape[0]),
+                ci=ci,
+                table=table,
+                winner_margin_ci=margin_ci,
+            )
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    return results
@@ -0,0 +1,490 @@
+"""Regras de sinalização declaradas em arquivo (TOML ou JSON), sem mexer no código.
+
+Cada regra vira uma coluna booleana ``flag_rule_<nome>`` da base e pode
+remover votos de cenários (``scenarios = ["B", "C"]``)::
+
+    [[rule]]
+    name = "rajada_madrugada"
+    description = "3+ votos do mesmo e-mail em 10 min, de madrugada"
+    scenarios = ["C"]
+    when = { all = [
+        { flag = "flag_night_vote" },
+        { window = "10min", by = "email", min_votes = 3 },
+    ] }
+
+    [[rule]]
+    name = "dominio_exotico"
+    when = { field = "email_domain", regex = ['\\.xyz$', '\\.top$'] }
+
+Expressões:
+
+- ``{ field = "hour", between = [0, 5] }``: comparações ``eq``, ``ne``,
+  ``lt``, ``le``, ``gt``, ``ge``, ``in``, ``not_in`` e ``between`` (várias na
+  mesma expressão valem juntas); o valor é convertido para o tipo da coluna
+  (``"2025-12-18"`` num campo ``date`` vira ``date``) e tipos incompatíveis
+  são recusados com ``RuleError``;
+- ``{ field = "email", regex = [...] }``: conjunto de expressões regulares,
+  unidas numa alternância e testadas só nos valores distintos do campo;
+- ``{ flag = "flag_x" }``: uma coluna booleana da base;
+- ``{ window = "10min", by = "email", min_votes = 3 }``: votos que fazem parte
+  de alguma sequência de ``min_votes`` votos da mesma chave (sem ``by``: de
+  todos) em até ``window``;
+- ``{ rule = "nome" }``: o resultado de uma regra anterior;
+- ``all``, ``any`` e ``not`` combinam expressões.
+
+As regras são compiladas num plano único: cada subexpressão é canônica (e/ou
+ordenados e achatados, dupla negação removida), então uma subexpressão que
+aparece em várias regras é calculada uma vez. O plano roda uma vez por base,
+com uma operação vetorizada por nó; os cenários só leem as colunas prontas.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+from datetime import date, datetime, time
+from functools import lru_cache
+import json
+import operator
+import os
+from pathlib import Path
+import re
+from typing import Any, Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from .config import AuditConfig
+from .scenarios import Scenario
+
+RULE_PREFIX = "flag_rule_"
+COMPARISONS = ("eq", "ne", "lt", "le", "gt", "ge", "in", "not_in", "between")
+
+# Plan nodes are hashable tuples; combinators hold plan indices of their children
+Node = tuple
+
+
+class RuleError(ValueError):
+    """Regra malformada ou que usa colunas ausentes da base."""
+
+
+def _plain(value: Any) -> Any:
+    """Valores JSON (datas do TOML viram texto ISO) e listas como tuplas."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, Mapping):
+        return {str(k): _plain(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(v) for v in value]
+    return value
+
+
+def _frozen(value: Any) -> Any:
+    return tuple(_frozen(v) for v in value) if isinstance(value, list) else value
+
+
+@dataclass(frozen=True)
+class Rule:
+    name: str
+    root: int  # plan index of the rule's expression
+    description: str = ""
+    scenarios: tuple[str, ...] = ()
+
+    @property
+    def column(self) -> str:
+        return RULE_PREFIX + self.name
+
+
+class _Compiler:
+    def __init__(self) -> None:
+        self.plan: list[Node] = []
+        self.index: dict[Node, int] = {}
+        self.rules: dict[str, int] = {}
+
+    def add(self, node: Node) -> int:
+        if node not in self.index:
+            self.index[node] = len(self.plan)
+            self.plan.append(node)
+        return self.index[node]
+
+    def combine(self, op: str, children: Iterable[int]) -> int:
+        flat: set[int] = set()
+        for child in children:
+            node = self.plan[child]
+            if node[0] == op:
+                flat.update(node[1])
+            else:
+                flat.add(child)
+        if len(flat) == 1:
+            return flat.pop()
+        return self.add((op, tuple(sorted(flat))))
+
+    def negate(self, child: int) -> int:
+        node = self.plan[child]
+        return node[1] if node[0] == "not" else self.add(("not", child))
+
+    def expression(self, expr: Any) -> int:
+        if not isinstance(expr, Mapping) or not expr:
+            raise RuleError(f"Expressão de regra inválida: {expr!r}")
+        keys = set(expr)
+        for op in ("all", "any"):
+            if op in keys:
+                children = expr[op]
+                if keys != {op} or not isinstance(children, list) or not children:
+                    raise RuleError(f"{op!r} recebe só uma lista não vazia de expressões: {expr!r}")
+                return self.combine(op, [self.expression(c) for c in children])
+        if "not" in keys:
+            if keys != {"not"}:
+                raise RuleError(f"'not' recebe uma única expressão: {expr!r}")
+            return self.negate(self.expression(expr["not"]))
+        if "flag" in keys:
+            if keys != {"flag"}:
+                raise RuleError(f"'flag' não aceita outras chaves: {expr!r}")
+            return self.add(("flag", str(expr["flag"])))
+        if "rule" in keys:
+            if keys != {"rule"} or not isinstance(expr["rule"], str) or expr["rule"] not in self.rules:
+                raise RuleError(f"'rule' precisa citar uma regra definida antes: {expr!r}")
+            return self.rules[expr["rule"]]
+        if "window" in keys:
+            return self.window(expr)
+        if "field" in keys:
+            return self.field(expr)
+        raise RuleError(f"Expressão sem operador reconhecido: {expr!r}")
+
+    def window(self, expr: Mapping[str, Any]) -> int:
+        unknown = set(expr) - {"window", "by", "min_votes"}
+        if unknown:
+            raise RuleError(f"Chaves desconhecidas em 'window': {sorted(unknown)}")
+        within = expr["window"]
+        try:
+            span = pd.Timedelta(seconds=within) if isinstance(within, (int, float)) else pd.Timedelta(within)
+        except ValueError as exc:
+            raise RuleError(f"Janela inválida: {within!r}") from exc
+        min_votes = int(expr.get("min_votes", 2))
+        if min_votes < 2:
+            raise RuleError("'min_votes' de uma janela precisa ser ao menos 2")
+        by = expr.get("by")
+        return self.add(("window", None if by is None else str(by), int(span.value), min_votes))
+
+    def field(self, expr: Mapping[str, Any]) -> int:
+        name = str(expr["field"])
+        ops = {k: v for k, v in expr.items() if k != "field"}
+        unknown = set(ops) - set(COMPARISONS) - {"regex"}
+        if unknown or not ops:
+            raise RuleError(f"'field' precisa de um operador entre {[*COMPARISONS, 'regex']}: {expr!r}")
+        leaves = []
+        for op, value in ops.items():
+            if op == "regex":
+                patterns = [value] if isinstance(value, str) else list(value)
+                for pattern in patterns:
+                    try:
+                        re.compile(pattern)
+                    except re.error as exc:
+                        raise RuleError(f"Regex inválida em {name!r}: {pattern!r} ({exc})") from exc
+                joined = "|".join(f"(?:{p})" for p in sorted(set(patterns)))
+                leaves.append(self.add(("regex", name, joined)))
+                continue
+            if op in ("in", "not_in"):
+                if not isinstance(value, list):
+                    raise RuleError(f"{op!r} recebe uma lista: {expr!r}")
+                value = tuple(sorted(set(_frozen(value)), key=repr))
+            elif op == "between":
+                if not isinstance(value, list) or len(value) != 2:
+                    raise RuleError(f"'between' recebe [mínimo, máximo]: {expr!r}")
+                value = tuple(value)
+            leaves.append(self.add(("cmp", name, op, _frozen(value))))
+        return self.combine("all", leaves)
+
+
+def _children(node: Node) -> tuple[int, ...]:
+    if node[0] in ("all", "any"):
+        return node[1]
+    return (node[1],) if node[0] == "not" else ()
+
+
+def _prune(plan: list[Node], roots: list[int]) -> tuple[tuple[Node, ...], list[int]]:
+    """Só os nós alcançáveis a partir das regras, renumerados (filhos antes dos pais)."""
+    used: set[int] = set()
+    stack = list(roots)
+    while stack:
+        i = stack.pop()
+        if i not in used:
+            used.add(i)
+            stack.extend(_children(plan[i]))
+    remap = {old: new for new, old in enumerate(sorted(used))}
+    pruned = []
+    for old in sorted(used):
+        node = plan[old]
+        if node[0] in ("all", "any"):
+            node = (node[0], tuple(remap[c] for c in node[1]))
+        elif node[0] == "not":
+            node = ("not", remap[node[1]])
+        pruned.append(node)
+    return tuple(pruned), [remap[r] for r in roots]
+
+
+class _Columns:
+    """Colunas da base lidas, convertidas e fatoradas uma vez por avaliação."""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        self.df = df
+        self._factorized: dict[str, tuple[np.ndarray, pd.Series]] = {}
+        self._ts: np.ndarray | None = None
+
+    def series(self, name: str) -> pd.Series:
+        if name not in self.df.columns:
+            raise RuleError(f"Regra usa a coluna {name!r}, ausente da base")
+        return self.df[name]
+
+    def factorized(self, name: str) -> tuple[np.ndarray, pd.Series]:
+        if name not in self._factorized:
+            codes, uniques = pd.factorize(self.series(name))
+            self._factorized[name] = (codes, pd.Series(np.asarray(uniques, dtype=object)))
+        return self._factorized[name]
+
+    def timestamps(self) -> np.ndarray:
+        if self._ts is None:
+            self._ts = self.series("timestamp").to_numpy(dtype="datetime64[ns]").view("int64")
+        return self._ts
+
+    def on_values(self, name: str, hits: np.ndarray) -> np.ndarray:
+        """Resultado por valor distinto levado às linhas (nulos ficam ``False``)."""
+        codes, _ = self.factorized(name)
+        return np.append(np.asarray(hits, dtype=bool), False)[codes]
+
+
+def _coerce(values: pd.Series, value: Any) -> Any:
+    """O valor da regra no tipo dos elementos da coluna (datas chegam como texto ISO)."""
+    if isinstance(value, tuple):
+        return tuple(_coerce(values, v) for v in value)
+    if pd.api.types.is_datetime64_any_dtype(values):
+        if not isinstance(value, (str, date)):
+            raise TypeError(f"a coluna é de data/hora e {value!r} não é uma data")
+        return pd.Timestamp(value)
+    if pd.api.types.is_numeric_dtype(values) or pd.api.types.is_bool_dtype(values):
+        if not isinstance(value, (bool, int, float, np.number)):
+            raise TypeError(f"a coluna é numérica e {value!r} não é um número")
+        return value
+    present = values.dropna()
+    sample = present.iloc[0] if len(present) else None
+    if isinstance(sample, date) and not isinstance(sample, datetime):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        if isinstance(value, str):
+            return date.fromisoformat(value)
+        raise TypeError(f"a coluna é de datas e {value!r} não é uma data")
+    if isinstance(sample, str) and not isinstance(value, str):
+        raise TypeError(f"a coluna é de texto e {value!r} não é texto")
+    return value
+
+
+def _compare(values: pd.Series, op: str, value: Any) -> np.ndarray:
+    value = _coerce(values, value)
+    if op == "in":
+        result = values.isin(list(value))
+    elif op == "not_in":
+        result = ~values.isin(list(value)) & values.notna()
+    elif op == "between":
+        result = (values >= value[0]) & (values <= value[1])
+    else:
+        result = getattr(operator, op)(values, value)
+    return result.to_numpy(dtype=bool, na_value=False)
+
+
+def _direct(values: pd.Series) -> bool:
+    """Campos numéricos, booleanos e de data são comparados linha a linha; o resto, por valor distinto."""
+    return (
+        pd.api.types.is_numeric_dtype(values)
+        or pd.api.types.is_bool_dtype(values)
+        or pd.api.types.is_datetime64_any_dtype(values)
+    ) and not isinstance(values.dtype, pd.CategoricalDtype)
+
+
+def _window(columns: _Columns, by: str | None, span: int, min_votes: int) -> np.ndarray:
+    ts = columns.timestamps()
+    n = len(ts)
+    keys = np.zeros(n, dtype=np.int64) if by is None else columns.factorized(by)[0]
+    order = np.lexsort((ts, keys))
+    sorted_keys, sorted_ts = keys[order], ts[order]
+    k = min_votes - 1
+    hit = np.zeros(n, dtype=bool)
+    if n > k:
+        # Run of min_votes votes ending at each position; every vote inside it is marked
+        ends = np.flatnonzero(
+            (sorted_keys[k:] == sorted_keys[:-k]) & (sorted_ts[k:] - sorted_ts[:-k] <= span) & (sorted_keys[k:] >= 0)
+        ) + k
+        cover = np.zeros(n + 1, dtype=np.int64)
+        np.add.at(cover, ends - k, 1)
+        np.add.at(cover, ends + 1, -1)
+        hit = np.cumsum(cover[:-1]) > 0
+    out = np.empty(n, dtype=bool)
+    out[order] = hit
+    return out
+
+
+def _evaluate_node(node: Node, columns: _Columns, values: list[np.ndarray]) -> np.ndarray:
+    kind = node[0]
+    if kind == "all":
+        return np.logical_and.reduce([values[i] for i in node[1]])
+    if kind == "any":
+        return np.logical_or.reduce([values[i] for i in node[1]])
+    if kind == "not":
+        return ~values[node[1]]
+    if kind == "flag":
+        return columns.series(node[1]).to_numpy(dtype=bool, na_value=False)
+    if kind == "window":
+        return _window(columns, *node[1:])
+    if kind == "regex":
+        _, uniques = columns.factorized(node[1])
+        pattern = re.compile(node[2])
+        return columns.on_values(node[1], [pattern.search(str(v)) is not None for v in uniques])
+
+    _, name, op, value = node
+    series = columns.series(name)
+    try:
+        if _direct(series):
+            return _compare(series, op, value)
+        return columns.on_values(name, _compare(columns.factorized(name)[1], op, value))
+    except (TypeError, ValueError) as exc:
+        raise RuleError(f"Não foi possível avaliar {name} {op} {value!r}: {exc}") from exc
+
+
+@dataclass(frozen=True)
+class RuleSet:
+    """
+    Regras compiladas: ``plan`` tem as subexpressões distintas em ordem de
+    avaliação e cada regra aponta para o nó da sua expressão.
+    """
+
+    rules: tuple[Rule, ...]
+    plan: tuple[Node, ...]
+    definitions: tuple[dict[str, Any], ...]
+
+    @classmethod
+    def from_dicts(cls, definitions: Iterable[Mapping[str, Any]]) -> RuleSet:
+        compiler = _Compiler()
+        names, roots, defs = [], [], []
+        for definition in definitions:
+            definition = _plain(definition)
+            unknown = set(definition) - {"name", "description", "scenarios", "when"}
+            if unknown:
+                raise RuleError(f"Chaves desconhecidas na regra: {sorted(unknown)}")
+            name = str(definition.get("name", ""))
+            if not re.fullmatch(r"[A-Za-z0-9_]+", name):
+                raise RuleError(f"Nome de regra inválido (use letras, dígitos e _): {name!r}")
+            if name in compiler.rules:
+                raise RuleError(f"Regra duplicada: {name!r}")
+            if "when" not in definition:
+                raise RuleError(f"Regra {name!r} sem 'when'")
+            try:
+                root = compiler.expression(definition["when"])
+            except RuleError as exc:
+                raise RuleError(f"Regra {name!r}: {exc}") from exc
+            compiler.rules[name] = root
+            names.append(name)
+            roots.append(root)
+            defs.append(definition)
+
+        plan, roots = _prune(compiler.plan, roots)
+        rules = tuple(
+            Rule(
+                name=name,
+                root=root,
+                description=str(d.get("description", "")),
+                scenarios=tuple(str(s) for s in d.get("scenarios", ())),
+            )
+            for name, root, d in zip(names, roots, defs)
+        )
+        return cls(rules=rules, plan=plan, definitions=tuple(defs))
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> RuleSet:
+        """Formato do arquivo: ``{"rule": [...]}`` (``rules`` também vale)."""
+        definitions = data.get("rule", data.get("rules", []))
+        if not isinstance(definitions, list):
+            raise RuleError("O arquivo de regras precisa de uma lista 'rule' (ou 'rules')")
+        return cls.from_dicts(definitions)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"rule": [dict(d) for d in self.definitions]}
+
+    @property
+    def columns(self) -> list[str]:
+        return [rule.column for rule in self.rules]
+
+    @property
+    def fields(self) -> list[str]:
+        """Colunas da base lidas pelo plano (``timestamp`` quando há janelas)."""
+        found: dict[str, None] = {}
+        for node in self.plan:
+            if node[0] in ("flag", "cmp", "regex"):
+                found[node[1]] = None
+            elif node[0] == "window":
+                found["timestamp"] = None
+                if node[1] is not None:
+                    found[node[1]] = None
+        return list(found)
+
+    def window_rules(self, scenario_key: str) -> list[str]:
+        """
+        Regras com janela (direta ou via ``rule``) que filtram o cenário. Uma
+        janela olha votos posteriores, então o resultado num voto depende do
+        resto da base.
+        """
+        windowed: list[bool] = []
+        for node in self.plan:
+            windowed.append(node[0] == "window" or any(windowed[i] for i in _children(node)))
+        return [rule.name for rule in self.rules if scenario_key in rule.scenarios and windowed[rule.root]]
+
+    def evaluate(self, df: pd.DataFrame) -> dict[str, np.ndarray]:
+        """Uma máscara por regra (``flag_rule_<nome>``), com cada nó do plano calculado uma vez."""
+        columns = _Columns(df)
+        values: list[np.ndarray] = []
+        for node in self.plan:
+            values.append(_evaluate_node(node, columns, values))
+        return {rule.column: values[rule.root] for rule in self.rules}
+
+    def apply(self, df: pd.DataFrame) -> None:
+        """Acrescenta as colunas das regras a ``df`` (no lugar)."""
+        for column, mask in self.evaluate(df).items():
+            df[column] = mask
+
+    def scenario(self, scenario: Scenario) -> Scenario:
+        """``scenario`` com as colunas das regras que também o filtram."""
+        extra = tuple(rule.column for rule in self.rules if scenario.key in rule.scenarios)
+        if not extra:
+            return scenario
+        return replace(scenario, exclude_flags=(*scenario.exclude_flags, *extra))
+
+
+def load_rules(path: str | Path) -> RuleSet:
+    """Regras de um arquivo ``.toml`` ou ``.json``."""
+    path = Path(path)
+    text = path.read_text(encoding="utf-8")
+    try:
+        if path.suffix.lower() == ".toml":
+            import tomllib
+
+            data = tomllib.loads(text)
+        else:
+            data = json.loads(text)
+    except ValueError as exc:
+        raise RuleError(f"Arquivo de regras ilegível ({path}): {exc}") from exc
+    if isinstance(data, list):
+        data = {"rule": data}
+    return RuleSet.from_dict(data)
+
+
+@lru_cache(maxsize=8)
+def _cached_rules(rule_files: tuple) -> RuleSet:
+    definitions = []
+    for path, _ in rule_files:
+        definitions += load_rules(path).definitions
+    return RuleSet.from_dicts(definitions)
+
+
+def ruleset_for(cfg: AuditConfig) -> RuleSet | None:
+    """Regras de ``cfg.rule_files`` (recarregadas quando o arquivo muda); ``None`` sem arquivos."""
+    if not cfg.rule_files:
+        return None
+    return _cached_rules(tuple((str(p), os.stat(p).st_mtime_ns) for p in cfg.rule_files))
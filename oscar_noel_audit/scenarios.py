@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Scenario:
+    key: str
+    label: str
+    description: str
+    exclude_flags: tuple[str, ...]
+    dedupe_before_filter: bool
+
+
+SCENARIOS: dict[str, Scenario] = {
+    "A": Scenario(
+        key="A",
+        label="A - Básico",
+        description="Remove apenas dias 20-22 e duplicatas",
+        exclude_flags=("suspicious_email_plus_3dig_gmail",),
+        dedupe_before_filter=True,
+    ),
+    "B": Scenario(
+        key="B",
+        label="B - Rigoroso",
+        description="Remove padrão nome.sobrenome###",
+        exclude_flags=("flag_synthetic_email_suffix3",),
+        dedupe_before_filter=False,
+    ),
+    "C": Scenario(
+        key="C",
+        label="C - Conservador",
+        description="Remove padrão + domínios typo/descartáveis + plus pattern",
+        exclude_flags=(
+            "flag_synthetic_email_suffix3",
+            "flag_suspicious_domain_typo",
+            "flag_disposable_domain",
+            "suspicious_email_plus_3dig_gmail",
+        ),
+        dedupe_before_filter=False,
+    ),
+}
+
+
+def get_scenario(key_or_label: str) -> Scenario:
+    for scenario in SCENARIOS.values():
+        if key_or_label in (scenario.key, scenario.label):
+            return scenario
+    raise KeyError(f"Cenário desconhecido: {key_or_label!r}. Disponíveis: {list(SCENARIOS)}")
+
+
+def _first_per_code(codes: np.ndarray, eligible: np.ndarray) -> np.ndarray:
+    positions = np.flatnonzero(eligible)
+    _, first = np.unique(codes[positions], return_index=True)
+    keep = np.zeros(len(codes), dtype=bool)
+    keep[positions[first]] = True
+    return keep
+
+
+def scenario_mask(
+    flagged: pd.DataFrame, scenario: Scenario, email_codes: np.ndarray | None = None
+) -> np.ndarray:
+    """
+    Máscara dos votos mantidos; ``flagged`` deve estar ordenado por timestamp.
+
+    ``email_codes`` (ex.: ``EmailIndex.codes``) evita fatorar os e-mails de novo.
+    """
+    excluded = flagged["exclude_day"].to_numpy(dtype=bool)
+    dropped = np.zeros(len(flagged), dtype=bool)
+    for col in scenario.exclude_flags:
+        dropped |= flagged[col].to_numpy(dtype=bool)
+
+    if email_codes is None:
+        email_codes, _ = pd.factorize(flagged["email"])
+    if scenario.dedupe_before_filter:
+        return _first_per_code(email_codes, ~excluded) & ~dropped
+    return _first_per_code(email_codes, ~excluded & ~dropped)
+
+
+def scenario_votes(
+    flagged: pd.DataFrame, scenario: Scenario | str, email_codes: np.ndarray | None = None
+) -> pd.DataFrame:
+    if isinstance(scenario, str):
+        scenario = get_scenario(scenario)
+    return flagged[scenario_mask(flagged, scenario, email_codes)]
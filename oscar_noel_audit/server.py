@@ -0,0 +1,357 @@
+"""Servidor local de consultas sobre artefatos em cache: ``python -m oscar_noel_audit serve``.
+
+Cada combinação (conteúdo do CSV, configuração) é auditada uma única vez e
+mantida num LRU; as respostas JSON de cada consulta ficam num segundo LRU.
+Vários analistas (ou sessões do painel) podem consultar o mesmo concurso ao
+mesmo tempo sem refazer o pipeline. Só a biblioteca padrão é usada para
+HTTP, e o servidor escuta em ``127.0.0.1`` por padrão.
+
+Rotas (todas GET, resposta JSON)::
+
+    /datasets                                  conjuntos registrados
+    /summary?dataset=...                       resumo e rankings (como ``audit``)
+    /ranking?dataset=...&scenario=B&top=12     ranking de um cenário
+             ...&at=2025-12-18T23:00&since=    ranking num instante ou intervalo
+    /scenarios?dataset=...                     votos mantidos por cenário
+    /flags?dataset=...&flag=...&limit=&offset= votos sinalizados (e-mail em hash)
+    /timeseries?dataset=...&freq=h&scenario=&choice=
+
+Parâmetros de ``AuditConfig`` (nomes de ``to_dict``) podem ir na query,
+ex.: ``min_global_delta_seconds=1.5&excluded_days=20,21``.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import fields
+from hashlib import sha256
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import os
+from pathlib import Path
+import threading
+from typing import Any, Callable, Iterable, Mapping
+from urllib.parse import parse_qs, urlsplit
+
+from .config import AuditConfig, parse_days, parse_hours
+
+DEFAULT_PORT = 8765
+
+Query = Callable[[Any, AuditConfig, Mapping[str, str]], Any]
+
+
+class QueryError(ValueError):
+    """Parâmetro inválido na consulta (vira HTTP 400)."""
+
+
+class NotFound(KeyError):
+    """Rota ou conjunto de dados desconhecido (vira HTTP 404)."""
+
+
+class _LRU:
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._items: OrderedDict[Any, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            if key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def config_from_params(params: Mapping[str, str]) -> AuditConfig:
+    names = {f.name for f in fields(AuditConfig)}
+    overrides: dict[str, Any] = {}
+    for key, value in params.items():
+        if key not in names:
+            continue
+        if key == "excluded_days":
+            overrides[key] = parse_days(value)
+        elif key == "night_hours":
+            overrides[key] = parse_hours(value)
+        else:
+            overrides[key] = value
+    try:
+        return AuditConfig.from_dict(overrides)
+    except (TypeError, ValueError) as exc:
+        raise QueryError(f"Configuração inválida: {exc}") from exc
+
+
+class ArtifactRegistry:
+    """
+    Artefatos por (impressão digital do CSV, configuração), com LRU.
+
+    Pedidos simultâneos para a mesma chave esperam um único cálculo; chaves
+    diferentes são calculadas em paralelo.
+    """
+
+    def __init__(
+        self,
+        datasets: Mapping[str, str | Path],
+        backend: str = "pandas",
+        max_artifacts: int = 4,
+        max_results: int = 256,
+    ) -> None:
+        self.datasets = {name: Path(path) for name, path in datasets.items()}
+        self.backend = backend
+        self.artifacts = _LRU(max_artifacts)
+        self.results = _LRU(max_results)
+        self._fingerprints: dict[Path, tuple[tuple[int, int], str]] = {}
+        self._building: dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, dataset: str) -> str:
+        if dataset not in self.datasets:
+            raise NotFound(f"Conjunto desconhecido: {dataset!r}. Disponíveis: {sorted(self.datasets)}")
+        path = self.datasets[dataset]
+        from .io import file_fingerprint
+
+        st = os.stat(path)
+        # Re-hash only when the file changed on disk; one stamp kept per file
+        stamp = (st.st_size, st.st_mtime_ns)
+        with self._lock:
+            cached = self._fingerprints.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        fingerprint = file_fingerprint(path)
+        with self._lock:
+            self._fingerprints[path] = (stamp, fingerprint)
+        return fingerprint
+
+    def artifact_key(self, dataset: str, cfg: AuditConfig) -> str:
+        cfg_json = json.dumps(cfg.to_dict(), sort_keys=True)
+        return f"{self.fingerprint(dataset)}|{sha256(cfg_json.encode('utf-8')).hexdigest()[:16]}"
+
+    def get(self, dataset: str, cfg: AuditConfig) -> tuple[str, Any]:
+        key = self.artifact_key(dataset, cfg)
+        artifacts = self.artifacts.get(key)
+        if artifacts is not None:
+            return key, artifacts
+
+        with self._lock:
+            build_lock = self._building.setdefault(key, threading.Lock())
+        with build_lock:
+            artifacts = self.artifacts.get(key)
+            if artifacts is None:
+                from .pipeline import audit_file
+
+                artifacts = audit_file(self.datasets[dataset], cfg, backend=self.backend)
+                self.artifacts.put(key, artifacts)
+        with self._lock:
+            self._building.pop(key, None)
+        return key, artifacts
+
+    def query(self, name: str, params: Mapping[str, str]) -> Any:
+        if name == "datasets":
+            return {"datasets": sorted(self.datasets)}
+        if name not in QUERIES:
+            raise NotFound(f"Consulta desconhecida: {name!r}. Disponíveis: {sorted(QUERIES)}")
+        if "dataset" not in params:
+            raise QueryError("Parâmetro 'dataset' é obrigatório")
+
+        cfg = config_from_params(params)
+        cache_key = (name, self.artifact_key(params["dataset"], cfg), tuple(sorted(params.items())))
+        result = self.results.get(cache_key)
+        if result is None:
+            _, artifacts = self.get(params["dataset"], cfg)
+            result = QUERIES[name](artifacts, cfg, params)
+            self.results.put(cache_key, result)
+        return result
+
+
+def _int_param(params: Mapping[str, str], name: str, default: int) -> int:
+    try:
+        return int(params.get(name, default))
+    except ValueError as exc:
+        raise QueryError(f"'{name}' deve ser inteiro") from exc
+
+
+def _scenario(params: Mapping[str, str], default: str | None = "B") -> Any:
+    from .scenarios import get_scenario
+
+    key = params.get("scenario", default)
+    if key is None:
+        return None
+    try:
+        return get_scenario(key)
+    except KeyError as exc:
+        raise QueryError(str(exc.args[0])) from exc
+
+
+def query_summary(artifacts: Any, cfg: AuditConfig, params: Mapping[str, str]) -> Any:
+    from .report import audit_report
+
+    report = audit_report(artifacts, cfg, top_n=_int_param(params, "top", 12))
+    report.pop("profile", None)
+    return report
+
+
+def query_ranking(artifacts: Any, cfg: AuditConfig, params: Mapping[str, str]) -> Any:
+    from .resampling import ranking_counts
+
+    scenario = _scenario(params)
+    at, since = params.get("at"), params.get("since")
+    if at is None and since is None:
+        counts = ranking_counts(artifacts.scenario_votes(scenario))
+    else:
+        try:
+            counts = artifacts.timeline(scenario).ranking(until=at, since=since).set_index("choice")["votes"]
+        except (ValueError, TypeError) as exc:
+            raise QueryError(f"Instante inválido: {exc}") from exc
+    total = int(counts.sum())
+    return {
+        "scenario": scenario.key,
+        "label": scenario.label,
+        "at": at,
+        "since": since,
+        "total": total,
+        "top": [
+            {"name": str(name), "votes": int(v), "share": float(v / total) if total else 0.0}
+            for name, v in counts.head(_int_param(params, "top", 12)).items()
+        ],
+    }
+
+
+def query_scenarios(artifacts: Any, cfg: AuditConfig, params: Mapping[str, str]) -> Any:
+    from .scenarios import SCENARIOS
+
+    return {
+        key: {
+            "label": scenario.label,
+            "description": scenario.description,
+            "votes": int(artifacts.scenario_mask(scenario).sum()),
+        }
+        for key, scenario in SCENARIOS.items()
+    }
+
+
+def query_flags(artifacts: Any, cfg: AuditConfig, params: Mapping[str, str]) -> Any:
+    from .io import hash_emails
+
+    base = artifacts.base
+    flag_columns = [c for c in base.columns if c.startswith("flag_")]
+    flag = params.get("flag")
+    if flag is None:
+        mask = base[flag_columns].any(axis=1).to_numpy()
+    elif flag in flag_columns:
+        mask = base[flag].to_numpy(dtype=bool)
+    else:
+        raise QueryError(f"Flag desconhecida: {flag!r}. Disponíveis: {flag_columns}")
+
+    limit = min(_int_param(params, "limit", 100), 5000)
+    offset = _int_param(params, "offset", 0)
+    rows = base.loc[mask, ["timestamp", "email", "choice", *flag_columns]].iloc[offset : offset + limit]
+    rows = rows.reset_index(drop=True)
+    rows.insert(1, "email_hash", hash_emails(rows.pop("email")))
+    rows["choice"] = rows["choice"].astype(str)
+    return {
+        "total": int(mask.sum()),
+        "offset": offset,
+        "rows": json.loads(rows.to_json(orient="records", date_format="iso")),
+    }
+
+
+def query_timeseries(artifacts: Any, cfg: AuditConfig, params: Mapping[str, str]) -> Any:
+    import pandas as pd
+
+    scenario = _scenario(params, default=None)
+    votes = artifacts.base if scenario is None else artifacts.scenario_votes(scenario)
+    if "choice" in params:
+        votes = votes[votes["choice"].astype(str) == params["choice"]]
+    freq = params.get("freq", "h")
+    try:
+        counts = votes.groupby(votes["timestamp"].dt.floor(freq)).size()
+    except ValueError as exc:
+        raise QueryError(f"Frequência inválida: {freq!r}") from exc
+    return {
+        "freq": freq,
+        "scenario": scenario.key if scenario is not None else None,
+        "points": [
+            {"t": pd.Timestamp(t).isoformat(), "votes": int(v)} for t, v in counts.items()
+        ],
+    }
+
+
+QUERIES: dict[str, Query] = {
+    "summary": query_summary,
+    "ranking": query_ranking,
+    "scenarios": query_scenarios,
+    "flags": query_flags,
+    "timeseries": query_timeseries,
+}
+
+
+class AuditRequestHandler(BaseHTTPRequestHandler):
+    registry: ArtifactRegistry  # set by make_server
+    quiet = False
+    allow_origins: frozenset[str] = frozenset()  # browser origins allowed to read responses (CORS)
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server naming)
+        url = urlsplit(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            body: Any = self.registry.query(url.path.strip("/") or "datasets", params)
+            status = HTTPStatus.OK
+        except NotFound as exc:
+            body, status = {"error": str(exc.args[0])}, HTTPStatus.NOT_FOUND
+        except QueryError as exc:
+            body, status = {"error": str(exc)}, HTTPStatus.BAD_REQUEST
+        except Exception as exc:  # keep serving other requests
+            body, status = {"error": f"{type(exc).__name__}: {exc}"}, HTTPStatus.INTERNAL_SERVER_ERROR
+
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(data)))
+        origin = self.headers.get("Origin")
+        if origin in self.allow_origins:
+            self.send_header("Access-Control-Allow-Origin", origin)
+            self.send_header("Vary", "Origin")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(
+    registry: ArtifactRegistry,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    quiet: bool = False,
+    allow_origins: Iterable[str] = (),
+) -> ThreadingHTTPServer:
+    """
+    Servidor de consultas. Sem ``allow_origins``, nenhuma página aberta no
+    navegador consegue ler as respostas (votos e sinalizações) via CORS.
+    """
+    attrs = {"registry": registry, "quiet": quiet, "allow_origins": frozenset(allow_origins)}
+    handler = type("Handler", (AuditRequestHandler,), attrs)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def datasets_from_paths(paths: list[str]) -> dict[str, Path]:
+    """Nome de cada conjunto = nome do arquivo sem extensão (sufixo numérico se repetir)."""
+    out: dict[str, Path] = {}
+    for p in map(Path, paths):
+        name, i = p.stem, 2
+        while name in out:
+            name, i = f"{p.stem}-{i}", i + 1
+        out[name] = p
+    return out
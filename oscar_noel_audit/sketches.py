@@ -0,0 +1,196 @@
+"""Resumos probabilísticos de memória limitada, combináveis entre blocos e processos.
+
+* ``HyperLogLog``: e-mails distintos; erro relativo típico ``1.04 / sqrt(2**p)``
+  (p=14 → ~0,8%) com ``2**p`` bytes, qualquer que seja o volume.
+* ``SpaceSaving``: os ``k`` itens mais frequentes; cada contagem fica entre
+  ``count - error`` e ``count``, com ``error <= N / k``.
+
+Todos usam o mesmo hash de 64 bits (``pandas.util.hash_array``), estável entre
+processos, e têm ``merge`` — some os resumos de cada bloco ou worker no final.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import math
+from pathlib import Path
+from typing import Any, Hashable
+
+import numpy as np
+import pandas as pd
+
+from .domains import email_domains
+
+
+def hash64(values: pd.Series | np.ndarray | list[Any]) -> np.ndarray:
+    return pd.util.hash_array(np.asarray(values, dtype=object))
+
+
+def _bit_length(values: np.ndarray) -> np.ndarray:
+    # Exact for uint64: float64 holds every 32-bit integer, so split the halves
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    high_len = np.frexp(high)[1]
+    low_len = np.frexp(low)[1]
+    return np.where(high > 0, high_len + 32, low_len)
+
+
+class HyperLogLog:
+    def __init__(self, p: int = 14) -> None:
+        if not 4 <= p <= 18:
+            raise ValueError("p deve estar entre 4 e 18")
+        self.p = p
+        self.registers = np.zeros(1 << p, dtype=np.uint8)
+
+    @property
+    def relative_error(self) -> float:
+        return 1.04 / math.sqrt(len(self.registers))
+
+    def add(self, values: pd.Series | np.ndarray | list[Any]) -> "HyperLogLog":
+        h = hash64(values)
+        if len(h) == 0:
+            return self
+        bits = 64 - self.p
+        idx = (h >> np.uint64(bits)).astype(np.intp)
+        rest = h & np.uint64((1 << bits) - 1)
+        rank = (bits - _bit_length(rest) + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+        return self
+
+    def merge(self, other: "HyperLogLog") -> "HyperLogLog":
+        if other.p != self.p:
+            raise ValueError("Só é possível unir HyperLogLog com o mesmo p")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def estimate(self) -> float:
+        m = len(self.registers)
+        alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+        raw = alpha * m * m / float(np.sum(np.exp2(-self.registers.astype(np.float64))))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if raw <= 2.5 * m and zeros:
+            return m * math.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+    def __len__(self) -> int:
+        return int(round(self.estimate()))
+
+
+class SpaceSaving:
+    def __init__(self, k: int = 100) -> None:
+        self.k = k
+        self.counts: dict[Hashable, int] = {}
+        self.errors: dict[Hashable, int] = {}
+        self.total = 0
+
+    def _floor(self) -> int:
+        # Any item outside a full summary may have up to the smallest kept count
+        return min(self.counts.values()) if len(self.counts) >= self.k else 0
+
+    def add(self, values: pd.Series | np.ndarray | list[Any]) -> "SpaceSaving":
+        """Conta o bloco exatamente e une ao resumo (memória ~ distintos do bloco)."""
+        counts = pd.Series(values).value_counts(sort=True)
+        chunk = SpaceSaving(self.k)
+        # Exact top-k of the chunk: anything left out has at most the smallest kept count
+        chunk.counts = {key: int(v) for key, v in counts.head(self.k).items()}
+        chunk.errors = dict.fromkeys(chunk.counts, 0)
+        chunk.total = int(counts.sum())
+        return self.merge(chunk)
+
+    def merge(self, other: "SpaceSaving") -> "SpaceSaving":
+        floor_a, floor_b = self._floor(), other._floor()
+        merged_counts: dict[Hashable, int] = {}
+        merged_errors: dict[Hashable, int] = {}
+        for key in self.counts.keys() | other.counts.keys():
+            merged_counts[key] = self.counts.get(key, floor_a) + other.counts.get(key, floor_b)
+            merged_errors[key] = self.errors.get(key, floor_a) + other.errors.get(key, floor_b)
+        keep = sorted(merged_counts, key=merged_counts.__getitem__, reverse=True)[: self.k]
+        self.counts = {key: merged_counts[key] for key in keep}
+        self.errors = {key: merged_errors[key] for key in keep}
+        self.total += other.total
+        return self
+
+    def top(self, n: int | None = None) -> pd.DataFrame:
+        """Itens por contagem estimada; ``guaranteed`` é o limite inferior."""
+        rows = sorted(self.counts.items(), key=lambda kv: kv[1], reverse=True)[:n]
+        return pd.DataFrame(
+            {
+                "item": [key for key, _ in rows],
+                "count": [c for _, c in rows],
+                "guaranteed": [c - self.errors[key] for key, c in rows],
+            }
+        )
+
+
+@dataclass
+class VoteSketches:
+    """
+    Contagens aproximadas de uma auditoria em streaming, ao lado de
+    ``summarize_suspicion``: e-mails distintos (total, por dia e por
+    candidato) e os e-mails e domínios que mais repetem.
+    """
+
+    p: int = 14
+    k: int = 100
+    unique_emails: HyperLogLog = field(init=False)
+    unique_by_day: dict[str, HyperLogLog] = field(init=False, default_factory=dict)
+    unique_by_choice: dict[str, HyperLogLog] = field(init=False, default_factory=dict)
+    top_emails: SpaceSaving = field(init=False)
+    top_domains: SpaceSaving = field(init=False)
+    rows: int = field(init=False, default=0)
+
+    def __post_init__(self) -> None:
+        self.unique_emails = HyperLogLog(self.p)
+        self.top_emails = SpaceSaving(self.k)
+        self.top_domains = SpaceSaving(self.k)
+
+    def _add_grouped(self, target: dict[str, HyperLogLog], groups: pd.Series, emails: np.ndarray) -> None:
+        codes, labels = pd.factorize(groups)
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+        for i, label in enumerate(labels):
+            key = str(label)
+            target.setdefault(key, HyperLogLog(self.p)).add(emails[order[bounds[i] : bounds[i + 1]]])
+
+    def update(self, votes: pd.DataFrame) -> "VoteSketches":
+        """Acrescenta um bloco com ``timestamp``, ``email`` e ``choice``."""
+        emails = votes["email"].to_numpy(dtype=object)
+        self.unique_emails.add(emails)
+        self._add_grouped(self.unique_by_day, votes["timestamp"].dt.strftime("%Y-%m-%d"), emails)
+        self._add_grouped(self.unique_by_choice, votes["choice"].astype(str), emails)
+        self.top_emails.add(emails)
+        self.top_domains.add(email_domains(votes["email"]))
+        self.rows += len(votes)
+        return self
+
+    def merge(self, other: "VoteSketches") -> "VoteSketches":
+        self.unique_emails.merge(other.unique_emails)
+        for mine, theirs in ((self.unique_by_day, other.unique_by_day), (self.unique_by_choice, other.unique_by_choice)):
+            for key, hll in theirs.items():
+                if key in mine:
+                    mine[key].merge(hll)
+                else:
+                    mine[key] = HyperLogLog(self.p).merge(hll)
+        self.top_emails.merge(other.top_emails)
+        self.top_domains.merge(other.top_domains)
+        self.rows += other.rows
+        return self
+
+    def to_dict(self, top: int = 20) -> dict[str, Any]:
+        return {
+            "rows": self.rows,
+            "relative_error": self.unique_emails.relative_error,
+            "unique_emails": len(self.unique_emails),
+            "unique_by_day": {k: len(v) for k, v in sorted(self.unique_by_day.items())},
+            "unique_by_choice": {k: len(v) for k, v in sorted(self.unique_by_choice.items())},
+            "top_emails": self.top_emails.top(top).to_dict(orient="records"),
+            "top_domains": self.top_domains.top(top).to_dict(orient="records"),
+        }
+
+
+def sketch_csv(csv_path: str | Path, chunksize: int = 200_000, p: int = 14, k: int = 100) -> VoteSketches:
+    from .io import iter_votes_csv
+
+    sketches = VoteSketches(p=p, k=k)
+    for chunk in iter_votes_csv(csv_path, chunksize=chunksize):
+        sketches.update(chunk)
+    return sketches
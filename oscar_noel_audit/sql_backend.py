@@ -0,0 +1,483 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Any, Iterator
+
+import numpy as np
+import pandas as pd
+
+from .coburst import build_coburst_graph
+from .config import AuditConfig
+from .domains import classify_domains, email_domains
+from .email_cohorts import cohort_statistics
+from .email_index import build_email_index
+from .io import EMAIL_COLUMNS, CHOICE_COLUMNS, TIMESTAMP_COLUMNS, _pick_first_existing
+from .pipeline import AuditArtifacts
+from .profiling import StageProfiler, StageTiming, profile_stage
+from .rules import RuleSet, ruleset_for
+from .scenarios import SCENARIOS, Scenario
+from .suspicion import SuspicionSummary, detect_hourly_outliers
+
+# Day-first layouts exported by Google Forms, tried in order (then ISO via CAST)
+TIMESTAMP_FORMATS = ("%d/%m/%Y %H:%M:%S", "%d/%m/%Y %H:%M", "%d/%m/%Y")
+# Same split as domains.email_domains: everything after the last "@"
+_DOMAIN = "regexp_replace(email, '^.*@', '')"
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _strip(expr: str) -> str:
+    return rf"regexp_replace({expr}, '^\s+|\s+$', '', 'g')"
+
+
+def _match(expr: str, pattern: str) -> str:
+    # re.match semantics: anchored at the start only
+    return f"regexp_matches({expr}, {_literal('^(?:' + pattern + ')')})"
+
+
+class DuckDBBackend:
+    """
+    Executa as regras da auditoria em SQL num DuckDB local (embutido).
+
+    Aceita um DataFrame já normalizado ou o caminho de um CSV/Parquet exportado.
+    Exclusão de dias, dedupe keep-first, deltas (global e por candidato), regex
+    e contagem por hora rodam no motor, que usa ``temp_directory`` para
+    despejar em disco quando passa de ``memory_limit``. Para arquivos maiores
+    que a RAM, passe um arquivo em ``database`` em vez de ``":memory:"``.
+    As expressões regulares são executadas pelo RE2 do DuckDB; os padrões
+    padrão de ``AuditConfig`` são compatíveis.
+
+    ``run`` devolve ``AuditArtifacts`` completos (tudo em memória). ``audit``
+    devolve um ``SQLAudit``: agregados, máscara do Cenário A e contagens dos
+    cenários saem do SQL, e as linhas marcadas ficam num Parquet temporário,
+    lidas em páginas com ``SQLAudit.pages``.
+    """
+
+    name = "duckdb"
+
+    def __init__(
+        self,
+        database: str = ":memory:",
+        temp_directory: str | Path | None = None,
+        memory_limit: str | None = None,
+        threads: int | None = None,
+    ) -> None:
+        self.database = database
+        self.temp_directory = temp_directory
+        self.memory_limit = memory_limit
+        self.threads = threads
+
+    def _connect(self) -> Any:
+        try:
+            import duckdb
+        except ImportError as exc:  # pragma: no cover - depends on the environment
+            raise ImportError(
+                "O backend SQL precisa do pacote 'duckdb' (pip install duckdb)."
+            ) from exc
+
+        con = duckdb.connect(self.database)
+        con.execute("SET preserve_insertion_order = true")
+        if self.temp_directory is not None:
+            con.execute(f"SET temp_directory = {_literal(str(self.temp_directory))}")
+        if self.memory_limit is not None:
+            con.execute(f"SET memory_limit = {_literal(self.memory_limit)}")
+        if self.threads is not None:
+            con.execute(f"SET threads = {int(self.threads)}")
+        return con
+
+    def _load_source(self, con: Any, source: pd.DataFrame | str | Path) -> list[str]:
+        if isinstance(source, pd.DataFrame):
+            # Positions are taken before NaT rows are dropped, so they keep pointing at source.index
+            frame = source.assign(
+                timestamp=source["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64"),
+                __pos=np.arange(len(source), dtype=np.int64),
+            )
+            con.register("source_frame", frame)
+            extras = [c for c in source.columns if c not in ("timestamp", "email", "choice")]
+            extra_sql = "".join(f", {_quote(c)}" for c in extras)
+            con.execute(
+                f"""
+                CREATE TEMP TABLE votes AS
+                SELECT __pos AS pos, timestamp AS ts_ns, CAST(email AS VARCHAR) AS email,
+                       CAST(choice AS VARCHAR) AS choice{extra_sql}
+                FROM source_frame
+                WHERE timestamp <> {np.iinfo(np.int64).min}
+                """
+            )
+            con.unregister("source_frame")
+            return extras
+
+        path = Path(source)
+        if path.suffix.lower() == ".parquet":
+            reader = f"read_parquet({_literal(str(path))})"
+        else:
+            reader = f"read_csv({_literal(str(path))}, header = true, all_varchar = true)"
+        columns = [r[0] for r in con.execute(f"DESCRIBE SELECT * FROM {reader}").fetchall()]
+        ts_col = _pick_first_existing(columns, TIMESTAMP_COLUMNS)
+        email_col = _pick_first_existing(columns, EMAIL_COLUMNS)
+        choice_col = _pick_first_existing(columns, CHOICE_COLUMNS)
+        extras = [c for c in columns if c not in {ts_col, email_col, choice_col}]
+
+        ts_text = f"CAST({_quote(ts_col)} AS VARCHAR)"
+        parsed = ", ".join(f"try_strptime({_strip(ts_text)}, {_literal(fmt)})" for fmt in TIMESTAMP_FORMATS)
+        extra_sql = "".join(f", {_quote(c)}" for c in extras)
+        con.execute(
+            f"""
+            CREATE TEMP TABLE votes AS
+            SELECT * FROM (
+                SELECT epoch_ns(COALESCE({parsed}, TRY_CAST({_strip(ts_text)} AS TIMESTAMP))) AS ts_ns,
+                       lower({_strip(f"COALESCE(CAST({_quote(email_col)} AS VARCHAR), 'nan')")}) AS email,
+                       {_strip(f"COALESCE(CAST({_quote(choice_col)} AS VARCHAR), 'nan')")} AS choice
+                       {extra_sql}
+                FROM {reader}
+            )
+            WHERE ts_ns IS NOT NULL
+            """
+        )
+        # rowid counts the rows kept after unparseable timestamps, as the index of load_votes_csv does
+        con.execute("ALTER TABLE votes ADD COLUMN pos BIGINT")
+        con.execute("UPDATE votes SET pos = rowid")
+        return extras
+
+    def audit(
+        self,
+        source: pd.DataFrame | str | Path,
+        cfg: AuditConfig,
+        profiler: StageProfiler | None = None,
+    ) -> SQLAudit:
+        """
+        Roda a auditoria sem trazer as linhas para a memória: devolve os
+        agregados, a máscara da base limpa e as contagens dos cenários, e
+        grava a base sinalizada em Parquet (``SQLAudit.path``) para leitura
+        por páginas.
+        """
+        if self.temp_directory is not None:
+            Path(self.temp_directory).mkdir(parents=True, exist_ok=True)
+        spill_dir = Path(tempfile.mkdtemp(prefix="oscar_noel_audit_sql-", dir=self.temp_directory))
+        con = self._connect()
+        try:
+            with profile_stage(profiler, "sql.load") as stage:
+                extras = self._load_source(con, source)
+                stage.rows_out = con.execute("SELECT count(*) FROM votes").fetchone()[0]
+
+            n = stage.rows_out
+            excluded = ", ".join(str(int(d)) for d in sorted(cfg.excluded_days)) or "NULL"
+            start_h, end_h = cfg.night_hours
+            extra_sql = "".join(f", {_quote(c)}" for c in extras)
+
+            with profile_stage(profiler, "domains", rows_in=n) as stage:
+                # One lookup per distinct domain; the flags are joined back in SQL
+                domains = con.execute(
+                    f"SELECT DISTINCT {_DOMAIN} AS domain FROM votes WHERE email IS NOT NULL"
+                ).df()["domain"]
+                table = classify_domains(pd.Series(pd.Categorical(domains.astype(object))), cfg)
+                con.register("domain_flags", table[["domain", "typo", "disposable"]])
+                stage.rows_out = len(table)
+
+            with profile_stage(profiler, "sql.flags", rows_in=n) as stage:
+                con.execute(
+                    f"""
+                    CREATE TEMP TABLE flagged AS
+                    WITH enriched AS (
+                        SELECT pos AS rid, ts_ns, make_timestamp(ts_ns // 1000) AS ts,
+                               email, choice{extra_sql},
+                               (ts_ns - lag(ts_ns) OVER (PARTITION BY email ORDER BY ts_ns, pos)) / 1e9
+                                   AS email_gap
+                        FROM votes
+                    ),
+                    cadence AS (
+                        SELECT *,
+                               count(email_gap) OVER (PARTITION BY email) AS gap_count,
+                               avg(email_gap) OVER (PARTITION BY email) AS gap_mean,
+                               stddev_pop(email_gap) OVER (PARTITION BY email) AS gap_std
+                        FROM enriched
+                    )
+                    SELECT rid, ts_ns, email, choice{extra_sql},
+                           CAST(ts AS DATE) AS date,
+                           day(ts) AS day,
+                           hour(ts) AS hour,
+                           {_DOMAIN} AS email_domain,
+                           COALESCE(day(ts) IN ({excluded}), false) AS exclude_day,
+                           {_match("email", cfg.suspicious_email_plus_regex.pattern)}
+                               AS suspicious_email_plus_3dig_gmail,
+                           (ts_ns - lag(ts_ns) OVER (ORDER BY ts_ns, rid)) / 1e9 AS delta_prev_seconds,
+                           COALESCE((ts_ns - lag(ts_ns) OVER (ORDER BY ts_ns, rid)) / 1e9
+                                    <= {float(cfg.min_global_delta_seconds)!r}, false)
+                               AS flag_global_short_delta,
+                           (ts_ns - lag(ts_ns) OVER (PARTITION BY choice ORDER BY ts_ns, rid)) / 1e9
+                               AS choice_delta_prev_seconds,
+                           COALESCE((ts_ns - lag(ts_ns) OVER (PARTITION BY choice ORDER BY ts_ns, rid)) / 1e9
+                                    <= {float(cfg.min_per_choice_delta_seconds)!r}, false)
+                               AS flag_choice_short_delta,
+                           email_gap AS email_delta_prev_seconds,
+                           COALESCE(email_gap <= {float(cfg.min_email_gap_seconds)!r}, false) AS flag_email_short_gap,
+                           gap_count >= {max(int(cfg.cadence_min_votes) - 1, 1)}
+                               AND (CASE WHEN gap_mean > 0 THEN gap_std / gap_mean ELSE 0 END)
+                                   <= {float(cfg.cadence_max_cv)!r}
+                               AS flag_email_regular_cadence,
+                           hour(ts) BETWEEN {int(start_h)} AND {int(end_h)} AS flag_night_vote,
+                           COALESCE(d.typo, false) AS flag_suspicious_domain_typo,
+                           COALESCE(d.disposable, false) AS flag_disposable_domain,
+                           {_match("email", cfg.suspicious_email_suffix3_regex.pattern)}
+                               AS flag_synthetic_email_suffix3
+                    FROM cadence LEFT JOIN domain_flags AS d ON d.domain = {_DOMAIN}
+                    """
+                )
+                stage.rows_out = n
+
+            rules = ruleset_for(cfg)
+            rule_votes: dict[str, int] = {}
+            if rules is not None and rules.rules:
+                with profile_stage(profiler, "rules.custom", rows_in=n) as stage:
+                    # Only the columns the rules read come back, in time order
+                    fields = ", ".join(_quote(f) for f in rules.fields if f != "timestamp")
+                    frame = con.execute(
+                        f"SELECT rid, ts_ns{', ' + fields if fields else ''} FROM flagged ORDER BY ts_ns, rid"
+                    ).df()
+                    rule_flags = pd.DataFrame(rules.evaluate(_to_pandas_layout(frame)))
+                    rule_votes = {c: int(rule_flags[c].sum()) for c in rules.columns}
+                    rule_flags.insert(0, "rid", frame["rid"].to_numpy())
+                    del frame
+                    con.register("rule_flags", rule_flags)
+                    con.execute("CREATE TEMP VIEW audited AS SELECT * FROM flagged JOIN rule_flags USING (rid)")
+                    stage.rows_out = n
+            else:
+                con.execute("CREATE TEMP VIEW audited AS SELECT * FROM flagged")
+
+            with profile_stage(profiler, "sql.hourly", rows_in=n) as stage:
+                hourly = con.execute(
+                    """
+                    SELECT date_trunc('hour', make_timestamp(ts_ns // 1000)) AS hour_bucket, count(*) AS votes
+                    FROM votes
+                    GROUP BY ALL
+                    ORDER BY hour_bucket
+                    """
+                ).df()
+                hourly["hour_bucket"] = hourly["hour_bucket"].astype("datetime64[ns]")
+                hourly["votes"] = hourly["votes"].astype("int64")
+                stage.rows_out = len(hourly)
+
+            with profile_stage(profiler, "sql.summary", rows_in=n) as stage:
+                row = con.execute(
+                    """
+                    SELECT count_if(flag_global_short_delta), count_if(flag_choice_short_delta),
+                           count_if(flag_night_vote), count_if(flag_suspicious_domain_typo),
+                           count_if(flag_disposable_domain), count_if(flag_synthetic_email_suffix3),
+                           COALESCE((SELECT max(c) FROM (SELECT count(*) AS c FROM flagged
+                                                         WHERE email IS NOT NULL GROUP BY email)), 0),
+                           count_if(flag_email_short_gap), count_if(flag_email_regular_cadence),
+                           count(DISTINCT email) FILTER (WHERE flag_email_regular_cadence),
+                           count_if(NOT exclude_day)
+                    FROM flagged
+                    """
+                ).fetchone()
+                suspicion_summary = SuspicionSummary(*(int(v or 0) for v in row[:-1]))
+                after_excluded_days = int(row[-1] or 0)
+                stage.rows_out = 1
+
+            with profile_stage(profiler, "sql.scenarios", rows_in=n) as stage:
+                scenario_counts = {}
+                for key, scenario in SCENARIOS.items():
+                    if rules is not None:
+                        scenario = rules.scenario(scenario)
+                    counts = con.execute(_scenario_counts_sql(scenario)).df()
+                    scenario_counts[key] = counts.set_index("choice")["votes"].astype("int64")
+                stage.rows_out = len(scenario_counts)
+
+            with profile_stage(profiler, "sql.spill", rows_in=n) as stage:
+                # Cleaned rows come back as a mask in the same order as the spilled base
+                mask = con.execute(
+                    """
+                    SELECT NOT exclude_day
+                               AND row_number() OVER (PARTITION BY email, exclude_day ORDER BY ts_ns, rid) = 1
+                               AND NOT suspicious_email_plus_3dig_gmail AS is_cleaned
+                    FROM flagged
+                    ORDER BY ts_ns, rid
+                    """
+                ).fetchnumpy()["is_cleaned"]
+                mask = np.asarray(mask, dtype=bool)
+                path = spill_dir / "flagged.parquet"
+                con.execute(
+                    f"COPY (SELECT * FROM audited ORDER BY ts_ns, rid) TO {_literal(str(path))} (FORMAT parquet)"
+                )
+                stage.rows_out = n
+        except BaseException:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+            raise
+        finally:
+            con.close()
+
+        with profile_stage(profiler, "hourly_outliers", rows_in=len(hourly)) as stage:
+            hourly_outliers = detect_hourly_outliers(hourly)
+            stage.rows_out = len(hourly_outliers)
+
+        return SQLAudit(
+            path=path,
+            cleaned_mask=mask,
+            hourly=hourly,
+            hourly_outliers=hourly_outliers,
+            suspicion_summary=suspicion_summary,
+            scenario_counts=scenario_counts,
+            n_rows=n,
+            n_after_excluded_days=after_excluded_days,
+            raw_columns=("timestamp", "email", "choice", *extras),
+            source=source if isinstance(source, pd.DataFrame) else None,
+            rules=rules,
+            rule_votes=rule_votes,
+            profile=tuple(profiler.timings) if profiler is not None else (),
+        )
+
+    def run(
+        self,
+        source: pd.DataFrame | str | Path,
+        cfg: AuditConfig,
+        profiler: StageProfiler | None = None,
+    ) -> AuditArtifacts:
+        """``audit`` seguido de ``SQLAudit.to_artifacts`` (a base inteira em memória)."""
+        audit = self.audit(source, cfg, profiler=profiler)
+        try:
+            return audit.to_artifacts(cfg, profiler=profiler)
+        finally:
+            audit.remove()
+
+
+def _scenario_counts_sql(scenario: Scenario) -> str:
+    """Votos por candidato no cenário (dedupe keep-first por e-mail, como ``scenario_mask``)."""
+    dropped = " OR ".join(_quote(c) for c in scenario.exclude_flags) or "false"
+    eligible = "NOT exclude_day" if scenario.dedupe_before_filter else "NOT exclude_day AND NOT dropped"
+    kept = "rn = 1 AND NOT dropped" if scenario.dedupe_before_filter else "rn = 1"
+    return f"""
+        SELECT choice, count(*) AS votes
+        FROM (
+            SELECT choice, dropped, row_number() OVER (PARTITION BY email ORDER BY ts_ns, rid) AS rn
+            FROM (SELECT *, ({dropped}) AS dropped FROM audited)
+            WHERE {eligible}
+        )
+        WHERE {kept}
+        GROUP BY choice
+        ORDER BY votes DESC, choice
+    """
+
+
+@dataclass(frozen=True)
+class SQLAudit:
+    """
+    Auditoria do backend SQL com as linhas fora da memória.
+
+    Agregados, máscara da base limpa (um byte por voto) e contagens dos
+    cenários já vêm prontos; a base sinalizada fica em ``path`` (Parquet, em
+    ordem de tempo) e só é lida por páginas (``pages``) ou inteira, quando
+    pedida (``to_artifacts``). ``remove`` apaga o arquivo.
+    """
+
+    path: Path
+    cleaned_mask: np.ndarray
+    hourly: pd.DataFrame
+    hourly_outliers: pd.DataFrame
+    suspicion_summary: SuspicionSummary
+    scenario_counts: dict[str, pd.Series]
+    n_rows: int
+    n_after_excluded_days: int
+    raw_columns: tuple[str, ...]
+    source: pd.DataFrame | None = None
+    rules: RuleSet | None = None
+    rule_votes: dict[str, int] = field(default_factory=dict)
+    profile: tuple[StageTiming, ...] = ()
+
+    @property
+    def n_cleaned(self) -> int:
+        return int(np.count_nonzero(self.cleaned_mask))
+
+    def pages(self, columns: list[str] | None = None, page_rows: int = 200_000) -> Iterator[pd.DataFrame]:
+        """A base sinalizada em páginas de até ``page_rows`` linhas, no layout do pandas."""
+        import duckdb
+
+        wanted = None
+        if columns is not None:
+            wanted = ["rid", *("ts_ns" if c == "timestamp" else c for c in columns)]
+            if "email_domain" in columns and "email" not in columns:
+                wanted.append("email")
+        select = "*" if wanted is None else ", ".join(_quote(c) for c in wanted)
+        con = duckdb.connect()
+        try:
+            con.execute("SET preserve_insertion_order = true")
+            con.execute("SET enable_progress_bar = false")
+            cursor = con.execute(f"SELECT {select} FROM read_parquet({_literal(str(self.path))})")
+            while True:
+                page = cursor.fetch_df_chunk(max(1, page_rows // 2048))
+                if page.empty:
+                    break
+                page = self._layout(page)
+                yield page if columns is None else page[columns]
+        finally:
+            con.close()
+
+    def _layout(self, page: pd.DataFrame) -> pd.DataFrame:
+        page = _to_pandas_layout(page).set_index("rid").rename_axis(None)
+        if self.source is not None:
+            page.index = self.source.index[page.index.to_numpy()]
+        return page
+
+    def to_artifacts(self, cfg: AuditConfig, profiler: StageProfiler | None = None) -> AuditArtifacts:
+        """``AuditArtifacts`` completo: lê a base inteira e monta índice de e-mails, lotes e coortes."""
+        with profile_stage(profiler, "sql.fetch", rows_in=self.n_rows) as stage:
+            import duckdb
+
+            con = duckdb.connect()
+            try:
+                flagged = con.execute(f"SELECT * FROM read_parquet({_literal(str(self.path))})").df()
+            finally:
+                con.close()
+            flagged = self._layout(flagged)
+            stage.rows_out = len(flagged)
+
+        with profile_stage(profiler, "email_index", rows_in=len(flagged)) as stage:
+            email_index = build_email_index(flagged)
+            stage.rows_out = email_index.n_emails
+        with profile_stage(profiler, "coburst", rows_in=len(flagged)) as stage:
+            coburst = build_coburst_graph(flagged, cfg)
+            stage.rows_out = coburst.n_components
+        with profile_stage(profiler, "email_cohorts", rows_in=len(flagged)) as stage:
+            email_cohorts = cohort_statistics(flagged, min_emails=cfg.cohort_min_emails)
+            stage.rows_out = len(email_cohorts)
+
+        return AuditArtifacts(
+            base=flagged,
+            cleaned_mask=self.cleaned_mask,
+            hourly=self.hourly,
+            hourly_outliers=self.hourly_outliers,
+            suspicion_summary=self.suspicion_summary,
+            profile=tuple(profiler.timings) if profiler is not None else self.profile,
+            email_index=email_index,
+            coburst=coburst,
+            email_cohorts=email_cohorts,
+            source=self.source,
+            raw_columns=self.raw_columns,
+            rules=self.rules,
+        )
+
+    def remove(self) -> None:
+        shutil.rmtree(self.path.parent, ignore_errors=True)
+
+
+def _to_pandas_layout(df: pd.DataFrame) -> pd.DataFrame:
+    """Tipos do caminho pandas para as colunas presentes (páginas e leituras parciais incluídas)."""
+    if "ts_ns" in df.columns:
+        df.insert(1, "timestamp", pd.to_datetime(df.pop("ts_ns").to_numpy(), unit="ns"))
+    if "date" in df.columns:
+        df["date"] = pd.to_datetime(df["date"]).dt.date
+    for col in ("day", "hour"):
+        if col in df.columns:
+            df[col] = df[col].astype("int32")
+    if "email_domain" in df.columns and "email" in df.columns:
+        df["email_domain"] = email_domains(df["email"])
+    return df
@@ -0,0 +1,321 @@
+"""Auditorias concluídas guardadas em disco, para reabrir sem o CSV.
+
+Cada auditoria vira um diretório ``<raiz>/<chave>/``:
+
+- ``manifest.json``: versão do esquema e da biblioteca, configuração,
+  impressão digital da entrada, resumo de suspeitas, relatório (o mesmo do
+  ``audit``), regras declaradas (``rules.py``) e o índice de tabelas e vetores;
+- uma tabela Parquet por DataFrame (``base``, ``hourly``, ...), lida só
+  quando pedida, com leitura por colunas;
+- um ``.npy`` por vetor alinhado à base (máscara limpa, códigos de e-mail,
+  lotes), aberto com ``mmap``.
+
+A chave combina a impressão digital da entrada, a configuração, o conteúdo
+dos arquivos de regras e domínios e a versão da biblioteca, então a mesma
+auditoria salva duas vezes ocupa um único diretório e editar um arquivo de
+regras (ou atualizar a biblioteca) não reaproveita um resultado antigo. Um esquema de
+versão diferente não é lido (``StoreError``); refaça a auditoria.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from functools import cached_property
+from hashlib import sha256
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import Any, Mapping
+
+import numpy as np
+import pandas as pd
+
+from . import __version__
+from .coburst import CoBurstGraph
+from .config import AuditConfig
+from .email_index import EmailIndex
+from .pipeline import AuditArtifacts
+from .profiling import StageTiming
+from .rules import RuleSet
+from .suspicion import SuspicionSummary
+
+SCHEMA_VERSION = 1
+MANIFEST = "manifest.json"
+STORE_ENV = "OSCAR_NOEL_AUDIT_STORE"
+_PARTIAL_PREFIX = ".partial-"
+
+
+class StoreError(ValueError):
+    """Auditoria ausente ou gravada com outro esquema."""
+
+
+def default_root() -> Path:
+    """
+    Diretório padrão das auditorias gravadas: ``$OSCAR_NOEL_AUDIT_STORE`` ou,
+    sem ele, o diretório de dados do usuário (``%LOCALAPPDATA%`` no Windows,
+    ``$XDG_DATA_HOME`` ou ``~/.local/share`` nos demais).
+    """
+    configured = os.environ.get(STORE_ENV)
+    if configured:
+        return Path(configured).expanduser()
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local")
+    else:
+        base = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share")
+    return base / "oscar_noel_audit" / "store"
+
+
+def _file_digests(cfg: AuditConfig) -> dict[str, str | None]:
+    """Hash do conteúdo de cada arquivo de regras/domínios citado na configuração (``None`` se ausente)."""
+    digests: dict[str, str | None] = {}
+    for path in (*cfg.typo_domain_files, *cfg.disposable_domain_files, *cfg.rule_files):
+        try:
+            digests[path] = sha256(Path(path).read_bytes()).hexdigest()
+        except OSError:
+            digests[path] = None
+    return digests
+
+
+def audit_key(input_fingerprint: str, cfg: AuditConfig, options: Mapping[str, Any] | None = None) -> str:
+    """
+    Chave estável de (entrada, configuração, conteúdo dos arquivos de regras e
+    domínios, versão da biblioteca, opções extras como ``merge_spellings``).
+    """
+    settings = json.dumps(
+        {
+            "config": cfg.to_dict(),
+            "files": _file_digests(cfg),
+            "library_version": __version__,
+            "options": dict(options or {}),
+        },
+        sort_keys=True,
+    )
+    return f"{input_fingerprint[:16]}-{sha256(settings.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _write_parquet(df: pd.DataFrame, path: Path) -> dict[str, Any]:
+    try:
+        df.to_parquet(path, index=True)
+    except ImportError as exc:
+        raise ImportError(f"O armazenamento de auditorias precisa de 'pyarrow' instalado: {exc}") from exc
+    return {"file": path.name, "rows": len(df), "columns": [str(c) for c in df.columns]}
+
+
+@dataclass(frozen=True)
+class StoredAudit:
+    """
+    Auditoria gravada. O manifesto já traz resumo e relatório; cada tabela
+    só é lida do disco quando pedida (``table``/``array``/``artifacts``).
+    """
+
+    path: Path
+    manifest: dict[str, Any]
+
+    @property
+    def key(self) -> str:
+        return self.path.name
+
+    @property
+    def name(self) -> str:
+        return self.manifest.get("name") or self.key
+
+    @property
+    def created_at(self) -> str:
+        return self.manifest["created_at"]
+
+    @property
+    def report(self) -> dict[str, Any]:
+        return self.manifest["report"]
+
+    @property
+    def config(self) -> AuditConfig:
+        return AuditConfig.from_dict(self.manifest["config"])
+
+    @property
+    def suspicion_summary(self) -> SuspicionSummary:
+        return SuspicionSummary(**self.manifest["suspicion_summary"])
+
+    def table(self, name: str, columns: list[str] | None = None) -> pd.DataFrame:
+        entry = self.manifest["tables"].get(name)
+        if entry is None:
+            raise StoreError(f"Tabela {name!r} não está na auditoria {self.key}")
+        return pd.read_parquet(self.path / entry["file"], columns=columns)
+
+    def array(self, name: str) -> np.ndarray:
+        entry = self.manifest["arrays"].get(name)
+        if entry is None:
+            raise StoreError(f"Vetor {name!r} não está na auditoria {self.key}")
+        return np.load(self.path / entry, mmap_mode="r")
+
+    @cached_property
+    def artifacts(self) -> AuditArtifacts:
+        """``AuditArtifacts`` completo, lido uma vez."""
+        tables = self.manifest["tables"]
+        email_index = None
+        if "email_index" in tables:
+            email_index = EmailIndex(codes=self.array("email_codes"), table=self.table("email_index"))
+        coburst = None
+        if "coburst_components" in tables:
+            coburst = CoBurstGraph(
+                burst=self.array("coburst_burst"),
+                component=self.array("coburst_component"),
+                components=self.table("coburst_components"),
+            )
+        return AuditArtifacts(
+            base=self.table("base"),
+            cleaned_mask=self.array("cleaned_mask"),
+            hourly=self.table("hourly"),
+            hourly_outliers=self.table("hourly_outliers"),
+            suspicion_summary=self.suspicion_summary,
+            profile=tuple(StageTiming(**t) for t in self.manifest["profile"]),
+            email_index=email_index,
+            coburst=coburst,
+            email_cohorts=self.table("email_cohorts") if "email_cohorts" in tables else None,
+            raw_columns=tuple(self.manifest["raw_columns"]),
+            rules=RuleSet.from_dict(self.manifest["rules"]) if self.manifest.get("rules") else None,
+        )
+
+
+class ArtifactStore:
+    """
+    Diretório de auditorias gravadas (uma por chave; ver ``audit_key``), por
+    padrão ``default_root()``. Com ``max_audits``, as mais antigas saem
+    quando o limite é passado.
+    """
+
+    def __init__(self, root: str | Path | None = None, max_audits: int | None = None) -> None:
+        self.root = Path(root) if root is not None else default_root()
+        self.max_audits = max_audits
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def save(
+        self,
+        artifacts: AuditArtifacts,
+        cfg: AuditConfig,
+        input_fingerprint: str | None = None,
+        name: str | None = None,
+        options: Mapping[str, Any] | None = None,
+        extra_tables: Mapping[str, pd.DataFrame] | None = None,
+    ) -> StoredAudit:
+        """
+        Grava ``artifacts`` e devolve a auditoria gravada. Sem
+        ``input_fingerprint``, usa o hash do conteúdo da entrada. Se a chave
+        já tem uma auditoria legível (mesma entrada, configuração, regras e
+        versão), ela é devolvida sem regravar.
+        """
+        from .report import audit_report
+        from .io import frame_fingerprint
+
+        if input_fingerprint is None:
+            input_fingerprint = frame_fingerprint(artifacts.raw)
+        key = audit_key(input_fingerprint, cfg, options)
+        try:
+            return self.open(key)
+        except StoreError:
+            pass
+
+        tables = {
+            "base": artifacts.base,
+            "hourly": artifacts.hourly,
+            "hourly_outliers": artifacts.hourly_outliers,
+        }
+        arrays = {"cleaned_mask": artifacts.cleaned_mask}
+        if artifacts.email_cohorts is not None:
+            tables["email_cohorts"] = artifacts.email_cohorts
+        if artifacts.email_index is not None:
+            tables["email_index"] = artifacts.email_index.table
+            arrays["email_codes"] = artifacts.email_index.codes
+        if artifacts.coburst is not None:
+            tables["coburst_components"] = artifacts.coburst.components
+            arrays["coburst_burst"] = artifacts.coburst.burst
+            arrays["coburst_component"] = artifacts.coburst.component
+        tables.update(extra_tables or {})
+
+        # Written next to the final directory and renamed, so readers never see half an audit
+        partial = Path(tempfile.mkdtemp(prefix=_PARTIAL_PREFIX, dir=self.root))
+        try:
+            manifest: dict[str, Any] = {
+                "schema_version": SCHEMA_VERSION,
+                "library_version": __version__,
+                "created_at": datetime.now().isoformat(timespec="seconds"),
+                "name": name,
+                "input_fingerprint": input_fingerprint,
+                "options": dict(options or {}),
+                "config": cfg.to_dict(),
+                "raw_columns": list(artifacts.raw_columns),
+                "rules": artifacts.rules.to_dict() if artifacts.rules is not None else None,
+                "suspicion_summary": asdict(artifacts.suspicion_summary),
+                "profile": [asdict(t) for t in artifacts.profile],
+                "report": audit_report(artifacts, cfg),
+                "tables": {t: _write_parquet(df, partial / f"{t}.parquet") for t, df in tables.items()},
+                "arrays": {},
+            }
+            for array_name, values in arrays.items():
+                np.save(partial / f"{array_name}.npy", np.asarray(values))
+                manifest["arrays"][array_name] = f"{array_name}.npy"
+            (partial / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+
+            target = self.root / key
+            try:
+                os.replace(partial, target)
+            except OSError:
+                try:
+                    # A concurrent save of the same key got there first
+                    stored = self.open(key)
+                except StoreError:
+                    # Unreadable leftover (old schema, interrupted copy): moved aside, then swapped
+                    stale = Path(tempfile.mkdtemp(prefix=_PARTIAL_PREFIX, dir=self.root))
+                    os.replace(target, stale / key)
+                    os.replace(partial, target)
+                    shutil.rmtree(stale, ignore_errors=True)
+                else:
+                    shutil.rmtree(partial, ignore_errors=True)
+                    return stored
+        except BaseException:
+            shutil.rmtree(partial, ignore_errors=True)
+            raise
+        if self.max_audits is not None:
+            others = [audit for audit in self.audits() if audit.path != target]
+            for old in others[max(self.max_audits - 1, 0) :]:
+                shutil.rmtree(old.path, ignore_errors=True)
+        return StoredAudit(path=target, manifest=manifest)
+
+    def open(self, key: str) -> StoredAudit:
+        manifest_path = self.root / key / MANIFEST
+        if not manifest_path.is_file():
+            raise StoreError(f"Auditoria {key!r} não encontrada em {self.root}")
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        if manifest.get("schema_version") != SCHEMA_VERSION:
+            raise StoreError(
+                f"Auditoria {key!r} gravada com o esquema {manifest.get('schema_version')}; "
+                f"esta versão lê o esquema {SCHEMA_VERSION}. Refaça a auditoria."
+            )
+        return StoredAudit(path=manifest_path.parent, manifest=manifest)
+
+    def find(
+        self, input_fingerprint: str, cfg: AuditConfig, options: Mapping[str, Any] | None = None
+    ) -> StoredAudit | None:
+        """A auditoria gravada para esta entrada e configuração, se houver (e legível)."""
+        try:
+            return self.open(audit_key(input_fingerprint, cfg, options))
+        except StoreError:
+            return None
+
+    def audits(self) -> list[StoredAudit]:
+        """Auditorias legíveis, da mais recente para a mais antiga."""
+        found = []
+        for path in self.root.iterdir():
+            if path.is_dir() and not path.name.startswith(_PARTIAL_PREFIX):
+                try:
+                    found.append(self.open(path.name))
+                except (StoreError, json.JSONDecodeError):
+                    continue
+        # Same-second saves are told apart by the manifest mtime
+        return sorted(
+            found, key=lambda audit: (audit.created_at, (audit.path / MANIFEST).stat().st_mtime_ns), reverse=True
+        )
+
+    def remove(self, key: str) -> None:
+        shutil.rmtree(self.open(key).path)
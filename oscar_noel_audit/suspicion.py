@@ -6,6 +6,9 @@ import numpy as np
 import pandas as pd
 
 from .config import AuditConfig
+from .domains import domain_flags
+from .email_index import EmailIndex
+from .profiling import StageProfiler, profile_stage
 
 
 @dataclass(frozen=True)
@@ -14,56 +17,135 @@ class SuspicionSummary:
     per_choice_short_deltas: int
     night_votes: int
     suspicious_domains: int
+    disposable_domains: int
     synthetic_email_suffix3: int
     max_votes_same_email: int
-
-
-def flag_suspicious_votes(raw_enriched: pd.DataFrame, cfg: AuditConfig) -> pd.DataFrame:
-    df = raw_enriched.sort_values("timestamp", kind="mergesort").copy()
-
-    df["delta_prev_seconds"] = df["timestamp"].diff().dt.total_seconds()
-    df["flag_global_short_delta"] = df["delta_prev_seconds"].fillna(np.inf) <= cfg.min_global_delta_seconds
-
-    df["choice_delta_prev_seconds"] = (
-        df.groupby("choice")["timestamp"].diff().dt.total_seconds()
-    )
-    df["flag_choice_short_delta"] = (
-        df["choice_delta_prev_seconds"].fillna(np.inf) <= cfg.min_per_choice_delta_seconds
-    )
-
-    start_h, end_h = cfg.night_hours
-    df["flag_night_vote"] = df["hour"].between(start_h, end_h, inclusive="both")
-
-    df["flag_suspicious_domain_typo"] = df["email"].str.contains(
-        cfg.suspicious_domains_regex, regex=True, na=False
-    )
-
-    df["flag_synthetic_email_suffix3"] = df["email"].apply(
-        lambda e: bool(cfg.suspicious_email_suffix3_regex.match(e))
-    )
+    email_short_gaps: int
+    email_regular_cadence: int
+    regular_cadence_senders: int
+
+
+def flag_suspicious_votes(
+    raw_enriched: pd.DataFrame, cfg: AuditConfig, profiler: StageProfiler | None = None
+) -> pd.DataFrame:
+    n = len(raw_enriched)
+    with profile_stage(profiler, "flags.sort", rows_in=n) as stage:
+        if raw_enriched["timestamp"].is_monotonic_increasing:
+            df = raw_enriched.copy(deep=False)
+        else:
+            df = raw_enriched.sort_values("timestamp", kind="mergesort")
+        stage.rows_out = len(df)
+
+    with profile_stage(profiler, "flags.global_delta", rows_in=n) as stage:
+        df["delta_prev_seconds"] = df["timestamp"].diff().dt.total_seconds()
+        df["flag_global_short_delta"] = df["delta_prev_seconds"].fillna(np.inf) <= cfg.min_global_delta_seconds
+        stage.rows_out = n
+
+    with profile_stage(profiler, "flags.choice_delta", rows_in=n) as stage:
+        df["choice_delta_prev_seconds"] = (
+            df.groupby("choice", observed=True)["timestamp"].diff().dt.total_seconds()
+        )
+        df["flag_choice_short_delta"] = (
+            df["choice_delta_prev_seconds"].fillna(np.inf) <= cfg.min_per_choice_delta_seconds
+        )
+        stage.rows_out = n
+
+    with profile_stage(profiler, "flags.email_gap", rows_in=n) as stage:
+        gaps, regular = _email_gaps(df, cfg)
+        df["email_delta_prev_seconds"] = gaps
+        df["flag_email_short_gap"] = np.nan_to_num(gaps, nan=np.inf) <= cfg.min_email_gap_seconds
+        df["flag_email_regular_cadence"] = regular
+        stage.rows_out = n
+
+    with profile_stage(profiler, "flags.patterns", rows_in=n) as stage:
+        start_h, end_h = cfg.night_hours
+        df["flag_night_vote"] = df["hour"].between(start_h, end_h, inclusive="both")
+
+        # Classified once per distinct domain, broadcast by the categorical code
+        typo, disposable = domain_flags(df["email_domain"], cfg)
+        df["flag_suspicious_domain_typo"] = typo
+        df["flag_disposable_domain"] = disposable
+
+        df["flag_synthetic_email_suffix3"] = df["email"].apply(
+            lambda e: bool(cfg.suspicious_email_suffix3_regex.match(e))
+        )
+        stage.rows_out = n
 
     return df
 
 
-def summarize_suspicion(flags_df: pd.DataFrame) -> SuspicionSummary:
-    email_counts = flags_df["email"].value_counts(dropna=False)
-    max_votes_same_email = int(email_counts.max()) if not email_counts.empty else 0
+def _email_gaps(df: pd.DataFrame, cfg: AuditConfig) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Intervalo até o voto anterior do mesmo e-mail e cadência regular por remetente.
+
+    ``df`` já está em ordem de tempo, então uma ordenação estável pelos códigos
+    do e-mail agrupa cada remetente mantendo a ordem cronológica. Um remetente
+    tem cadência regular quando tem pelo menos ``cadence_min_votes`` votos e o
+    coeficiente de variação dos intervalos é no máximo ``cadence_max_cv``.
+    """
+    codes, uniques = pd.factorize(df["email"])
+    n = len(codes)
+    ts = df["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+
+    gaps_sorted = np.full(n, np.nan)
+    if n > 1:
+        same = sorted_codes[1:] == sorted_codes[:-1]
+        gaps_sorted[1:] = np.where(same, np.diff(ts[order]) / 1e9, np.nan)
+    gaps = np.empty(n)
+    gaps[order] = gaps_sorted
+
+    return gaps, _regular_senders(codes, gaps, len(uniques), cfg)
+
+
+def _regular_senders(codes: np.ndarray, gaps: np.ndarray, n_codes: int, cfg: AuditConfig) -> np.ndarray:
+    """
+    Cadência regular por linha a partir dos intervalos em ordem de tempo.
+    ``bincount`` soma cada remetente na ordem das linhas, então o resultado não
+    depende de como os intervalos foram calculados (sequencial ou por shards).
+    """
+    valid = ~np.isnan(gaps)
+    gap_codes = codes[valid]
+    count = np.bincount(gap_codes, minlength=n_codes)
+    total = np.bincount(gap_codes, weights=gaps[valid], minlength=n_codes)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = total / count
+        var = np.bincount(gap_codes, weights=(gaps[valid] - mean[gap_codes]) ** 2, minlength=n_codes) / count
+        cv = np.where(mean > 0, np.sqrt(var) / mean, 0.0)
+    # count is the number of gaps, i.e. votes - 1
+    regular_sender = (count >= max(cfg.cadence_min_votes - 1, 1)) & (cv <= cfg.cadence_max_cv)
+    return regular_sender[codes]
+
+
+def summarize_suspicion(flags_df: pd.DataFrame, email_index: EmailIndex | None = None) -> SuspicionSummary:
+    if email_index is not None:
+        max_votes_same_email = email_index.max_votes
+    else:
+        email_counts = flags_df["email"].value_counts(dropna=False)
+        max_votes_same_email = int(email_counts.max()) if not email_counts.empty else 0
 
     return SuspicionSummary(
         global_short_deltas=int(flags_df["flag_global_short_delta"].sum()),
         per_choice_short_deltas=int(flags_df["flag_choice_short_delta"].sum()),
         night_votes=int(flags_df["flag_night_vote"].sum()),
         suspicious_domains=int(flags_df["flag_suspicious_domain_typo"].sum()),
+        disposable_domains=int(flags_df["flag_disposable_domain"].sum()),
         synthetic_email_suffix3=int(flags_df["flag_synthetic_email_suffix3"].sum()),
         max_votes_same_email=max_votes_same_email,
+        email_short_gaps=int(flags_df["flag_email_short_gap"].sum()),
+        email_regular_cadence=int(flags_df["flag_email_regular_cadence"].sum()),
+        regular_cadence_senders=(
+            email_index.unique_count(flags_df["flag_email_regular_cadence"])
+            if email_index is not None
+            else int(flags_df.loc[flags_df["flag_email_regular_cadence"], "email"].nunique())
+        ),
     )
 
 
 def hourly_counts(df: pd.DataFrame) -> pd.DataFrame:
-    out = df.copy()
-    out["hour_bucket"] = out["timestamp"].dt.floor("h")
-    g = out.groupby("hour_bucket").size().rename("votes").reset_index()
-    return g
+    buckets = df["timestamp"].dt.floor("h").rename("hour_bucket")
+    return df.groupby(buckets).size().rename("votes").reset_index()
 
 
 def detect_hourly_outliers(hourly: pd.DataFrame, z_thresh: float = 3.5) -> pd.DataFrame:
@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+FORMS_COLUMNS = {
+    "timestamp": "Carimbo de data/hora",
+    "email": "Endereço de e-mail",
+    "choice": "Qual o seu Noel favorito?",
+}
+
+FIRST_NAMES = (
+    "ana", "bruno", "carla", "daniel", "eduarda", "felipe", "gabriela", "henrique",
+    "isabela", "joao", "julia", "lucas", "mariana", "mateus", "natalia", "pedro",
+    "rafaela", "rodrigo", "sofia", "thiago", "vanessa", "vinicius", "yasmin", "leticia",
+)
+LAST_NAMES = (
+    "silva", "santos", "oliveira", "souza", "rodrigues", "ferreira", "alves", "pereira",
+    "lima", "gomes", "costa", "ribeiro", "martins", "carvalho", "almeida", "lopes",
+    "soares", "fernandes", "vieira", "barbosa", "rocha", "dias", "nascimento", "moreira",
+)
+ORGANIC_DOMAINS = ("gmail.com", "hotmail.com", "yahoo.com.br", "outlook.com", "icloud.com", "uol.com.br")
+ORGANIC_DOMAIN_WEIGHTS = (0.62, 0.16, 0.07, 0.08, 0.04, 0.03)
+TYPO_DOMAINS = ("gmail.cm", "gmail.con", "gmail.comj", "gmal.com", "gmial.com")
+
+# Relative organic traffic per hour of day (quiet overnight, peak in the evening)
+DIURNAL_WEIGHTS = np.array(
+    [0.35, 0.2, 0.12, 0.08, 0.07, 0.1, 0.3, 0.6, 0.9, 1.0, 1.0, 1.05,
+     1.1, 1.05, 1.0, 1.0, 1.05, 1.15, 1.3, 1.45, 1.5, 1.35, 1.0, 0.6]
+)
+
+CAMPAIGN_KINDS = ("suffix3", "plus", "burst", "typo_domain", "repeat_sender")
+
+
+@dataclass(frozen=True)
+class BotCampaign:
+    kind: str
+    share: float
+    choice: int = 0
+    window: tuple[float, float] = (0.0, 1.0)
+    burst_size: int = 20
+    burst_seconds: float = 3.0
+    senders: int = 3
+    name_pool: int = 12
+
+
+@dataclass(frozen=True)
+class ContestSpec:
+    rows: int
+    start: str = "2025-12-10 00:00:00"
+    days: int = 14
+    n_candidates: int = 30
+    organic_repeat_rate: float = 0.05
+    campaigns: tuple[BotCampaign, ...] = field(default_factory=tuple)
+    seed: int = 0
+
+    @staticmethod
+    def default(rows: int, seed: int = 0) -> "ContestSpec":
+        return ContestSpec(
+            rows=rows,
+            seed=seed,
+            campaigns=(
+                BotCampaign("suffix3", share=0.25, choice=0, window=(0.55, 0.85)),
+                BotCampaign("plus", share=0.01, choice=0, window=(0.6, 0.8)),
+                BotCampaign("burst", share=0.05, choice=2, window=(0.3, 0.9)),
+                BotCampaign("typo_domain", share=0.005, choice=0),
+                BotCampaign("repeat_sender", share=0.03, choice=1, window=(0.4, 0.7)),
+            ),
+        )
+
+    def candidate_names(self) -> list[str]:
+        return [
+            f"{FIRST_NAMES[i % len(FIRST_NAMES)].upper()} {LAST_NAMES[(7 * i) % len(LAST_NAMES)].upper()}"
+            f" - SHOPPING {i + 1:02d}"
+            for i in range(self.n_candidates)
+        ]
+
+
+def _person_parts(rng: np.random.Generator, n: int, pool: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+    first = np.asarray(FIRST_NAMES)
+    last = np.asarray(LAST_NAMES)
+    if pool is None:
+        return first[rng.integers(0, len(first), n)], last[rng.integers(0, len(last), n)]
+    idx = rng.integers(0, pool, n)
+    return first[idx % len(first)], last[(idx * 5 + idx // len(first)) % len(last)]
+
+
+def _organic_emails(rng: np.random.Generator, n: int, serial_start: int) -> np.ndarray:
+    first, last = _person_parts(rng, n)
+    style = rng.integers(0, 4, n)
+    # Serials start at five digits so organic addresses never look like the ### bot pattern
+    serial = np.char.mod("%d", np.arange(serial_start, serial_start + n) + 10_000)
+    year = np.char.mod("%d", rng.integers(1960, 2012, n))
+    local = np.select(
+        [style == 0, style == 1, style == 2],
+        [
+            np.char.add(np.char.add(np.char.add(first, "."), last), serial),
+            np.char.add(np.char.add(first, last), np.char.add(year, serial)),
+            np.char.add(np.char.add(np.char.add(first, "_"), serial), last),
+        ],
+        default=np.char.add(np.char.add(first, serial), "x"),
+    )
+    domains = np.asarray(ORGANIC_DOMAINS)[
+        rng.choice(len(ORGANIC_DOMAINS), size=n, p=np.asarray(ORGANIC_DOMAIN_WEIGHTS))
+    ]
+    return np.char.add(np.char.add(local, "@"), domains)
+
+
+def _campaign_emails(rng: np.random.Generator, campaign: BotCampaign, n: int) -> np.ndarray:
+    if campaign.kind == "repeat_sender":
+        senders = np.array([f"voto.rapido{i}@gmail.com" for i in range(max(1, campaign.senders))])
+        return senders[rng.integers(0, len(senders), n)]
+
+    first, last = _person_parts(rng, n, pool=campaign.name_pool)
+    digits = np.char.zfill(np.char.mod("%d", rng.integers(0, 1000, n)), 3)
+    stem = np.char.add(np.char.add(first, "."), last)
+    if campaign.kind == "suffix3":
+        return np.char.add(np.char.add(stem, digits), "@gmail.com")
+    if campaign.kind == "plus":
+        return np.char.add(np.char.add(np.char.add(stem, "+"), digits), "@gmail.com")
+    if campaign.kind == "typo_domain":
+        domains = np.asarray(TYPO_DOMAINS)[rng.integers(0, len(TYPO_DOMAINS), n)]
+        return np.char.add(np.char.add(stem, "@"), domains)
+    if campaign.kind == "burst":
+        tag = np.char.mod("%d", rng.integers(0, 10**6, n))
+        return np.char.add(np.char.add(np.char.add(first, last), tag), "@hotmail.com")
+    raise ValueError(f"Tipo de campanha desconhecido: {campaign.kind!r}. Disponíveis: {list(CAMPAIGN_KINDS)}")
+
+
+def _chunk_times(
+    rng: np.random.Generator, n: int, t0_ns: int, t1_ns: int
+) -> np.ndarray:
+    hour_ns = 3_600 * 10**9
+    edges = np.arange(t0_ns - t0_ns % hour_ns, t1_ns + hour_ns, hour_ns)
+    lo = np.maximum(edges[:-1], t0_ns)
+    hi = np.minimum(edges[1:], t1_ns)
+    hours = pd.to_datetime(lo).hour.to_numpy()
+    weights = DIURNAL_WEIGHTS[hours] * np.maximum(hi - lo, 0)
+    bins = rng.choice(len(lo), size=n, p=weights / weights.sum())
+    offsets = (rng.random(n) * (hi[bins] - lo[bins])).astype(np.int64)
+    # Form exports carry whole seconds
+    ts = lo[bins] + offsets
+    return np.sort(ts - ts % 10**9)
+
+
+def generate_votes(spec: ContestSpec, chunk_rows: int = 1_000_000) -> Iterator[pd.DataFrame]:
+    """
+    Gera uma exportação sintética em ordem cronológica, em blocos de até
+    ``chunk_rows`` linhas, já no formato normalizado (timestamp/email/choice).
+    Tráfego orgânico segue um perfil diurno e escolha com cauda Zipf; cada
+    campanha de bot ocupa ``share`` das linhas dentro da sua janela de tempo.
+    """
+    rng = np.random.default_rng(spec.seed)
+    candidates = np.asarray(spec.candidate_names())
+    zipf = 1.0 / np.arange(1, spec.n_candidates + 1) ** 1.1
+    zipf = zipf / zipf.sum()
+
+    start_ns = pd.Timestamp(spec.start).value
+    span_ns = spec.days * 86_400 * 10**9
+    n_chunks = max(1, -(-spec.rows // chunk_rows))
+    serial = 0
+    recent_emails = np.array([], dtype=object)
+
+    for k in range(n_chunks):
+        n = spec.rows * (k + 1) // n_chunks - spec.rows * k // n_chunks
+        t0 = start_ns + span_ns * k // n_chunks
+        t1 = start_ns + span_ns * (k + 1) // n_chunks
+        ts = _chunk_times(rng, n, t0, t1)
+        frac = (ts - start_ns) / span_ns
+
+        # Source per row: 0 = organic, i + 1 = campaign i (only inside its window)
+        intensity = np.zeros((n, len(spec.campaigns) + 1))
+        for i, c in enumerate(spec.campaigns):
+            width = max(c.window[1] - c.window[0], 1e-9)
+            inside = (frac >= c.window[0]) & (frac < c.window[1])
+            intensity[:, i + 1] = np.where(inside, min(c.share / width, 1.0), 0.0)
+        intensity[:, 0] = np.clip(1.0 - intensity[:, 1:].sum(axis=1), 0.0, None)
+        cdf = np.cumsum(intensity, axis=1)
+        source = (rng.random(n)[:, None] * cdf[:, -1:] > cdf).sum(axis=1)
+
+        emails = np.empty(n, dtype=object)
+        choices = np.empty(n, dtype=np.int64)
+
+        organic = np.flatnonzero(source == 0)
+        emails[organic] = _organic_emails(rng, len(organic), serial)
+        serial += len(organic)
+        repeat = organic[rng.random(len(organic)) < spec.organic_repeat_rate]
+        pool = np.concatenate([recent_emails, emails[organic]])
+        if len(repeat) and len(pool):
+            emails[repeat] = pool[rng.integers(0, len(pool), len(repeat))]
+        choices[organic] = rng.choice(spec.n_candidates, size=len(organic), p=zipf)
+
+        for i, c in enumerate(spec.campaigns):
+            rows = np.flatnonzero(source == i + 1)
+            if not len(rows):
+                continue
+            emails[rows] = _campaign_emails(rng, c, len(rows))
+            choices[rows] = c.choice % spec.n_candidates
+            if c.kind == "burst":
+                # Snap consecutive campaign rows onto bursts of a few seconds
+                group_start = ts[rows[:: max(1, c.burst_size)]]
+                groups = np.arange(len(rows)) // max(1, c.burst_size)
+                jitter = rng.integers(0, int(c.burst_seconds) + 1, len(rows)) * 10**9
+                last_second = (t1 - 1) - (t1 - 1) % 10**9
+                ts[rows] = np.minimum(group_start[groups] + jitter, last_second)
+
+        order = np.argsort(ts, kind="mergesort")
+        recent_emails = emails[organic[-10_000:]] if len(organic) else recent_emails
+        yield pd.DataFrame(
+            {
+                "timestamp": pd.to_datetime(ts[order]),
+                "email": emails[order].astype(str),
+                "choice": candidates[choices[order]],
+            }
+        )
+
+
+def to_forms_export(votes: pd.DataFrame) -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            FORMS_COLUMNS["timestamp"]: votes["timestamp"].dt.strftime("%d/%m/%Y %H:%M:%S"),
+            FORMS_COLUMNS["email"]: votes["email"],
+            FORMS_COLUMNS["choice"]: votes["choice"],
+        }
+    )
+
+
+def write_forms_csv(spec: ContestSpec, path: str | Path, chunk_rows: int = 1_000_000) -> Path:
+    path = Path(path)
+    for k, chunk in enumerate(generate_votes(spec, chunk_rows=chunk_rows)):
+        to_forms_export(chunk).to_csv(path, mode="w" if k == 0 else "a", header=k == 0, index=False)
+    return path
@@ -0,0 +1,123 @@
+"""Ranking em qualquer instante ou intervalo, sem refiltrar a base.
+
+O índice guarda, para cada candidato, os timestamps dos votos mantidos em
+ordem. A contagem acumulada de um candidato num instante é a posição do
+instante nesse vetor (``searchsorted``), então o ranking em ``t`` custa uma
+busca binária por candidato e a série de evolução inteira sai com uma
+chamada vetorizada por candidato.
+
+A dedupe dos cenários fica com o primeiro voto de cada e-mail; os votos
+mantidos até ``t`` são os mesmos que a auditoria daria só com os dados até
+``t``, e o índice pode ser montado uma vez sobre a base inteira.
+
+Exceção: os sinais são os finais, calculados sobre a base inteira. Uma regra
+de janela (``rules.py``) que filtra o cenário marca também os primeiros votos
+de uma rajada completada depois de ``t``, e eles ficam fora do ranking em
+``t`` (``RuleSet.window_rules`` lista essas regras).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+TimeLike = pd.Timestamp | str | np.datetime64
+
+
+def _ns(instants: Any) -> np.ndarray:
+    return np.asarray(pd.to_datetime(instants), dtype="datetime64[ns]").view("int64")
+
+
+@dataclass(frozen=True)
+class Timeline:
+    choices: pd.Index
+    times: np.ndarray  # int64 ns, grouped by candidate and sorted inside each group
+    offsets: np.ndarray  # candidate i owns times[offsets[i]:offsets[i + 1]]
+
+    @classmethod
+    def from_votes(cls, votes: pd.DataFrame) -> Timeline:
+        """Índice a partir dos votos mantidos (colunas ``timestamp`` e ``choice``)."""
+        # Sorted names: argmax ties then go to the same candidate as in ``ranking``
+        codes, choices = pd.factorize(votes["choice"].astype(str), sort=True)
+        ts = votes["timestamp"].to_numpy(dtype="datetime64[ns]").view("int64")
+        order = np.lexsort((ts, codes))
+        offsets = np.zeros(len(choices) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codes, minlength=len(choices)), out=offsets[1:])
+        return cls(choices=pd.Index(choices, name="choice"), times=ts[order], offsets=offsets)
+
+    @property
+    def total(self) -> int:
+        return len(self.times)
+
+    @property
+    def start(self) -> pd.Timestamp | None:
+        return pd.Timestamp(self.times.min()) if self.total else None
+
+    @property
+    def end(self) -> pd.Timestamp | None:
+        return pd.Timestamp(self.times.max()) if self.total else None
+
+    def counts_at(self, instants: Any, side: str = "right") -> np.ndarray:
+        """Matriz (instantes x candidatos) de votos até cada instante (inclusive, com ``side="right"``)."""
+        points = _ns(instants)
+        out = np.empty((len(points), len(self.choices)), dtype=np.int64)
+        for i in range(len(self.choices)):
+            out[:, i] = np.searchsorted(self.times[self.offsets[i] : self.offsets[i + 1]], points, side=side)
+        return out
+
+    def counts(self, until: TimeLike | None = None, since: TimeLike | None = None) -> pd.Series:
+        """Votos por candidato com ``since <= timestamp <= until`` (limites abertos quando ``None``)."""
+        counts = np.diff(self.offsets)
+        if until is not None:
+            counts = self.counts_at([until])[0]
+        if since is not None:
+            counts = counts - self.counts_at([since], side="left")[0]
+        return pd.Series(counts, index=self.choices, name="votes")
+
+    def ranking(
+        self, until: TimeLike | None = None, since: TimeLike | None = None, top: int | None = None
+    ) -> pd.DataFrame:
+        """Ranking (``rank``, ``choice``, ``votes``, ``share``) no instante ou intervalo pedido."""
+        counts = self.counts(until, since)
+        table = counts[counts > 0].rename_axis("choice").reset_index()
+        table = table.sort_values(["votes", "choice"], ascending=[False, True], kind="mergesort")
+        total = int(table["votes"].sum())
+        table["share"] = table["votes"] / total if total else 0.0
+        table.insert(0, "rank", np.arange(1, len(table) + 1))
+        table = table.reset_index(drop=True)
+        return table if top is None else table.head(top)
+
+    def instants(self, freq: str = "1h") -> pd.DatetimeIndex:
+        """Fins de faixa de ``freq`` cobrindo todo o período (o último inclui o voto final)."""
+        if not self.total:
+            return pd.DatetimeIndex([], dtype="datetime64[ns]")
+        step = pd.Timedelta(freq)
+        first = self.start.floor(freq) + step
+        return pd.date_range(first, self.end.floor(freq) + step, freq=step)
+
+    def evolution(self, freq: str = "1h") -> pd.DataFrame:
+        """Votos acumulados por candidato (colunas) ao fim de cada faixa de ``freq``."""
+        instants = self.instants(freq)
+        return pd.DataFrame(self.counts_at(instants), index=instants, columns=self.choices)
+
+    def evolution_dict(self, freq: str = "1h", top: int = 8) -> dict[str, Any]:
+        """
+        Série compacta para JSON: um vetor de acumulados por candidato (os
+        ``top`` finais mais quem liderou em algum momento), o total e o líder
+        de cada instante.
+        """
+        evolution = self.evolution(freq)
+        counts = evolution.to_numpy()
+        leaders = counts.argmax(axis=1) if counts.size else np.zeros(len(evolution), dtype=np.int64)
+        final = np.diff(self.offsets)
+        keep = set(np.argsort(-final, kind="stable")[:top]) | set(np.unique(leaders).tolist())
+        keep = sorted(keep, key=lambda i: (-final[i], str(self.choices[i])))
+        return {
+            "freq": freq,
+            "times": [t.isoformat() for t in evolution.index],
+            "total": counts.sum(axis=1).tolist(),
+            "leader": [str(self.choices[i]) for i in leaders],
+            "votes": {str(self.choices[i]): counts[:, i].tolist() for i in keep},
+        }
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+from hashlib import sha256
+import os
+from pathlib import Path
+import tempfile
+import time
+
+DEFAULT_ROOT = Path(tempfile.gettempdir()) / "oscar_noel_audit_uploads"
+_PARTIAL_SUFFIX = ".partial"
+
+
+class UploadCache:
+    """
+    Arquivos enviados guardados em disco pelo hash do conteúdo.
+
+    O mesmo CSV sempre vira o mesmo caminho, então caches por caminho (como o
+    ``st.cache_data`` do ``_load_raw``) acertam entre reruns e entre sessões.
+    O diretório é limitado por ``max_bytes``/``max_files``; ao passar do
+    limite, saem os arquivos usados há mais tempo (mtime é atualizado a cada
+    acesso). A escrita é atômica, então processos concorrentes podem dividir
+    o mesmo diretório.
+    """
+
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_ROOT,
+        max_bytes: int = 512 * 2**20,
+        max_files: int = 32,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def path_for(self, digest: str, suffix: str = ".csv") -> Path:
+        return self.root / f"{digest}{suffix}"
+
+    def touch(self, path: str | Path) -> bool:
+        """Marca a entrada como usada agora; ``False`` se ela já saiu do cache."""
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # evicted, possibly by another process
+            return False
+        return True
+
+    def put(self, data: bytes, suffix: str = ".csv") -> Path:
+        path = self.path_for(sha256(data).hexdigest()[:32], suffix)
+        if not self.touch(path):
+            fd, tmp = tempfile.mkstemp(dir=self.root, suffix=_PARTIAL_SUFFIX)
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(data)
+                os.replace(tmp, path)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        self.evict(keep=path)
+        return path
+
+    def entries(self) -> list[Path]:
+        return [p for p in self.root.iterdir() if p.is_file() and not p.name.endswith(_PARTIAL_SUFFIX)]
+
+    def evict(self, keep: Path | None = None) -> list[Path]:
+        """Remove os menos usados até caber nos limites; ``keep`` nunca sai."""
+        files = []
+        for p in self.entries():
+            try:
+                st = p.stat()
+            except FileNotFoundError:  # removed by another process
+                continue
+            files.append((st.st_mtime, st.st_size, p))
+        files.sort()
+
+        total = sum(size for _, size, _ in files)
+        count = len(files)
+        removed = []
+        for _, size, p in files:
+            if total <= self.max_bytes and count <= self.max_files:
+                break
+            if keep is not None and p == keep:
+                continue
+            p.unlink(missing_ok=True)
+            removed.append(p)
+            total -= size
+            count -= 1
+        return removed
+
+    def cleanup(self, max_age_seconds: float = 3600.0) -> None:
+        """Apaga escritas interrompidas (``*.partial``) mais velhas que ``max_age_seconds``."""
+        cutoff = time.time() - max_age_seconds
+        for p in self.root.glob(f"*{_PARTIAL_SUFFIX}"):
+            try:
+                if p.stat().st_mtime < cutoff:
+                    p.unlink()
+            except FileNotFoundError:
+                continue
+
+    def clear(self) -> None:
+        for p in self.root.iterdir():
+            if p.is_file():
+                p.unlink(missing_ok=True)
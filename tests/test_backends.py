@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.io import load_votes_csv
+from oscar_noel_audit.pipeline import AuditArtifacts, build_audit_artifacts
+from oscar_noel_audit.synthetic import ContestSpec, generate_votes, write_forms_csv
+
+
+def _backends() -> list:
+    return [pytest.param("duckdb", id="duckdb")]
+
+
+def _make_backend(name: str):
+    if name == "duckdb":
+        pytest.importorskip("duckdb")
+        from oscar_noel_audit.sql_backend import DuckDBBackend
+
+        return DuckDBBackend(threads=2)
+    raise AssertionError(name)
+
+
+def _assert_same_artifacts(got: AuditArtifacts, expected: AuditArtifacts) -> None:
+    pd.testing.assert_frame_equal(got.flagged_raw, expected.flagged_raw, check_dtype=False)
+    pd.testing.assert_frame_equal(got.cleaned, expected.cleaned, check_dtype=False)
+    pd.testing.assert_frame_equal(got.hourly_outliers, expected.hourly_outliers, check_dtype=False)
+    assert got.suspicion_summary == expected.suspicion_summary
+
+
+@pytest.mark.parametrize("backend_name", _backends())
+def test_backend_matches_pandas_on_frame(backend_name: str) -> None:
+    cfg = AuditConfig.default()
+    votes = pd.concat(generate_votes(ContestSpec.default(4_000, seed=5), chunk_rows=1_000), ignore_index=True)
+    votes = votes.sample(frac=1.0, random_state=0)  # out-of-order export with a shuffled index
+
+    expected = build_audit_artifacts(votes, cfg)
+    got = build_audit_artifacts(votes, cfg, backend=_make_backend(backend_name))
+
+    _assert_same_artifacts(got, expected)
+
+
+@pytest.mark.parametrize("backend_name", _backends())
+def test_backend_matches_pandas_on_csv(backend_name: str, tmp_path: Path) -> None:
+    cfg = AuditConfig.default()
+    path = write_forms_csv(ContestSpec.default(3_000, seed=2), tmp_path / "export.csv", chunk_rows=1_000)
+
+    expected = build_audit_artifacts(load_votes_csv(path), cfg)
+    got = build_audit_artifacts(path, cfg, backend=_make_backend(backend_name))
+
+    _assert_same_artifacts(got, expected)
+    pd.testing.assert_frame_equal(got.raw, load_votes_csv(path), check_dtype=False)
+
+
+@pytest.mark.parametrize("backend_name", _backends())
+def test_backend_keeps_source_labels_when_timestamps_are_missing(backend_name: str) -> None:
+    votes = pd.concat(generate_votes(ContestSpec.default(500, seed=8), chunk_rows=500), ignore_index=True)
+    votes.index = votes.index * 10 + 7
+    votes.loc[votes.index[[0, 3, 50]], "timestamp"] = pd.NaT
+
+    got = build_audit_artifacts(votes, AuditConfig.default(), backend=_make_backend(backend_name))
+
+    assert len(got.base) == len(votes) - 3
+    pd.testing.assert_series_equal(
+        got.base["email"].astype(str), votes.loc[got.base.index, "email"].astype(str), check_names=False
+    )
+
+
+def test_sql_audit_keeps_rows_on_disk_and_counts_in_sql(tmp_path: Path) -> None:
+    pytest.importorskip("duckdb")
+    from oscar_noel_audit.sql_backend import DuckDBBackend
+
+    cfg = AuditConfig.default()
+    path = write_forms_csv(ContestSpec.default(3_000, seed=6), tmp_path / "export.csv", chunk_rows=1_000)
+    expected = build_audit_artifacts(load_votes_csv(path), cfg)
+
+    audit = DuckDBBackend(threads=2, temp_directory=tmp_path / "spill").audit(path, cfg)
+    try:
+        assert audit.path.exists() and audit.suspicion_summary == expected.suspicion_summary
+        assert audit.n_cleaned == len(expected.cleaned)
+        assert audit.cleaned_mask.tolist() == expected.scenario_mask("A").tolist()
+
+        pages = list(audit.pages(columns=["email", "choice", "flag_synthetic_email_suffix3"], page_rows=1_000))
+        assert len(pages) > 1
+        got = pd.concat(pages)
+        pd.testing.assert_frame_equal(got, expected.base[got.columns], check_dtype=False)
+
+        for key, counts in audit.scenario_counts.items():
+            chosen = expected.scenario_votes(key)["choice"].astype(str).value_counts()
+            assert counts.astype(int).to_dict() == chosen.to_dict()
+    finally:
+        audit.remove()
+    assert not audit.path.parent.exists()
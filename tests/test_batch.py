@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+from oscar_noel_audit.batch import jobs_from_manifest, run_batch
+from oscar_noel_audit.cli import main
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def test_run_batch_isolates_failures_and_writes_index(tmp_path: Path) -> None:
+    data = tmp_path / "data"
+    data.mkdir()
+    write_forms_csv(ContestSpec.default(800, seed=1), data / "rj_2025.csv")
+    write_forms_csv(ContestSpec.default(600, seed=2), data / "sp_2025.csv")
+    (data / "sp_2025.config.json").write_text(json.dumps({"excluded_days": []}), encoding="utf-8")
+    (data / "quebrado.csv").write_text("coluna_errada\n1\n", encoding="utf-8")
+    write_forms_csv(ContestSpec.default(300, seed=3), data / "mg_2025.csv")
+    (data / "mg_2025.config.json").write_text('{"excluded_days": [20,', encoding="utf-8")
+
+    jobs = jobs_from_manifest(data)
+    results = run_batch(jobs, tmp_path / "out", workers=2)
+
+    by_name = {r.name: r for r in results}
+    assert [r.name for r in results] == ["mg_2025", "quebrado", "rj_2025", "sp_2025"]
+    assert by_name["mg_2025"].status == "erro" and "mg_2025.config.json" in by_name["mg_2025"].error
+    assert by_name["quebrado"].status == "erro"
+    assert by_name["quebrado"].error_type == "SchemaError"
+    assert by_name["rj_2025"].status == "ok" and by_name["rj_2025"].rows == 800
+    summary = json.loads((tmp_path / "out" / "sp_2025" / "summary.json").read_text(encoding="utf-8"))
+    assert summary["config"]["excluded_days"] == []
+    assert summary["counts"]["after_excluded_days"] == 600
+
+    index = json.loads((tmp_path / "out" / "index.json").read_text(encoding="utf-8"))
+    assert (index["ok"], index["failed"]) == (2, 2)
+
+
+def test_jobs_from_manifest_merges_defaults(tmp_path: Path) -> None:
+    manifest = tmp_path / "contests.json"
+    manifest.write_text(
+        json.dumps(
+            {
+                "defaults": {"excluded_days": [20], "min_global_delta_seconds": 1},
+                "contests": [
+                    {"name": "a", "csv": "a.csv"},
+                    {"name": "b", "csv": "sub/b.csv", "config": {"excluded_days": [1, 2]}},
+                ],
+            }
+        ),
+        encoding="utf-8",
+    )
+
+    jobs = jobs_from_manifest(manifest)
+
+    assert jobs[0].overrides == {"excluded_days": [20], "min_global_delta_seconds": 1}
+    assert jobs[1].overrides["excluded_days"] == [1, 2]
+    assert jobs[1].csv_path == str(tmp_path / "sub" / "b.csv")
+
+
+def test_cli_batch_rejects_invalid_manifests(tmp_path: Path) -> None:
+    manifest = tmp_path / "contests.json"
+    for text in ('{"defaults": {}}', "{ruim", '{"contests": [{"name": "a"}]}'):
+        manifest.write_text(text, encoding="utf-8")
+        assert main(["batch", str(manifest), "--out", str(tmp_path / "out"), "--quiet"]) == 2
+    duplicated = {"contests": [{"name": "a", "csv": "a.csv"}, {"name": "a", "csv": "b.csv"}]}
+    manifest.write_text(json.dumps(duplicated), encoding="utf-8")
+    assert main(["batch", str(manifest), "--out", str(tmp_path / "out"), "--quiet"]) == 2
+    assert main(["batch", str(tmp_path / "missing.json"), "--out", str(tmp_path / "out"), "--quiet"]) == 2
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import pandas as pd
+
+from oscar_noel_audit.candidates import (
+    build_candidate_mapping,
+    canonicalize_choices,
+    censor_choices,
+    censor_name,
+)
+
+
+def test_censor_choices_matches_per_row_censoring() -> None:
+    choices = pd.Series(["MÁRIO ROQUE - SHOPPING X", "ANA - PLAZA", "MÁRIO ROQUE - SHOPPING X"])
+
+    out = censor_choices(choices)
+
+    assert isinstance(out.dtype, pd.CategoricalDtype)
+    assert out.astype(str).tolist() == [censor_name(c) for c in choices]
+    assert censor_name("MÁRIO ROQUE - SHOPPING X") == "M**** R**** - S******* X"
+
+
+def test_candidate_mapping_merges_spellings_before_counting() -> None:
+    choices = pd.Series(
+        ["SAYMON CLAUS - SHOPPING Y"] * 3
+        + ["SAYMON - SHOPPING Y"] * 2
+        + ["Ana  Lima - Plaza"]
+        + ["ANA LIMA - PLAZA"] * 4
+        + ["PEDRO - BOTAFOGO"]
+    )
+
+    mapping = build_candidate_mapping(choices)
+    merged = dict(zip(mapping["choice"], mapping["canonical"]))
+    assert merged["SAYMON - SHOPPING Y"] == "SAYMON CLAUS - SHOPPING Y"
+    assert merged["Ana  Lima - Plaza"] == "ANA LIMA - PLAZA"
+    assert merged["PEDRO - BOTAFOGO"] == "PEDRO - BOTAFOGO"
+
+    counts = canonicalize_choices(choices, mapping).value_counts()
+    assert counts["SAYMON CLAUS - SHOPPING Y"] == 5
+    assert counts["ANA LIMA - PLAZA"] == 5
+    assert len(counts) == 3
+
+
+def test_candidate_mapping_only_suggests_similar_spellings() -> None:
+    choices = pd.Series(["MARIA SOUZA - PLAZA"] * 3 + ["MARIO SOUZA - PLAZA"] * 2)
+
+    mapping = build_candidate_mapping(choices).set_index("choice")
+    assert mapping.loc["MARIO SOUZA - PLAZA", "canonical"] == "MARIO SOUZA - PLAZA"
+    assert mapping.loc["MARIO SOUZA - PLAZA", "method"] == "sugestao"
+    assert mapping.loc["MARIO SOUZA - PLAZA", "suggestion"] == "MARIA SOUZA - PLAZA"
+    assert len(canonicalize_choices(choices).value_counts()) == 2
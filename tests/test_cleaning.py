@@ -4,6 +4,8 @@ import pandas as pd
 
 from oscar_noel_audit.config import AuditConfig
 from oscar_noel_audit.cleaning import apply_user_rules
+from oscar_noel_audit.pipeline import build_audit_artifacts
+from oscar_noel_audit.synthetic import ContestSpec, generate_votes
 
 
 def test_apply_user_rules_excludes_days_and_dedupes() -> None:
@@ -50,3 +52,19 @@ def test_apply_user_rules_filters_plus_pattern() -> None:
     cleaned, _ = apply_user_rules(df, cfg)
     assert cleaned["email"].tolist() == ["ok@x.com"]
 
+
+def test_pipeline_keeps_cleaned_as_mask_over_base() -> None:
+    cfg = AuditConfig.default()
+    votes = pd.concat(generate_votes(ContestSpec.default(2_000, seed=4)), ignore_index=True)
+    votes = votes.sample(frac=1.0, random_state=0)
+    columns = list(votes.columns)
+
+    artifacts = build_audit_artifacts(votes, cfg)
+    expected, _ = apply_user_rules(votes, cfg)
+
+    assert list(votes.columns) == columns  # input left untouched
+    assert artifacts.raw is votes
+    assert artifacts.n_cleaned == len(expected)
+    pd.testing.assert_frame_equal(artifacts.cleaned, expected)
+    assert artifacts.base["timestamp"].is_monotonic_increasing
+    assert artifacts.scenario_votes("A")["email"].tolist() == expected["email"].tolist()
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from oscar_noel_audit.cli import main
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def test_cli_audit_writes_summary_rankings_and_flags(tmp_path: Path) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(1_500, seed=4), tmp_path / "export.csv")
+    out_dir = tmp_path / "out"
+
+    code = main(["audit", str(csv_path), "--out", str(out_dir), "--format", "csv", "--night", "1-4", "--quiet"])
+
+    assert code == 0
+    summary = json.loads((out_dir / "summary.json").read_text(encoding="utf-8"))
+    rankings = json.loads((out_dir / "rankings.json").read_text(encoding="utf-8"))
+    assert summary["config"]["night_hours"] == [1, 4]
+    assert summary["counts"]["raw"] == 1_500
+    assert set(rankings) == {"A", "B", "C"}
+    assert rankings["A"]["total"] == summary["counts"]["cleaned"]
+    flags_header = (out_dir / "flags.csv").read_text(encoding="utf-8").splitlines()[0]
+    assert "email_hash" in flags_header and ",email," not in flags_header
+
+
+def test_cli_missing_file_returns_error_code(tmp_path: Path) -> None:
+    assert main(["audit", str(tmp_path / "missing.csv"), "--out", str(tmp_path), "--quiet"]) == 2
+
+
+def test_cli_duckdb_errors_return_error_code(tmp_path: Path) -> None:
+    pytest.importorskip("duckdb")
+    bad = tmp_path / "ruim.csv"
+    bad.write_text("Carimbo de data/hora,Endereço de e-mail,Qual o seu Noel favorito?\n\"aberto,x\n", encoding="utf-8")
+
+    for path in (tmp_path / "missing.csv", bad):
+        assert main(["audit", str(path), "--backend", "duckdb", "--out", str(tmp_path), "--quiet"]) == 2
+
+
+def test_cli_duckdb_backend_matches_pandas_outputs(tmp_path: Path) -> None:
+    pytest.importorskip("duckdb")
+    csv_path = write_forms_csv(ContestSpec.default(1_500, seed=4), tmp_path / "export.csv")
+
+    outputs = {}
+    for backend in ("pandas", "duckdb"):
+        out_dir = tmp_path / backend
+        assert main(["audit", str(csv_path), "--backend", backend, "--out", str(out_dir), "--format", "json", "--quiet"]) == 0
+        outputs[backend] = [
+            json.loads((out_dir / name).read_text(encoding="utf-8")) for name in ("rankings.json", "flags.json")
+        ]
+        outputs[backend].append(json.loads((out_dir / "summary.json").read_text(encoding="utf-8"))["counts"])
+
+    assert outputs["duckdb"] == outputs["pandas"]
+
+
+def test_cli_startup_does_not_import_pandas() -> None:
+    code = (
+        "import sys, runpy; sys.argv = ['x', '--help']\n"
+        "try:\n    runpy.run_module('oscar_noel_audit', run_name='__main__')\n"
+        "except SystemExit:\n    pass\n"
+        "print('pandas' in sys.modules)"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "False"
+
+
+def test_cli_diff_writes_counts_and_hashed_changes(tmp_path: Path) -> None:
+    old_path = write_forms_csv(ContestSpec.default(800, seed=2), tmp_path / "old.csv")
+    lines = old_path.read_text(encoding="utf-8").splitlines()
+    new_path = tmp_path / "new.csv"
+    new_path.write_text("\n".join(lines[:-3]) + "\n", encoding="utf-8")
+    out_dir = tmp_path / "diff"
+
+    assert main(["diff", str(old_path), str(new_path), "--out", str(out_dir), "--quiet"]) == 0
+    report = json.loads((out_dir / "diff.json").read_text(encoding="utf-8"))
+    changes = json.loads((out_dir / "changes.json").read_text(encoding="utf-8"))
+    assert report["changes"] == {"added": 0, "removed": 3, "modified": 0}
+    assert [row["change"] for row in changes] == ["removed"] * 3
+    assert all("email" not in row and row["email_hash"] for row in changes)
+    for freq in ("xyz", "0h"):
+        assert main(["diff", str(old_path), str(new_path), "--out", str(out_dir), "--freq", freq, "--quiet"]) == 2
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.coburst import build_coburst_graph, connected_components
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.pipeline import build_audit_artifacts
+
+
+def test_connected_components_match_sequential_union_find() -> None:
+    rng = np.random.default_rng(7)
+    n = 200
+    u = rng.integers(0, n, 150)
+    v = rng.integers(0, n, 150)
+
+    parent = list(range(n))
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            x = parent[x]
+        return x
+
+    for a, b in zip(u, v):
+        ra, rb = find(int(a)), find(int(b))
+        parent[max(ra, rb)] = min(ra, rb)
+
+    expected = [find(i) for i in range(n)]
+    assert connected_components(n, u, v).tolist() == expected
+
+
+def test_coburst_components_link_repeated_batches() -> None:
+    bots = [f"bot{i}@gmail.com" for i in range(4)]
+    rows = []
+    # The same four addresses fire together twice, hours apart
+    for start in ("2025-12-10 10:00:00", "2025-12-10 15:00:00"):
+        t0 = pd.Timestamp(start)
+        rows += [(t0 + pd.Timedelta(seconds=i), email, "X") for i, email in enumerate(bots)]
+    # A lone batch of other addresses, and scattered organic votes
+    t0 = pd.Timestamp("2025-12-11 09:00:00")
+    rows += [(t0 + pd.Timedelta(seconds=i), f"lote{i}@hotmail.com", "Y") for i in range(4)]
+    rows += [(pd.Timestamp("2025-12-12 12:00:00") + pd.Timedelta(minutes=i), f"p{i}@uol.com.br", "X") for i in range(4)]
+    raw = pd.DataFrame(rows, columns=["timestamp", "email", "choice"])
+
+    cfg = replace(AuditConfig.default(), coburst_window_seconds=2.0, coburst_min_emails=3)
+    artifacts = build_audit_artifacts(raw, cfg)
+    graph = artifacts.coburst
+    assert graph.n_components == 2
+    assert graph.votes == 12
+
+    top = graph.components.iloc[0]
+    assert top["bursts"] == 2
+    assert top["votes"] == 8
+    assert top["emails"] == 4
+    assert top["repeat_emails"] == 4
+    assert top["dominant_choice"] == "X"
+    assert top["span_seconds"] == 5 * 3600 + 3
+    assert top["top_domain"] == "gmail.com"
+
+    lone = graph.components.iloc[1]
+    assert lone["bursts"] == 1
+    assert lone["repeat_emails"] == 0
+    assert lone["max_burst_emails"] == 4
+
+    organic = artifacts.flagged_raw["email"].str.endswith("@uol.com.br").to_numpy()
+    assert (graph.component[organic] == -1).all()
+
+
+def test_coburst_empty_without_batches() -> None:
+    flagged = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2025-12-10 10:00:00", "2025-12-10 11:00:00"]),
+            "email": ["a@x.com", "b@x.com"],
+            "choice": ["X", "X"],
+            "choice_delta_prev_seconds": [np.nan, 3600.0],
+        }
+    )
+    graph = build_coburst_graph(flagged, AuditConfig.default())
+    assert graph.n_components == 0
+    assert graph.components.empty
+    assert graph.burst.tolist() == [-1, -1]
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from dataclasses import replace
+from pathlib import Path
+import re
+
+import pandas as pd
+
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.domains import DomainRegistry, domain_table, edit_neighbours, email_domains
+from oscar_noel_audit.pipeline import build_audit_artifacts
+
+
+def test_registry_matches_most_specific_rule() -> None:
+    registry = DomainRegistry(typo=["gmail.cm"], disposable=["mailinator.com"])
+    assert registry.match("gmail.com") == "provider"
+    assert registry.match("gmail.cm") == "typo"
+    assert registry.match("gmaill.com") == "typo"  # one edit away from gmail.com
+    assert registry.match("ymail.com") == "provider"  # a neighbour, but a real provider
+    assert registry.match("x.mailinator.com") == "disposable"
+    assert registry.match("empresa.com.br") is None
+    assert {"gmail.cm", "gmail.con", "gmail.comj", "gmal.com", "gmial.com"} <= edit_neighbours("gmail.com")
+
+
+def test_country_variants_of_providers_are_not_typos() -> None:
+    registry = DomainRegistry()
+    for domain in ("hotmail.com.ar", "outlook.com.ar", "yahoo.com.ar", "yahoo.com.bo"):
+        assert registry.match(domain) is None
+    for domain in ("hotmal.com.br", "hotmail.com.b", "hotmail.com.brr"):
+        assert registry.match(domain) == "typo"
+
+
+def test_email_domains_is_categorical_over_distinct_domains() -> None:
+    emails = pd.Series(["a@x.com", "b@gmail.com", "a@x.com", "c@sub.y.org"], index=[5, 3, 9, 1])
+    domains = email_domains(emails)
+    assert domains.tolist() == ["x.com", "gmail.com", "x.com", "sub.y.org"]
+    assert list(domains.cat.categories) == ["gmail.com", "sub.y.org", "x.com"]
+    assert domains.index.tolist() == [5, 3, 9, 1]
+
+
+def test_pipeline_flags_domains_from_loadable_lists(tmp_path: Path) -> None:
+    disposable = tmp_path / "descartaveis.txt"
+    disposable.write_text("# provedores temporários\nvotefacil.net\n\n@tempbox.io\n", encoding="utf-8")
+    cfg = replace(
+        AuditConfig.default(),
+        disposable_domain_files=(str(disposable),),
+        suspicious_domains_regex=re.compile(r"@empresa\.xyz$"),
+    )
+    votes = pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2025-12-10 10:00", periods=6, freq="min"),
+            "email": [
+                "ana@gmail.com",
+                "bia@hotmial.com",
+                "caio@votefacil.net",
+                "davi@mx.tempbox.io",
+                "eva@empresa.xyz",
+                "fabio@mailinator.com",
+            ],
+            "choice": ["X"] * 6,
+        }
+    )
+    base = build_audit_artifacts(votes, cfg).base
+    assert base["flag_suspicious_domain_typo"].tolist() == [False, True, False, False, True, False]
+    assert base["flag_disposable_domain"].tolist() == [False, False, True, True, False, True]
+
+    table = domain_table(base, cfg).set_index("domain")
+    assert table.loc["gmail.com", "category"] == "provider"
+    assert table.loc["mx.tempbox.io", "category"] == "disposable"
+    assert table["votes"].sum() == 6 and (table["emails"] == 1).all()
+    assert AuditConfig.from_dict(cfg.to_dict()) == cfg
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.charts import daily_volume, hour_day_matrix, vote_series
+from oscar_noel_audit.cleaning import apply_user_rules
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.downsampling import downsample, lttb_indices
+from oscar_noel_audit.io import frame_fingerprint
+from oscar_noel_audit.suspicion import flag_suspicious_votes
+from oscar_noel_audit.synthetic import ContestSpec, generate_votes
+
+
+def test_lttb_keeps_endpoints_and_extremes() -> None:
+    rng = np.random.default_rng(0)
+    y = rng.normal(size=10_000)
+    y[4_321] = 50.0
+    idx = lttb_indices(np.arange(len(y)), y, 500)
+
+    assert len(idx) == 500
+    assert idx[0] == 0 and idx[-1] == len(y) - 1
+    assert np.all(np.diff(idx) > 0)
+    assert 4_321 in idx
+    assert np.array_equal(lttb_indices(np.arange(10), np.arange(10), 50), np.arange(10))
+
+
+def test_downsample_keeps_flagged_rows() -> None:
+    n = 20_000
+    df = pd.DataFrame({"x": pd.date_range("2025-12-01", periods=n, freq="min"), "votes": np.ones(n)})
+    df["is_outlier"] = False
+    df.loc[[17, 9_999, 19_998], "is_outlier"] = True
+
+    shown = downsample(df, "x", "votes", max_points=300, keep="is_outlier")
+
+    assert len(shown) <= 303
+    assert shown["is_outlier"].sum() == 3
+    assert shown["x"].is_monotonic_increasing
+
+
+def _flagged(rows: int = 3_000) -> pd.DataFrame:
+    raw = pd.concat(list(generate_votes(ContestSpec.default(rows, seed=2))), ignore_index=True)
+    cfg = AuditConfig.default()
+    return flag_suspicious_votes(apply_user_rules(raw, cfg)[1], cfg)
+
+
+def test_chart_tables_match_direct_aggregation() -> None:
+    flagged = _flagged()
+    daily = daily_volume(flagged)
+    date = flagged["timestamp"].dt.date
+    expected = flagged.groupby(date)["email"].nunique()
+    assert daily["unique_emails"].tolist() == expected.tolist()
+    assert int(daily["submissions"].sum()) == len(flagged)
+
+    heat = hour_day_matrix(flagged)
+    assert int(heat.to_numpy().sum()) == len(flagged)
+    assert list(heat.columns) == sorted(set(date))
+
+    series = vote_series(flagged, freq="min", max_points=200)
+    full = vote_series(flagged, freq="min", max_points=None)
+    assert int(full["votes"].sum()) == len(flagged)
+    assert len(series) <= 200 + int(full["is_outlier"].sum())
+    assert set(full.loc[full["is_outlier"], "bucket"]) <= set(series["bucket"])
+
+
+def test_frame_fingerprint_tracks_content() -> None:
+    df = pd.DataFrame({"email": ["a@x.com", "b@x.com"], "choice": ["A", "B"]})
+    assert frame_fingerprint(df) == frame_fingerprint(df.copy())
+    assert frame_fingerprint(df) != frame_fingerprint(df.assign(choice=["A", "A"]))
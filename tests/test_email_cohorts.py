@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.email_cohorts import chi2_sf, cohort_statistics, split_suffixes
+
+
+def test_chi2_sf_matches_critical_values() -> None:
+    # 5% critical values for 8 and 9 degrees of freedom, 1% for 1
+    assert np.allclose(chi2_sf(np.array([15.507]), 8), 0.05, atol=1e-4)
+    assert np.allclose(chi2_sf(np.array([16.919]), 9), 0.05, atol=1e-4)
+    assert np.allclose(chi2_sf(np.array([6.635]), 1), 0.01, atol=1e-4)
+    assert chi2_sf(np.array([0.0]), 9)[0] == 1.0
+
+
+def test_split_suffixes() -> None:
+    parts = split_suffixes(
+        pd.Series(["ana.silva042@gmail.com", "ana.silva+123@gmail.com", "joao@x.com", "2024@x.com", "a1b22@x.com"])
+    )
+    assert parts["stem"].tolist()[:2] == ["ana.silva", "ana.silva"]
+    assert parts["suffix"].tolist()[:2] == ["042", "123"]
+    assert parts["suffix"].isna().tolist()[2:4] == [True, True]
+    assert parts.iloc[4].tolist() == ["a1b", "22"]
+
+
+def test_cohort_statistics_separates_draws_from_serials() -> None:
+    rng = np.random.default_rng(0)
+    n = 400
+    drawn = [f"ana.silva{d:03d}@gmail.com" for d in rng.integers(0, 1000, n)]
+    # People picking birth years: first digit almost always 1 or 2
+    years = [f"joao.souza{y}@gmail.com" for y in rng.integers(1960, 2010, n)]
+    flagged = pd.DataFrame(
+        {
+            "timestamp": pd.Timestamp("2025-12-10 10:00:00") + pd.to_timedelta(np.arange(2 * n), unit="s"),
+            "email": drawn + years,
+            "choice": ["X"] * (2 * n),
+        }
+    )
+
+    table = cohort_statistics(flagged, min_emails=20).set_index("stem")
+    bots, people = table.loc["ana.silva"], table.loc["joao.souza"]
+
+    assert bots["votes"] == n
+    assert bots["suffix_length"] == 3
+    assert bots["uniform_like"]
+    assert 0.7 < bots["collision_ratio"] < 1.3
+    assert bots["emails"] == bots["distinct_suffixes"]
+
+    assert not people["uniform_like"]
+    assert people["p_first_digit"] < 0.01
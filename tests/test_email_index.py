@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.email_index import build_email_index
+from oscar_noel_audit.pipeline import build_audit_artifacts
+from oscar_noel_audit.synthetic import ContestSpec, generate_votes
+
+
+def test_email_index_statistics() -> None:
+    flagged = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                ["2025-12-01 10:00:00", "2025-12-01 10:00:05", "2025-12-01 10:00:06",
+                 "2025-12-01 10:00:30", "2025-12-01 10:01:00"]
+            ),
+            "email": ["a@x.com", "b@x.com", "a@x.com", "a@x.com", "c@x.com"],
+            "choice": ["X", "Y", "X", "Z", "X"],
+        }
+    )
+    index = build_email_index(flagged)
+    a = index.table.loc["a@x.com"]
+
+    assert a["votes"] == 3
+    assert a["first_seen"] == pd.Timestamp("2025-12-01 10:00:00")
+    assert a["last_seen"] == pd.Timestamp("2025-12-01 10:00:30")
+    assert a["distinct_choices"] == 2
+    assert a["dominant_choice"] == "X"
+    assert a["dominant_share"] == 2 / 3
+    assert a["mean_gap_seconds"] == 15.0
+    assert a["min_gap_seconds"] == 6.0
+    assert np.isnan(index.table.loc["b@x.com", "min_gap_seconds"])
+    assert index.duplicates == 2
+    assert index.unique_count(np.array([False, True, True, False, True])) == 3
+    assert index.repeat_senders()["email"].tolist() == ["a@x.com"]
+
+
+def test_email_index_matches_value_counts_on_shuffled_input() -> None:
+    raw = pd.concat(list(generate_votes(ContestSpec.default(4_000, seed=5))), ignore_index=True)
+    shuffled = raw.sample(frac=1.0, random_state=1)
+    index = build_email_index(shuffled)
+
+    expected = shuffled["email"].value_counts()
+    assert index.table["votes"].sort_index().equals(expected.sort_index().rename("votes"))
+    first = shuffled.groupby("email")["timestamp"].min()
+    assert (index.table["first_seen"].sort_index() == first.sort_index()).all()
+    distinct = shuffled.groupby("email")["choice"].nunique()
+    assert (index.table["distinct_choices"].sort_index() == distinct.sort_index()).all()
+
+    artifacts = build_audit_artifacts(raw, AuditConfig.default())
+    assert artifacts.suspicion_summary.max_votes_same_email == int(expected.max())
+    assert len(artifacts.email_index.codes) == len(artifacts.flagged_raw)
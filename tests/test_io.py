@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from oscar_noel_audit.io import compare_snapshots, load_choices_csv, load_votes_csv, snapshot_digest
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def _edited_export(tmp_path: Path) -> tuple[Path, Path]:
+    old_path = write_forms_csv(ContestSpec.default(4_000, seed=8), tmp_path / "segunda.csv")
+    raw = pd.read_csv(old_path)
+    ts_col, email_col, choice_col = raw.columns[:3]
+    # The tail is cut, as in a truncated download, and rows come back reordered
+    edited = raw.drop(index=[3, 1_500]).iloc[:-5]
+    edited.loc[2_000, choice_col] = "Noel Editado"
+    added = raw.iloc[[10]].assign(**{email_col: "novo.voto@gmail.com"})
+    edited = pd.concat([edited, added]).sample(frac=1, random_state=0)
+    new_path = tmp_path / "terca.csv"
+    edited.to_csv(new_path, index=False)
+    return old_path, new_path
+
+
+def test_compare_snapshots_reports_added_removed_and_modified(tmp_path: Path) -> None:
+    old_path, new_path = _edited_export(tmp_path)
+    old = load_votes_csv(old_path)
+    new = load_votes_csv(new_path)
+
+    diff = compare_snapshots(old_path, new_path, chunksize=700)
+
+    assert diff.rows_old == len(old) and diff.rows_new == len(new)
+    assert diff.added["email"].tolist() == ["novo.voto@gmail.com"]
+    assert len(diff.removed) == 2 + 5
+    assert diff.modified["choice_new"].tolist() == ["Noel Editado"]
+    assert diff.modified["choice_old"].tolist() == [old.loc[2_000, "choice"]]
+    assert len(diff.removed) - len(diff.added) == len(old) - len(new)
+    # Only the ranges holding a change were read back
+    touched = pd.concat([diff.added, diff.removed, diff.modified])["timestamp"].dt.floor("1h").unique()
+    assert set(diff.ranges) == set(touched)
+    # In-memory frames give the same answer
+    in_memory = compare_snapshots(old, new)
+    pd.testing.assert_frame_equal(in_memory.table(), diff.table())
+
+
+def test_identical_exports_stop_at_the_root_digest(tmp_path: Path) -> None:
+    path = write_forms_csv(ContestSpec.default(1_000, seed=1), tmp_path / "export.csv")
+    shuffled = pd.read_csv(path).sample(frac=1, random_state=2)
+    copy = tmp_path / "copia.csv"
+    shuffled.to_csv(copy, index=False)
+
+    assert snapshot_digest(path).root == snapshot_digest(copy, chunksize=100).root
+    diff = compare_snapshots(path, copy)
+    assert diff.identical
+    assert diff.table().empty
+
+
+def test_digest_rollup_matches_a_coarser_digest(tmp_path: Path) -> None:
+    votes = load_votes_csv(write_forms_csv(ContestSpec.default(2_000, seed=5), tmp_path / "export.csv"))
+    hourly = snapshot_digest(votes, freq="1h")
+    daily = snapshot_digest(votes, freq="1D")
+
+    pd.testing.assert_frame_equal(hourly.rollup("1D").table, daily.table)
+    assert hourly.rows == len(votes)
+
+
+def test_load_choices_csv_matches_full_load(tmp_path: Path) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(2_000, seed=4), tmp_path / "export.csv")
+    raw = pd.read_csv(csv_path)
+    raw.iloc[5, 0] = "não é data"
+    raw.to_csv(csv_path, index=False)
+
+    pd.testing.assert_series_equal(load_choices_csv(csv_path), load_votes_csv(csv_path)["choice"])
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.origins import analyze_origins, find_origin_columns, ip_prefixes, window_counts
+
+
+def test_ip_prefixes() -> None:
+    ips = pd.Series([" 10.1.2.3", "10.1.2.200", "10.1.9.9", "2001:db8::1", "10.0.0.300", "junk", None])
+
+    prefixes = ip_prefixes(ips, 24)
+    assert prefixes[:6].tolist() == [
+        "10.1.2.0/24",
+        "10.1.2.0/24",
+        "10.1.9.0/24",
+        "2001:db8::/64",
+        "10.0.0.300",
+        "junk",
+    ]
+    assert pd.isna(prefixes[6])
+    assert ip_prefixes(ips, 16).tolist()[:3] == ["10.1.0.0/16"] * 3
+
+
+def test_window_counts_match_brute_force() -> None:
+    rng = np.random.default_rng(3)
+    codes = rng.integers(0, 5, size=300)
+    ts = rng.integers(0, 600, size=300).astype(np.int64) * 10**9
+
+    counts = window_counts(codes, ts, 30)
+    expected = [
+        int(np.sum((codes == c) & (ts >= t) & (ts <= t + 30 * 10**9))) for c, t in zip(codes, ts)
+    ]
+    assert counts.tolist() == expected
+
+
+def test_analyze_origins_levels() -> None:
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                ["2025-12-01 10:00:00", "2025-12-01 10:00:10", "2025-12-01 10:00:20",
+                 "2025-12-01 12:00:00", "2025-12-01 12:00:05"]
+            ),
+            "email": ["a@x.com", "b@x.com", "c@x.com", "d@x.com", "d@x.com"],
+            "choice": ["X", "X", "X", "Y", "Z"],
+            "IP": ["10.0.0.1", "10.0.0.2", "10.0.0.2", "192.168.1.1", "192.168.1.1"],
+            "user_agent": ["bot", "bot", "bot", "firefox", "chrome"],
+        }
+    )
+    assert find_origin_columns(df).available == ["IP", "user_agent"]
+
+    clusters = analyze_origins(df, window_seconds=60)
+    assert set(clusters) == {"ip", "ip/24", "ip/16", "user_agent", "IP+user_agent"}
+
+    subnet = clusters["ip/24"].iloc[0]
+    assert subnet["origin"] == "10.0.0.0/24"
+    assert subnet["votes"] == 3
+    assert subnet["emails"] == 3
+    assert subnet["dominant_choice"] == "X"
+    assert subnet["dominant_share"] == 1.0
+    assert subnet["max_window_votes"] == 3
+
+    assert clusters["ip"]["origin"].tolist() == ["10.0.0.2", "192.168.1.1"]
+    combo = clusters["IP+user_agent"]
+    assert combo["origin"].tolist() == ["10.0.0.2 | bot"]
+    assert combo["emails"].tolist() == [2]
+
+
+def test_analyze_origins_skips_missing_values() -> None:
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2025-12-01 10:00:00", "2025-12-01 10:00:10", "2025-12-01 10:00:20"]),
+            "email": ["a@x.com", "b@x.com", "c@x.com"],
+            "choice": ["X", "X", "Y"],
+            "ip": ["10.0.0.1", "10.0.0.1", "10.0.0.1"],
+            "device": ["mobile", "mobile", None],
+        }
+    )
+    clusters = analyze_origins(df, window_seconds=60)
+    combo = clusters["ip+device"]
+    assert combo["origin"].tolist() == ["10.0.0.1 | mobile"]
+    assert combo["votes"].tolist() == [2]
+    assert clusters["device"]["votes"].tolist() == [2]
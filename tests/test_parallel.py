@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.cleaning import add_basic_features, add_rule_flags, cleaned_mask
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.io import load_votes_csv
+from oscar_noel_audit.parallel import flag_suspicious_votes_parallel, shard_bounds
+from oscar_noel_audit.pipeline import build_audit_artifacts
+from oscar_noel_audit.suspicion import flag_suspicious_votes
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def _raw(tmp_path: Path, n: int, seed: int) -> pd.DataFrame:
+    return load_votes_csv(write_forms_csv(ContestSpec.default(n, seed=seed), tmp_path / f"votos_{seed}.csv"))
+
+
+def _enriched(tmp_path: Path, n: int, seed: int, cfg: AuditConfig) -> pd.DataFrame:
+    raw = _raw(tmp_path, n, seed)
+    return add_rule_flags(add_basic_features(raw), cfg)
+
+
+def test_shards_match_sequential_flags_and_cleaned_mask(tmp_path: Path) -> None:
+    cfg = AuditConfig.default()
+    enriched = _enriched(tmp_path, 3_000, 11, cfg)
+    expected = flag_suspicious_votes(enriched, cfg)
+    expected_mask = cleaned_mask(expected)
+    # Many small shards so repeat senders, candidates and ties cross boundaries
+    for workers, shards in [(1, 1), (1, 17), (2, 5)]:
+        flagged, mask = flag_suspicious_votes_parallel(enriched, cfg, workers=workers, shards=shards)
+        pd.testing.assert_frame_equal(flagged, expected)
+        np.testing.assert_array_equal(mask, expected_mask)
+
+
+def test_shards_handle_unsorted_input_and_tied_timestamps(tmp_path: Path) -> None:
+    cfg = AuditConfig.default()
+    enriched = _enriched(tmp_path, 1_200, 3, cfg)
+    enriched["timestamp"] = enriched["timestamp"].dt.floor("min")
+    shuffled = enriched.sample(frac=1, random_state=0)
+    expected = flag_suspicious_votes(shuffled, cfg)
+    flagged, mask = flag_suspicious_votes_parallel(shuffled, cfg, workers=1, shards=9)
+    pd.testing.assert_frame_equal(flagged, expected)
+    np.testing.assert_array_equal(mask, cleaned_mask(expected))
+
+
+def test_pipeline_workers_give_the_same_artifacts(tmp_path: Path) -> None:
+    cfg = AuditConfig.default()
+    raw = _raw(tmp_path, 2_000, 5)
+    sequential = build_audit_artifacts(raw, cfg)
+    parallel = build_audit_artifacts(raw, cfg, workers=2)
+    pd.testing.assert_frame_equal(parallel.base, sequential.base)
+    np.testing.assert_array_equal(parallel.cleaned_mask, sequential.cleaned_mask)
+    assert parallel.suspicion_summary == sequential.suspicion_summary
+
+
+def test_shard_bounds_cover_every_row_once() -> None:
+    assert shard_bounds(0, 4) == [(0, 0)]
+    assert shard_bounds(3, 8) == [(0, 1), (1, 2), (2, 3)]
+    bounds = shard_bounds(1_001, 4)
+    assert bounds[0][0] == 0 and bounds[-1][1] == 1_001
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
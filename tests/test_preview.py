@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from oscar_noel_audit import AuditConfig, build_audit_artifacts, load_votes_csv
+from oscar_noel_audit.preview import BackgroundAudits, preview_audit, sample_votes_csv
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def test_small_file_preview_is_exact(tmp_path: Path) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(800, seed=2), tmp_path / "concurso.csv")
+    sample = sample_votes_csv(csv_path, n_blocks=100, rows_per_block=10)
+    assert sample.exact and sample.n_blocks == 1 and len(sample.votes) == 800
+
+    cfg = AuditConfig.default()
+    preview = preview_audit(sample, cfg)
+    exact = build_audit_artifacts(load_votes_csv(csv_path), cfg)
+    ranking = preview.ranking("B").set_index("choice")
+    counts = exact.scenario_votes("B")["choice"].value_counts()
+    counts = counts[counts > 0]
+    assert ranking["votes"].to_dict() == {str(k): int(v) for k, v in counts.items()}
+    assert (ranking["share_lo"] == ranking["share"]).all()
+    assert preview.total("B") == (float(counts.sum()), 0.0)
+
+
+def test_block_sample_estimates_cover_full_audit(tmp_path: Path) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(60_000, seed=4), tmp_path / "concurso.csv")
+    sample = sample_votes_csv(csv_path, n_blocks=200, rows_per_block=30)
+    assert len(sample.votes) <= 200 * 30
+    assert abs(sample.estimated_rows - 60_000) < 0.03 * 60_000
+    # Blocks are spread over the whole voting period
+    ts = sample.votes["timestamp"]
+    full = load_votes_csv(csv_path)
+    assert ts.min() - full["timestamp"].min() < (full["timestamp"].max() - full["timestamp"].min()) / 100
+
+    cfg = AuditConfig.default()
+    preview = preview_audit(sample, cfg, ci=0.99)
+    exact = build_audit_artifacts(full, cfg)
+
+    rates = preview.flag_rates().set_index("flag")
+    for flag in ("flag_global_short_delta", "flag_night_vote", "flag_synthetic_email_suffix3"):
+        rate = exact.base[flag].mean()
+        assert rates.loc[flag, "rate_lo"] <= rate <= rates.loc[flag, "rate_hi"]
+        assert not rates.loc[flag, "lower_bound"]
+
+    ranking = preview.ranking("B").set_index("choice").head(3)
+    shares = exact.scenario_votes("B")["choice"].value_counts(normalize=True).rename(index=str)
+    assert ((ranking["share_lo"] <= shares[ranking.index]) & (shares[ranking.index] <= ranking["share_hi"])).all()
+
+    hourly = preview.hourly()
+    assert np.isclose(hourly["votes"].sum(), len(sample.votes) / sample.fraction)
+
+
+def test_background_audits_share_and_cancel_jobs() -> None:
+    jobs = BackgroundAudits(max_workers=1)
+    release = threading.Event()
+
+    running = jobs.submit("a", release.wait)
+    assert jobs.submit("a", release.wait) is running
+    queued = jobs.submit("b", lambda: "b")
+    latest = jobs.submit("c", lambda: "c")
+    assert queued.cancelled()  # superseded before it started
+    release.set()
+    assert running.result(timeout=5) is True
+    assert latest.result(timeout=5) == "c"
+
+    failed = jobs.submit("d", lambda: 1 / 0)
+    failed.exception(timeout=5)
+    retried = jobs.submit("d", lambda: "ok")
+    assert retried is not failed and retried.result(timeout=5) == "ok"
+
+
+def test_background_audits_only_cancel_the_same_session() -> None:
+    jobs = BackgroundAudits(max_workers=1)
+    release = threading.Event()
+    jobs.submit("a", release.wait, session="s1")
+    try:
+        mine = jobs.submit("b", lambda: "b", session="s1")
+        theirs = jobs.submit("c", lambda: "c", session="s2")
+        assert not mine.cancelled()  # s2 asking for "c" leaves s1's job alone
+
+        shared = jobs.submit("d", lambda: "d", session="s1")
+        assert mine.cancelled() and not theirs.cancelled()
+        assert jobs.submit("d", lambda: "d", session="s2") is shared
+        jobs.submit("e", lambda: "e", session="s1")
+        assert not shared.cancelled()  # s2 still waits for it
+    finally:
+        release.set()
+    assert theirs.result(timeout=5) == "c" and shared.result(timeout=5) == "d"
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.cleaning import add_basic_features
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.resampling import bootstrap_counts, bootstrap_scenarios, ranking_counts
+from oscar_noel_audit.scenarios import SCENARIOS, scenario_votes
+from oscar_noel_audit.suspicion import flag_suspicious_votes
+
+
+def _flagged() -> pd.DataFrame:
+    cfg = AuditConfig.default()
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.date_range("2025-12-18 10:00", periods=40, freq="7min"),
+            "email": [f"user{i % 30}@x.com" for i in range(30)]
+            + [f"nome.sobrenome{100 + i}@gmail.com" for i in range(10)],
+            "choice": ["X"] * 12 + ["Y"] * 18 + ["Z"] * 10,
+        }
+    )
+    enriched = add_basic_features(df)
+    enriched["exclude_day"] = enriched["day"].isin(cfg.excluded_days)
+    enriched["suspicious_email_plus_3dig_gmail"] = False
+    return flag_suspicious_votes(enriched, cfg)
+
+
+def test_bootstrap_counts_reports_stability_and_intervals() -> None:
+    counts = pd.Series({"X": 900, "Y": 100, "Z": 95})
+
+    out = bootstrap_counts(counts, n_replicates=500, seed=1)
+
+    table = out.table.set_index("choice")
+    assert table.loc["X", "p_first"] == 1.0
+    assert table.loc["Y", "p_first"] == 0.0
+    assert 2.0 < table.loc["Y", "mean_rank"] < 3.0
+    assert (table["share_lo"] <= table["share"]).all()
+    assert (table["share"] <= table["share_hi"]).all()
+    assert out.winner_margin_ci[0] > 0.6
+
+
+def test_bootstrap_scenarios_point_counts_match_scenario_rules() -> None:
+    flagged = _flagged()
+
+    results = bootstrap_scenarios(flagged, n_replicates=50, seed=3)
+
+    for key, scenario in SCENARIOS.items():
+        expected = ranking_counts(scenario_votes(flagged, scenario))
+        got = results[key].table.set_index("choice")["votes"]
+        assert got.sort_index().to_dict() == expected.sort_index().to_dict()
+        assert np.isclose(results[key].table["p_first"].sum(), 1.0)
+    assert "Z" not in results["B"].table["choice"].tolist()
+
+
+def test_bootstrap_scenarios_spread_matches_multinomial_without_duplicates() -> None:
+    n = 600
+    flagged = pd.DataFrame(
+        {
+            "email": [f"user{i}@x.com" for i in range(n)],
+            "choice": ["X"] * 300 + ["Y"] * 200 + ["Z"] * 100,
+            "exclude_day": False,
+            "suspicious_email_plus_3dig_gmail": False,
+        }
+    )
+
+    scenario = bootstrap_scenarios(flagged, [SCENARIOS["A"]], n_replicates=1000, seed=5)["A"]
+    multinomial = bootstrap_counts(ranking_counts(flagged), n_replicates=1000, seed=5)
+
+    got = scenario.table.set_index("choice")
+    expected = multinomial.table.set_index("choice")
+    width = got["share_hi"] - got["share_lo"]
+    expected_width = expected["share_hi"] - expected["share_lo"]
+    assert np.allclose(width, expected_width.loc[width.index], rtol=0.15)
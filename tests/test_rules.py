@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+from dataclasses import replace
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.io import load_votes_csv
+from oscar_noel_audit.pipeline import build_audit_artifacts
+from oscar_noel_audit.report import audit_report
+from oscar_noel_audit.rules import RuleError, RuleSet, load_rules
+from oscar_noel_audit.scenarios import get_scenario, scenario_mask
+from oscar_noel_audit.store import ArtifactStore
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+RULES_TOML = """
+[[rule]]
+name = "rajada_madrugada"
+description = "3+ votos do mesmo e-mail em 10 min, de madrugada"
+scenarios = ["C"]
+when = { all = [{ flag = "flag_night_vote" }, { window = "10min", by = "email", min_votes = 3 }] }
+
+[[rule]]
+name = "dominio_ou_tarde"
+scenarios = ["B", "C"]
+when = { any = [
+    { field = "email_domain", regex = ['\\.xyz$', 'mailinator'] },
+    { field = "hour", between = [14, 15] },
+] }
+"""
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                [
+                    "2025-12-18 01:00:00",
+                    "2025-12-18 01:04:00",
+                    "2025-12-18 01:09:00",
+                    "2025-12-18 01:30:00",
+                    "2025-12-18 02:00:00",
+                    "2025-12-18 14:00:00",
+                ]
+            ),
+            "email": ["a@x.com", "a@x.com", "a@x.com", "a@x.com", "b@y.xyz", None],
+            "hour": [1, 1, 1, 1, 2, 14],
+            "flag_night_vote": [True, True, True, True, True, False],
+        }
+    )
+
+
+def test_common_subexpressions_are_planned_once() -> None:
+    night = {"flag": "flag_night_vote"}
+    burst = {"window": "10min", "by": "email", "min_votes": 3}
+    rules = RuleSet.from_dicts(
+        [
+            {"name": "a", "when": {"all": [night, burst]}},
+            # Same conjunction, reordered and doubly negated
+            {"name": "b", "when": {"not": {"not": {"all": [burst, {"all": [night]}]}}}},
+            {"name": "c", "when": {"any": [{"rule": "a"}, {"field": "hour", "ge": 14}]}},
+        ]
+    )
+    assert [node[0] for node in rules.plan] == ["flag", "window", "all", "cmp", "any"]
+    assert rules.rules[0].root == rules.rules[1].root
+
+    masks = rules.evaluate(_frame())
+    np.testing.assert_array_equal(masks["flag_rule_a"], [True, True, True, False, False, False])
+    np.testing.assert_array_equal(masks["flag_rule_b"], masks["flag_rule_a"])
+    np.testing.assert_array_equal(masks["flag_rule_c"], [True, True, True, False, False, True])
+
+
+def test_predicates_match_plain_pandas(tmp_path: Path) -> None:
+    raw = load_votes_csv(write_forms_csv(ContestSpec.default(3_000, seed=5), tmp_path / "votos.csv"))
+    base = build_audit_artifacts(raw, AuditConfig.default()).base
+    rules = RuleSet.from_dicts(
+        [
+            {"name": "regex", "when": {"field": "email", "regex": [r"\d{3}@", r"^a"]}},
+            {"name": "choice", "when": {"field": "choice", "in": base["choice"].astype(str).unique()[:2].tolist()}},
+            {"name": "late", "when": {"field": "timestamp", "gt": str(base["timestamp"].median())}},
+            {"name": "gap", "when": {"field": "email_delta_prev_seconds", "lt": 60}},
+        ]
+    )
+    masks = rules.evaluate(base)
+    expected_regex = base["email"].str.contains(r"(?:\d{3}@)|(?:^a)", regex=True).to_numpy(dtype=bool)
+    np.testing.assert_array_equal(masks["flag_rule_regex"], expected_regex)
+    choices = base["choice"].astype(str).unique()[:2]
+    np.testing.assert_array_equal(masks["flag_rule_choice"], base["choice"].astype(str).isin(choices).to_numpy())
+    np.testing.assert_array_equal(
+        masks["flag_rule_late"], (base["timestamp"] > base["timestamp"].median()).to_numpy()
+    )
+    np.testing.assert_array_equal(
+        masks["flag_rule_gap"], (base["email_delta_prev_seconds"] < 60).to_numpy(dtype=bool)
+    )
+
+
+def test_rule_files_flag_votes_and_filter_their_scenarios(tmp_path: Path) -> None:
+    rules_path = tmp_path / "regras.toml"
+    rules_path.write_text(RULES_TOML, encoding="utf-8")
+    assert load_rules(rules_path).columns == ["flag_rule_rajada_madrugada", "flag_rule_dominio_ou_tarde"]
+
+    raw = load_votes_csv(write_forms_csv(ContestSpec.default(3_000, seed=9), tmp_path / "votos.csv"))
+    cfg = replace(AuditConfig.default(), rule_files=(str(rules_path),))
+    artifacts = build_audit_artifacts(raw, cfg)
+    base = artifacts.base
+    assert base["flag_rule_dominio_ou_tarde"].any()
+
+    for key, extra in [("A", ()), ("B", ("flag_rule_dominio_ou_tarde",))]:
+        scenario = get_scenario(key)
+        expected = scenario_mask(base, replace(scenario, exclude_flags=(*scenario.exclude_flags, *extra)))
+        np.testing.assert_array_equal(artifacts.scenario_mask(key), expected)
+    assert not base.loc[artifacts.scenario_mask("C"), "flag_rule_rajada_madrugada"].any()
+
+    report = audit_report(artifacts, cfg)
+    assert report["rules"]["dominio_ou_tarde"]["votes"] == int(base["flag_rule_dominio_ou_tarde"].sum())
+    assert report["rules"]["dominio_ou_tarde"]["scenarios"] == ["B", "C"]
+
+    # The stored audit keeps the rules even after the file is gone
+    saved = ArtifactStore(tmp_path / "store").save(artifacts, cfg)
+    rules_path.unlink()
+    reopened = ArtifactStore(tmp_path / "store").open(saved.key).artifacts
+    np.testing.assert_array_equal(reopened.scenario_mask("B"), artifacts.scenario_mask("B"))
+    assert json.loads(json.dumps(reopened.rules.to_dict())) == artifacts.rules.to_dict()
+
+
+def test_invalid_rules_are_rejected() -> None:
+    with pytest.raises(RuleError, match="Regex inválida"):
+        RuleSet.from_dicts([{"name": "r", "when": {"field": "email", "regex": "("}}])
+    with pytest.raises(RuleError, match="operador"):
+        RuleSet.from_dicts([{"name": "r", "when": {"field": "hour", "like": 3}}])
+    with pytest.raises(RuleError, match="definida antes"):
+        RuleSet.from_dicts([{"name": "r", "when": {"rule": "depois"}}])
+    with pytest.raises(RuleError, match="definida antes"):
+        RuleSet.from_dicts([{"name": "r", "when": {"rule": ["a", "b"]}}])
+    with pytest.raises(RuleError, match="ausente"):
+        RuleSet.from_dicts([{"name": "r", "when": {"flag": "flag_inexistente"}}]).evaluate(_frame())
+
+
+def test_comparisons_use_the_column_type(tmp_path: Path) -> None:
+    frame = _frame().assign(date=lambda df: df["timestamp"].dt.date)
+    rules_path = tmp_path / "datas.toml"
+    rules_path.write_text(
+        '[[rule]]\nname = "dia"\nwhen = { field = "date", eq = 2025-12-18 }\n'
+        '[[rule]]\nname = "antes"\nwhen = { field = "date", lt = "2025-12-19" }\n',
+        encoding="utf-8",
+    )
+    masks = load_rules(rules_path).evaluate(frame)
+    assert masks["flag_rule_dia"].all() and masks["flag_rule_antes"].all()
+
+    for field, value in [("date", 3), ("hour", "14"), ("email", 1), ("timestamp", 5)]:
+        with pytest.raises(RuleError, match="Não foi possível avaliar"):
+            RuleSet.from_dicts([{"name": "r", "when": {"field": field, "eq": value}}]).evaluate(frame)
+
+
+def test_store_key_follows_rule_file_contents(tmp_path: Path) -> None:
+    rules_path = tmp_path / "regras.toml"
+    rules_path.write_text(RULES_TOML, encoding="utf-8")
+    cfg = replace(AuditConfig.default(), rule_files=(str(rules_path),))
+    raw = load_votes_csv(write_forms_csv(ContestSpec.default(600, seed=3), tmp_path / "votos.csv"))
+    store = ArtifactStore(tmp_path / "store")
+    store.save(build_audit_artifacts(raw, cfg), cfg, input_fingerprint="abc")
+    assert store.find("abc", cfg) is not None
+
+    rules_path.write_text(RULES_TOML.replace("min_votes = 3", "min_votes = 4"), encoding="utf-8")
+    assert store.find("abc", cfg) is None
+
+
+def test_window_rules_are_listed_per_scenario() -> None:
+    rules = RuleSet.from_dicts(
+        [
+            {"name": "rajada", "when": {"window": "10min", "min_votes": 3}},
+            {"name": "noite", "scenarios": ["B"], "when": {"flag": "flag_night_vote"}},
+            {"name": "rajada_noite", "scenarios": ["C"], "when": {"all": [{"rule": "rajada"}, {"rule": "noite"}]}},
+        ]
+    )
+    assert rules.window_rules("B") == []
+    assert rules.window_rules("C") == ["rajada_noite"]
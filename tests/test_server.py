@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+import threading
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from oscar_noel_audit.server import ArtifactRegistry, make_server
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def _get(base: str, path: str) -> tuple[int, dict]:
+    try:
+        with urlopen(base + path, timeout=30) as resp:
+            return resp.status, json.loads(resp.read())
+    except HTTPError as exc:
+        return exc.code, json.loads(exc.read())
+
+
+def test_server_answers_concurrent_queries_from_one_audit(tmp_path: Path) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(1_500, seed=6), tmp_path / "concurso.csv")
+    registry = ArtifactRegistry({"concurso": csv_path}, max_artifacts=2)
+    server = make_server(registry, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(lambda _: _get(base, "/ranking?dataset=concurso&scenario=B&top=3"), range(6)))
+        assert {status for status, _ in results} == {200}
+        assert len({json.dumps(body) for _, body in results}) == 1
+        assert len(registry.artifacts) == 1  # audited once for all six requests
+
+        status, scenarios = _get(base, "/scenarios?dataset=concurso")
+        assert status == 200
+        assert scenarios["B"]["votes"] == results[0][1]["total"]
+
+        status, before = _get(base, "/ranking?dataset=concurso&scenario=B&at=2000-01-01")
+        assert status == 200 and before["total"] == 0
+        status, until_end = _get(base, "/ranking?dataset=concurso&scenario=B&at=2100-01-01&top=3")
+        assert until_end["top"] == results[0][1]["top"]
+        assert _get(base, "/ranking?dataset=concurso&at=ontem")[0] == 400
+
+        status, flags = _get(base, "/flags?dataset=concurso&flag=flag_night_vote&limit=5")
+        assert status == 200
+        assert len(flags["rows"]) == min(5, flags["total"])
+        assert all("email" not in row and row["flag_night_vote"] for row in flags["rows"])
+
+        status, series = _get(base, "/timeseries?dataset=concurso&freq=D")
+        assert sum(p["votes"] for p in series["points"]) == 1_500
+
+        # A different config is a different audit
+        _get(base, "/ranking?dataset=concurso&min_global_delta_seconds=0.5")
+        assert len(registry.artifacts) == 2
+
+        assert _get(base, "/ranking?dataset=outro")[0] == 404
+        assert _get(base, "/ranking?dataset=concurso&scenario=Z")[0] == 400
+        assert _get(base, "/nada?dataset=concurso")[0] == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_server_sends_cors_headers_only_to_allowed_origins(tmp_path: Path) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(200, seed=2), tmp_path / "concurso.csv")
+    registry = ArtifactRegistry({"concurso": csv_path})
+    server = make_server(registry, port=0, quiet=True, allow_origins=["http://localhost:3000"])
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def allowed(origin: str) -> str | None:
+        with urlopen(Request(base + "/datasets", headers={"Origin": origin}), timeout=30) as resp:
+            return resp.headers.get("Access-Control-Allow-Origin")
+
+    try:
+        assert allowed("http://localhost:3000") == "http://localhost:3000"
+        assert allowed("https://evil.example") is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_registry_keeps_one_fingerprint_per_file(tmp_path: Path) -> None:
+    csv_path = tmp_path / "concurso.csv"
+    registry = ArtifactRegistry({"concurso": csv_path})
+    seen = set()
+    for size in (100, 200, 300):
+        write_forms_csv(ContestSpec.default(size, seed=1), csv_path)
+        seen.add(registry.fingerprint("concurso"))
+        assert registry.fingerprint("concurso") in seen
+    assert len(seen) == 3 and len(registry._fingerprints) == 1
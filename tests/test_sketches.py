@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from oscar_noel_audit.cli import main
+from oscar_noel_audit.sketches import HyperLogLog, SpaceSaving, VoteSketches
+from oscar_noel_audit.synthetic import ContestSpec, generate_votes, write_forms_csv
+
+
+def test_hyperloglog_within_error_bound_and_mergeable() -> None:
+    values = np.array([f"user{i}@x.com" for i in range(100_000)], dtype=object)
+    whole = HyperLogLog(p=12).add(values)
+    left = HyperLogLog(p=12).add(values[:60_000])
+    right = HyperLogLog(p=12).add(values[40_000:])
+
+    assert abs(whole.estimate() - 100_000) / 100_000 < 3 * whole.relative_error
+    assert np.array_equal(left.merge(right).registers, whole.registers)
+    assert len(HyperLogLog().add(values[:50])) == 50
+
+
+def test_space_saving_bounds() -> None:
+    raw = pd.concat(list(generate_votes(ContestSpec.default(20_000, seed=3))), ignore_index=True)
+    exact = raw["email"].value_counts()
+
+    summary = SpaceSaving(k=50)
+    for start in range(0, len(raw), 4_000):
+        summary.add(raw["email"].iloc[start : start + 4_000])
+    top = summary.top(5)
+    assert top["item"].tolist()[:3] == exact.index[:3].tolist()
+    truth = exact.reindex(top["item"]).to_numpy()
+    assert np.all((top["guaranteed"].to_numpy() <= truth) & (truth <= top["count"].to_numpy()))
+
+
+def test_vote_sketches_merge_and_cli(tmp_path: Path) -> None:
+    chunks = list(generate_votes(ContestSpec.default(6_000, seed=8), chunk_rows=2_000))
+    merged = VoteSketches(p=12, k=20)
+    for chunk in chunks:
+        merged.merge(VoteSketches(p=12, k=20).update(chunk))
+    raw = pd.concat(chunks, ignore_index=True)
+    report = merged.to_dict(top=5)
+
+    assert report["rows"] == len(raw)
+    assert abs(report["unique_emails"] - raw["email"].nunique()) <= 0.05 * raw["email"].nunique()
+    assert set(report["unique_by_choice"]) == set(raw["choice"].astype(str))
+
+    csv_path = write_forms_csv(ContestSpec.default(6_000, seed=8), tmp_path / "export.csv")
+    out = tmp_path / "sketch.json"
+    assert main(["sketch", str(csv_path), "--out", str(out), "--chunksize", "1000", "--quiet"]) == 0
+    assert json.loads(out.read_text(encoding="utf-8"))["rows"] == 6_000
+
+
+def test_audit_sketches_flag(tmp_path: Path) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(3_000, seed=5), tmp_path / "export.csv")
+    for backend in ("pandas", "duckdb"):
+        out = tmp_path / backend
+        args = ["audit", str(csv_path), "--out", str(out), "--backend", backend, "--sketches", "--quiet"]
+        assert main(args) == 0
+        summary = json.loads((out / "summary.json").read_text(encoding="utf-8"))["sketches"]
+        assert summary["rows"] == 3_000
+        assert all("@" not in row["item"] for row in summary["top_emails"])
+        assert all("@" not in row["item"] for row in summary["top_domains"])
+
+    assert main(["audit", str(csv_path), "--out", str(tmp_path / "plain"), "--quiet"]) == 0
+    assert "sketches" not in json.loads((tmp_path / "plain" / "summary.json").read_text(encoding="utf-8"))
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from oscar_noel_audit.candidates import build_candidate_mapping
+from oscar_noel_audit.cli import main
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.io import load_votes_csv
+from oscar_noel_audit.pipeline import build_audit_artifacts
+from oscar_noel_audit.report import audit_report
+from oscar_noel_audit.store import MANIFEST, STORE_ENV, ArtifactStore, StoreError, default_root
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+
+
+def test_saved_audit_reopens_with_the_same_tables_and_report(tmp_path: Path) -> None:
+    cfg = AuditConfig.default()
+    raw = load_votes_csv(write_forms_csv(ContestSpec.default(2_000, seed=4), tmp_path / "concurso.csv"))
+    artifacts = build_audit_artifacts(raw, cfg)
+    mapping = build_candidate_mapping(raw["choice"])
+    store = ArtifactStore(tmp_path / "store")
+
+    saved = store.save(artifacts, cfg, name="concurso", extra_tables={"candidate_mapping": mapping})
+    reopened = store.open(saved.key)
+    assert reopened.manifest["schema_version"] == saved.manifest["schema_version"]
+    assert reopened.report["rankings"] == json.loads(json.dumps(audit_report(artifacts, cfg)["rankings"]))
+    assert reopened.table("base", columns=["email"])["email"].tolist() == artifacts.base["email"].tolist()
+
+    loaded = reopened.artifacts
+    # Parquet brings the domain categories back as str instead of object; values are the same
+    pd.testing.assert_frame_equal(loaded.base, artifacts.base, check_categorical=False)
+    pd.testing.assert_frame_equal(loaded.raw, artifacts.raw)
+    for name in ("hourly", "hourly_outliers", "email_cohorts"):
+        pd.testing.assert_frame_equal(getattr(loaded, name), getattr(artifacts, name))
+    pd.testing.assert_frame_equal(loaded.email_index.table, artifacts.email_index.table)
+    pd.testing.assert_frame_equal(loaded.coburst.components, artifacts.coburst.components)
+    np.testing.assert_array_equal(loaded.cleaned_mask, artifacts.cleaned_mask)
+    np.testing.assert_array_equal(loaded.scenario_mask("C"), artifacts.scenario_mask("C"))
+    assert loaded.suspicion_summary == artifacts.suspicion_summary
+    assert reopened.config == cfg
+    pd.testing.assert_frame_equal(reopened.table("candidate_mapping"), mapping)
+
+
+def test_store_keys_on_input_and_config_and_rejects_other_schemas(tmp_path: Path) -> None:
+    cfg = AuditConfig.default()
+    raw = load_votes_csv(write_forms_csv(ContestSpec.default(600, seed=1), tmp_path / "concurso.csv"))
+    artifacts = build_audit_artifacts(raw, cfg)
+    store = ArtifactStore(tmp_path / "store", max_audits=2)
+
+    first = store.save(artifacts, cfg, input_fingerprint="abc")
+    assert store.save(artifacts, cfg, input_fingerprint="abc").key == first.key
+    assert store.find("abc", cfg) is not None
+    assert store.find("abc", AuditConfig.from_dict({"min_email_gap_seconds": 3})) is None
+    assert store.find("abc", cfg, {"merge_spellings": True}) is None
+
+    for fingerprint in ("def", "ghi"):
+        store.save(artifacts, cfg, input_fingerprint=fingerprint)
+    assert len(store.audits()) == 2
+
+    newest = store.audits()[0]
+    manifest = json.loads((newest.path / MANIFEST).read_text(encoding="utf-8"))
+    manifest["schema_version"] = -1
+    (newest.path / MANIFEST).write_text(json.dumps(manifest), encoding="utf-8")
+    with pytest.raises(StoreError):
+        store.open(newest.key)
+
+
+def test_store_key_follows_library_version_and_domain_files(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    domains = tmp_path / "descartaveis.txt"
+    domains.write_text("lixo.com\n", encoding="utf-8")
+    cfg = AuditConfig.from_dict({"disposable_domain_files": [str(domains)]})
+    raw = load_votes_csv(write_forms_csv(ContestSpec.default(600, seed=2), tmp_path / "concurso.csv"))
+    store = ArtifactStore(tmp_path / "store")
+    store.save(build_audit_artifacts(raw, cfg), cfg, input_fingerprint="abc")
+    assert store.find("abc", cfg) is not None
+
+    monkeypatch.setattr("oscar_noel_audit.store.__version__", "0.0.0-outra")
+    assert store.find("abc", cfg) is None
+    monkeypatch.undo()
+
+    domains.write_text("lixo.com\noutro.com\n", encoding="utf-8")
+    assert store.find("abc", cfg) is None
+
+
+def test_concurrent_saves_of_the_same_audit_share_one_directory(tmp_path: Path) -> None:
+    cfg = AuditConfig.default()
+    raw = load_votes_csv(write_forms_csv(ContestSpec.default(600, seed=5), tmp_path / "concurso.csv"))
+    artifacts = build_audit_artifacts(raw, cfg)
+    store = ArtifactStore(tmp_path / "store")
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        keys = set(pool.map(lambda _: store.save(artifacts, cfg, input_fingerprint="abc").key, range(8)))
+    assert len(keys) == 1 and [a.key for a in store.audits()] == list(keys)
+    assert [p.name for p in store.root.iterdir()] == list(keys)
+
+    # An unreadable audit under the same key is replaced
+    manifest = store.root / keys.pop() / MANIFEST
+    manifest.write_text(json.dumps({"schema_version": -1}), encoding="utf-8")
+    saved = store.save(artifacts, cfg, input_fingerprint="abc")
+    assert saved.manifest["schema_version"] == store.open(saved.key).manifest["schema_version"] != -1
+
+
+def test_default_store_lives_in_the_user_data_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delenv(STORE_ENV, raising=False)
+    monkeypatch.setenv("XDG_DATA_HOME", str(tmp_path / "dados"))
+    monkeypatch.setenv("LOCALAPPDATA", str(tmp_path / "dados"))
+    assert ArtifactStore().root == tmp_path / "dados" / "oscar_noel_audit" / "store"
+
+    monkeypatch.setenv(STORE_ENV, str(tmp_path / "auditorias"))
+    assert default_root() == tmp_path / "auditorias"
+    assert ArtifactStore().root.is_dir()
+
+
+def test_cli_audit_reuses_the_stored_audit_and_lists_history(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    csv_path = write_forms_csv(ContestSpec.default(800, seed=3), tmp_path / "concurso.csv")
+    store_dir = tmp_path / "store"
+
+    assert main(["audit", str(csv_path), "--out", str(tmp_path / "a"), "--store", str(store_dir), "--quiet"]) == 0
+    (audit,) = ArtifactStore(store_dir).audits()
+    assert main(["audit", str(csv_path), "--out", str(tmp_path / "b"), "--store", str(store_dir), "--quiet"]) == 0
+    assert [a.key for a in ArtifactStore(store_dir).audits()] == [audit.key]
+    for name in ("rankings.json", "flags.json"):
+        assert (tmp_path / "a" / name).read_text(encoding="utf-8") == (tmp_path / "b" / name).read_text(encoding="utf-8")
+
+    capsys.readouterr()
+    assert main(["history", str(store_dir)]) == 0
+    assert audit.key in capsys.readouterr().out
+    assert main(["history", str(store_dir), "--show", audit.key]) == 0
+    assert json.loads(capsys.readouterr().out)["counts"]["raw"] == 800
+    assert main(["history", str(store_dir), "--show", "nada"]) == 2
@@ -2,8 +2,16 @@ from __future__ import annotations
 
 import pandas as pd
 
+from oscar_noel_audit.cleaning import add_basic_features, apply_user_rules
 from oscar_noel_audit.config import AuditConfig
-from oscar_noel_audit.suspicion import detect_hourly_outliers, flag_suspicious_votes, hourly_counts
+from oscar_noel_audit.pipeline import build_audit_artifacts
+from oscar_noel_audit.profiling import StageProfiler
+from oscar_noel_audit.suspicion import (
+    detect_hourly_outliers,
+    flag_suspicious_votes,
+    hourly_counts,
+    summarize_suspicion,
+)
 
 
 def test_flag_suspicious_votes_short_deltas_and_night() -> None:
@@ -22,8 +30,6 @@ def test_flag_suspicious_votes_short_deltas_and_night() -> None:
         }
     )
 
-    from oscar_noel_audit.cleaning import add_basic_features
-
     enriched = add_basic_features(df)
     enriched["exclude_day"] = False
     enriched["suspicious_email_plus_3dig_gmail"] = False
@@ -49,9 +55,63 @@ def test_detect_hourly_outliers_marks_spike() -> None:
             "choice": ["X", "X", "X", "Y"],
         }
     )
-    from oscar_noel_audit.cleaning import add_basic_features
 
     hourly = hourly_counts(add_basic_features(df))
     out = detect_hourly_outliers(hourly, z_thresh=1.0)
     assert "is_outlier" in out.columns
 
+
+def test_build_audit_artifacts_records_stage_profile() -> None:
+    cfg = AuditConfig.default()
+    df = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(
+                ["2025-12-19 10:00:00", "2025-12-19 10:00:01", "2025-12-20 11:00:00"]
+            ),
+            "email": ["a@x.com", "a@x.com", "b@x.com"],
+            "choice": ["X", "X", "Y"],
+        }
+    )
+    seen = []
+    profiler = StageProfiler(track_memory=True, hook=seen.append)
+
+    artifacts = build_audit_artifacts(df, cfg, profiler=profiler)
+
+    stages = [t.stage for t in artifacts.profile]
+    assert "flags.choice_delta" in stages
+    assert "hourly_outliers" in stages
+    assert seen == list(artifacts.profile)
+    dedupe = next(t for t in artifacts.profile if t.stage == "rules.dedupe")
+    assert (dedupe.rows_in, dedupe.rows_out) == (3, 1)
+    assert all(t.peak_bytes is not None and t.seconds >= 0 for t in artifacts.profile)
+
+
+def test_email_gap_flags_short_resubmission_and_regular_cadence() -> None:
+    cfg = AuditConfig.default()
+    start = pd.Timestamp("2025-12-10 10:00:00")
+    bot = [start + pd.Timedelta(seconds=30 * i) for i in range(6)]
+    human = [start + pd.Timedelta(hours=h) for h in (1, 5, 30)]
+    fast = [start + pd.Timedelta(seconds=s) for s in (7, 10)]
+    df = pd.DataFrame(
+        {
+            "timestamp": bot + human + fast,
+            "email": ["bot@x.com"] * 6 + ["human@x.com"] * 3 + ["fast@x.com"] * 2,
+            "choice": ["X"] * 11,
+        }
+    ).sample(frac=1.0, random_state=0)
+
+    flagged = flag_suspicious_votes(apply_user_rules(df, cfg)[1], cfg)
+    by_email = flagged.groupby("email")
+
+    assert by_email["flag_email_regular_cadence"].all().to_dict() == {
+        "bot@x.com": True,
+        "fast@x.com": False,
+        "human@x.com": False,
+    }
+    assert by_email["flag_email_short_gap"].sum().to_dict() == {"bot@x.com": 0, "fast@x.com": 1, "human@x.com": 0}
+    assert flagged.loc[flagged["email"] == "fast@x.com", "email_delta_prev_seconds"].max() == 3.0
+
+    summary = summarize_suspicion(flagged)
+    assert summary.email_short_gaps == 1
+    assert summary.email_regular_cadence == 6
+    assert summary.regular_cadence_senders == 1
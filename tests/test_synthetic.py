@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.io import load_votes_csv
+from oscar_noel_audit.synthetic import BotCampaign, ContestSpec, generate_votes, write_forms_csv
+
+
+def test_generate_votes_is_chronological_and_injects_campaigns() -> None:
+    spec = ContestSpec(
+        rows=5_000,
+        campaigns=(
+            BotCampaign("suffix3", share=0.2, choice=3, window=(0.5, 1.0)),
+            BotCampaign("repeat_sender", share=0.05, choice=1, senders=2),
+        ),
+        seed=7,
+    )
+
+    chunks = list(generate_votes(spec, chunk_rows=1_500))
+    votes = pd.concat(chunks, ignore_index=True)
+
+    assert len(chunks) == 4
+    assert len(votes) == 5_000
+    assert votes["timestamp"].is_monotonic_increasing
+
+    cfg = AuditConfig.default()
+    suffix3 = votes["email"].str.match(cfg.suspicious_email_suffix3_regex)
+    assert 600 < int(suffix3.sum()) < 1_400
+    assert votes.loc[suffix3, "choice"].nunique() == 1
+    assert int(votes["email"].value_counts().iloc[0]) > 50
+
+
+def test_write_forms_csv_round_trips_through_loader(tmp_path: Path) -> None:
+    spec = ContestSpec.default(2_000, seed=1)
+    path = write_forms_csv(spec, tmp_path / "export.csv", chunk_rows=700)
+
+    loaded = load_votes_csv(path)
+    expected = pd.concat(generate_votes(spec, chunk_rows=700), ignore_index=True)
+
+    assert loaded["timestamp"].tolist() == expected["timestamp"].tolist()
+    assert loaded["email"].tolist() == expected["email"].tolist()
@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pandas as pd
+
+from oscar_noel_audit.config import AuditConfig
+from oscar_noel_audit.io import load_votes_csv
+from oscar_noel_audit.pipeline import build_audit_artifacts
+from oscar_noel_audit.synthetic import ContestSpec, write_forms_csv
+from oscar_noel_audit.timeline import Timeline
+
+
+def _artifacts(tmp_path: Path):
+    csv_path = write_forms_csv(ContestSpec.default(3_000, seed=9), tmp_path / "concurso.csv")
+    return build_audit_artifacts(load_votes_csv(csv_path), AuditConfig.default())
+
+
+def test_ranking_at_any_instant_matches_refiltering(tmp_path: Path) -> None:
+    artifacts = _artifacts(tmp_path)
+    votes = artifacts.scenario_votes("B")
+    timeline = artifacts.timeline("B")
+    assert artifacts.timeline("B") is timeline
+
+    ts = votes["timestamp"]
+    for until, since in [
+        (ts.iloc[len(ts) // 3], None),
+        (ts.iloc[-1], ts.iloc[len(ts) // 2]),  # interval bounds sit on real votes
+        (ts.iloc[0] - pd.Timedelta("1h"), None),
+    ]:
+        window = votes[(ts <= until) & ((ts >= since) if since is not None else True)]
+        expected = window["choice"].astype(str).value_counts()
+        ranking = timeline.ranking(until, since=since)
+        assert ranking.set_index("choice")["votes"].to_dict() == expected.to_dict()
+        assert ranking["votes"].is_monotonic_decreasing
+    assert timeline.ranking()["votes"].sum() == len(votes)
+
+
+def test_evolution_is_cumulative_and_ends_at_the_final_ranking(tmp_path: Path) -> None:
+    timeline = _artifacts(tmp_path).timeline("A")
+    evolution = timeline.evolution("6h")
+    assert (evolution.diff().dropna() >= 0).all().all()
+    assert evolution.iloc[-1].sum() == timeline.total
+
+    series = timeline.evolution_dict("6h", top=3)
+    assert len(series["times"]) == len(series["total"]) == len(series["leader"]) == len(evolution)
+    final = timeline.ranking()
+    assert series["leader"][-1] == final["choice"].iloc[0]
+    assert set(final["choice"].head(3)) <= set(series["votes"])
+
+
+def test_timeline_from_votes_breaks_ties_by_name() -> None:
+    votes = pd.DataFrame(
+        {
+            "timestamp": pd.to_datetime(["2025-12-18 10:00", "2025-12-18 10:30", "2025-12-18 11:10"]),
+            "choice": ["Noel B", "Noel A", "Noel B"],
+        }
+    )
+    timeline = Timeline.from_votes(votes)
+    assert timeline.ranking("2025-12-18 10:45")["choice"].tolist() == ["Noel A", "Noel B"]
+    assert timeline.evolution_dict("1h")["leader"] == ["Noel A", "Noel B"]
@@ -0,0 +1,60 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+from oscar_noel_audit.upload_cache import UploadCache
+
+
+def test_same_content_maps_to_same_path(tmp_path: Path) -> None:
+    cache = UploadCache(tmp_path)
+    first = cache.put(b"a,b\n1,2\n")
+    second = cache.put(b"a,b\n1,2\n")
+
+    assert first == second
+    assert first.read_bytes() == b"a,b\n1,2\n"
+    assert cache.put(b"other") != first
+    assert len(cache.entries()) == 2
+
+
+def test_eviction_drops_least_recently_used(tmp_path: Path) -> None:
+    cache = UploadCache(tmp_path, max_bytes=10_000, max_files=2)
+    old = cache.put(b"old")
+    mid = cache.put(b"mid")
+    os.utime(old, (1, 1))
+    os.utime(mid, (2, 2))
+    cache.put(b"old")  # hit refreshes its recency
+
+    new = cache.put(b"new")
+
+    assert new.exists() and old.exists()
+    assert not mid.exists()
+
+    big = UploadCache(tmp_path, max_bytes=5, max_files=10).put(b"x" * 50)
+    assert big.exists() and [p.name for p in cache.entries()] == [big.name]
+
+
+def test_touch_refreshes_recency_and_reports_evicted_entries(tmp_path: Path) -> None:
+    cache = UploadCache(tmp_path, max_bytes=10_000, max_files=2)
+    old = cache.put(b"old")
+    mid = cache.put(b"mid")
+    os.utime(old, (1, 1))
+    os.utime(mid, (2, 2))
+
+    assert cache.touch(old)
+    cache.put(b"new")
+    assert old.exists() and not mid.exists()
+
+    assert not cache.touch(mid)
+    assert cache.put(b"mid") == mid and mid.exists()
+
+
+def test_cleanup_removes_stale_partial_writes(tmp_path: Path) -> None:
+    cache = UploadCache(tmp_path)
+    partial = tmp_path / "abc.partial"
+    partial.write_bytes(b"x")
+    os.utime(partial, (1, 1))
+
+    cache.cleanup(max_age_seconds=60)
+
+    assert not partial.exists()